@@ -0,0 +1,13 @@
+# coding=utf-8
+"""
+Benchmarks of the permission hot paths
+
+Run the suite from the repository root with::
+
+    $ python -m benchmarks --users 100 --articles 1000 --output result.json
+
+A dataset (users, groups, articles, and collaborators) is seeded into SQLite
+and each benchmark reports operations per second, p50/p99 latency, and the
+number of queries per operation as JSON thus results of different revisions
+can be compared.
+"""
@@ -0,0 +1,113 @@
+# coding=utf-8
+"""
+Run the benchmark suite and emit the results as JSON
+
+Usage::
+
+    $ python -m benchmarks --help
+"""
+from __future__ import print_function
+from __future__ import unicode_literals
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmark the permission hot paths on SQLite')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--groups', type=int, default=5)
+    parser.add_argument('--articles', type=int, default=200)
+    parser.add_argument('--collaborators', type=int, default=3,
+                        help='a number of editors of each article')
+    parser.add_argument('--handlers', default='1,10,50',
+                        help='comma separated numbers of registered '
+                             'handlers for backend.has_perm')
+    parser.add_argument('--page-size', type=int, default=20,
+                        help='a number of articles rendered in templates')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0,
+                        help='a seed of the random dataset')
+    parser.add_argument('--filter', default=None,
+                        help='run benchmarks whose name contain the string')
+    parser.add_argument('--output', default=None,
+                        help='a file to write JSON (default: stdout)')
+    return parser.parse_args(argv)
+
+
+def setup_django():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for path in (root, os.path.join(root, 'src')):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    import django
+    from django.core.management import call_command
+    django.setup()
+    options = {'verbosity': 0, 'interactive': False}
+    if django.VERSION >= (1, 9):
+        options['run_syncdb'] = True
+    call_command('migrate', **options)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_django()
+    import django
+    import permission
+    from benchmarks.cases import get_benchmarks
+    from benchmarks.runner import measure
+    from benchmarks.seed import seed
+
+    dataset = seed(users=args.users, groups=args.groups,
+                   articles=args.articles, collaborators=args.collaborators,
+                   random_seed=args.seed)
+    handlers = [int(x) for x in args.handlers.split(',') if x.strip()]
+    results = []
+    for prepare, benchmark in get_benchmarks(dataset, handlers,
+                                             args.page_size):
+        if args.filter and args.filter not in benchmark.name:
+            continue
+        prepare()
+        results.append(measure(benchmark, iterations=args.iterations,
+                               warmup=args.warmup))
+        print('%-32s %-48s %12.1f ops/sec' % (
+            benchmark.name,
+            ', '.join('%s=%s' % x for x in sorted(benchmark.params.items())),
+            results[-1]['ops_per_sec'],
+        ), file=sys.stderr)
+
+    report = {
+        'meta': {
+            'created_at': datetime.datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'permission': permission.__version__,
+            'dataset': {
+                'users': args.users,
+                'groups': args.groups,
+                'articles': args.articles,
+                'collaborators': args.collaborators,
+                'seed': args.seed,
+            },
+            'iterations': args.iterations,
+            'warmup': args.warmup,
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as fp:
+            fp.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
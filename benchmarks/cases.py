@@ -0,0 +1,316 @@
+# coding=utf-8
+"""
+Benchmarks of the permission hot paths
+"""
+from __future__ import unicode_literals
+from permission.tests.models import Article
+from benchmarks.runner import Benchmark
+
+
+__all__ = ('get_benchmarks',)
+
+
+PERM = 'permission.change_article'
+
+USER_CACHE_NAMES = (
+    # django-permission
+    '_logical_perms_cache',
+    '_permission_group_names_cache',
+    # django.contrib.auth.backends.ModelBackend
+    '_perm_cache',
+    '_user_perm_cache',
+    '_group_perm_cache',
+)
+
+_proxy_models = []
+
+
+def reset_caches(*users):
+    """
+    Clear caches of permission checks thus each operation is measured cold
+    """
+    from permission.utils.cache import get_module_perms_cache
+    get_module_perms_cache().clear()
+    for user in users:
+        for name in USER_CACHE_NAMES:
+            user.__dict__.pop(name, None)
+
+
+def get_proxy_models(count):
+    """
+    Get proxy models of Article to register ``count`` handlers
+    """
+    while len(_proxy_models) < count:
+        name = str('BenchmarkArticle%d' % len(_proxy_models))
+        meta = type(str('Meta'), (object,), {
+            'proxy': True,
+            'app_label': 'permission',
+        })
+        _proxy_models.append(type(name, (Article,), {
+            'Meta': meta,
+            '__module__': __name__,
+        }))
+    return _proxy_models[:count]
+
+
+def use_permission_logics(model, *permission_logics, **kwargs):
+    """
+    Replace all registered handlers with a handler of the model which have
+    the permission logics
+
+    Parameters
+    ----------
+    model : django model class
+        A model of the permission logics
+    permission_logics : permission logic instances
+        Permission logics of the model
+    handlers : integer
+        A number of registered handlers. Only the handler of ``model``
+        supports ``PERM``; handlers of proxy models of Article support their
+        own perms thus the benchmark measures the lookup in a large registry.
+    """
+    from django.contrib.auth import get_user_model
+    from permission.handlers import LogicalPermissionHandler
+    from permission.logics import AuthorPermissionLogic
+    from permission.utils.handlers import registry
+    from permission.utils.logics import add_permission_logic
+    handlers = kwargs.get('handlers', 1)
+    proxies = get_proxy_models(handlers - 1)
+    for cls in [Article, get_user_model()] + _proxy_models:
+        for name in ('_permission_logics', '_permission_handler'):
+            if name in cls.__dict__:
+                delattr(cls, name)
+    registry._registry = {}
+    registry.clear_index()
+    for permission_logic in permission_logics:
+        add_permission_logic(model, permission_logic)
+    for proxy in proxies:
+        proxy._permission_logics = set()
+        registry.register(proxy, handler=LogicalPermissionHandler)
+        proxy._permission_handler.includes = [
+            'permission.change_%s' % proxy._meta.model_name,
+        ]
+        add_permission_logic(proxy, AuthorPermissionLogic(
+            field_name='editor'))
+
+
+def backend_benchmarks(dataset, handlers=(1, 10, 50)):
+    from permission.backends import PermissionBackend
+    from permission.logics import AuthorPermissionLogic
+    backend = PermissionBackend()
+    user = dataset.users[0]
+    article = _get_article(dataset, author=False)
+
+    def run():
+        backend.has_perm(user, PERM, article)
+
+    def setup_cold():
+        reset_caches(user)
+
+    for count in handlers:
+        def prepare(count=count):
+            use_permission_logics(Article, AuthorPermissionLogic(),
+                                  handlers=count)
+        yield prepare, Benchmark('backend.has_perm', run, setup_cold,
+                                 handlers=count, cache='cold')
+        yield prepare, Benchmark('backend.has_perm', run, None,
+                                 handlers=count, cache='warm')
+
+
+def logic_benchmarks(dataset):
+    from django.contrib.auth import get_user_model
+    from permission.logics import AuthorPermissionLogic
+    from permission.logics import CollaboratorsPermissionLogic
+    from permission.logics import GroupInPermissionLogic
+    from permission.logics import OneselfPermissionLogic
+    from permission.logics import StaffPermissionLogic
+    user = dataset.users[0]
+    article = _get_article(dataset, author=False)
+    group_name = dataset.groups[-1].name if dataset.groups else 'nobody'
+    cases = (
+        ('AuthorPermissionLogic', Article, AuthorPermissionLogic,
+         {}, article),
+        ('CollaboratorsPermissionLogic', Article,
+         CollaboratorsPermissionLogic, {'field_name': 'editors'}, article),
+        ('GroupInPermissionLogic', Article, GroupInPermissionLogic,
+         {'group_names': [group_name]}, article),
+        ('StaffPermissionLogic', Article, StaffPermissionLogic, {}, article),
+        ('OneselfPermissionLogic', get_user_model(), OneselfPermissionLogic,
+         {}, dataset.users[-1]),
+    )
+    for name, model, logic_class, kwargs, obj in cases:
+        permission_logic = logic_class(**kwargs)
+        perm = '%s.change_%s' % (model._meta.app_label,
+                                 model._meta.object_name.lower())
+
+        def prepare(model=model, permission_logic=permission_logic):
+            use_permission_logics(model, permission_logic)
+
+        def run_without_obj(permission_logic=permission_logic, perm=perm):
+            permission_logic.has_perm(user, perm)
+
+        def run_with_obj(permission_logic=permission_logic, perm=perm,
+                         obj=obj):
+            permission_logic.has_perm(user, perm, obj)
+
+        def setup():
+            reset_caches(user)
+
+        yield prepare, Benchmark('logic.has_perm', run_without_obj, setup,
+                                 logic=name, obj=False)
+        yield prepare, Benchmark('logic.has_perm', run_with_obj, setup,
+                                 logic=name, obj=True)
+
+
+def module_perms_benchmarks(dataset):
+    from permission.backends import PermissionBackend
+    from permission.logics import AuthorPermissionLogic
+    backend = PermissionBackend()
+    user = dataset.users[0]
+
+    def prepare():
+        use_permission_logics(Article, AuthorPermissionLogic())
+
+    def run():
+        backend.has_module_perms(user, 'permission')
+
+    def setup_cold():
+        reset_caches(user)
+
+    yield prepare, Benchmark('backend.has_module_perms', run, setup_cold,
+                             cache='cold')
+    yield prepare, Benchmark('backend.has_module_perms', run, None,
+                             cache='warm')
+
+
+def decorator_benchmarks(dataset):
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+    from django.views.generic import View
+    from django.views.generic.detail import SingleObjectMixin
+    from permission.decorators.classbase import \
+        permission_required as class_permission_required
+    from permission.decorators.functionbase import \
+        permission_required as function_permission_required
+    from permission.decorators.methodbase import \
+        permission_required as method_permission_required
+    from permission.logics import AuthorPermissionLogic
+    article = _get_article(dataset, author=True)
+    user = article.author
+    request = RequestFactory().get('/')
+    request.user = user
+
+    @function_permission_required(PERM)
+    def function_view(request, *args, **kwargs):
+        return HttpResponse('ok')
+
+    class MethodView(SingleObjectMixin, View):
+        model = Article
+
+        @method_permission_required(PERM)
+        def get(self, request, *args, **kwargs):
+            return HttpResponse('ok')
+
+    @class_permission_required(PERM)
+    class ClassView(SingleObjectMixin, View):
+        model = Article
+
+        def get(self, request, *args, **kwargs):
+            return HttpResponse('ok')
+
+    method_view = MethodView.as_view()
+    class_view = ClassView.as_view()
+    queryset = Article.objects.all()
+
+    def prepare():
+        use_permission_logics(Article, AuthorPermissionLogic())
+
+    def setup():
+        reset_caches(user)
+
+    def run_function():
+        function_view(request, queryset=queryset, object_id=article.pk)
+
+    def run_method():
+        method_view(request, pk=article.pk)
+
+    def run_class():
+        class_view(request, pk=article.pk)
+
+    yield prepare, Benchmark('decorators.permission_required', run_function,
+                             setup, view='function')
+    yield prepare, Benchmark('decorators.permission_required', run_method,
+                             setup, view='method')
+    yield prepare, Benchmark('decorators.permission_required', run_class,
+                             setup, view='class')
+
+
+def template_benchmarks(dataset, page_size=20):
+    from django.template import Context, Template
+    from permission.logics import AuthorPermissionLogic
+    from permission.logics import CollaboratorsPermissionLogic
+    user = dataset.users[0]
+    articles = dataset.articles[:page_size]
+    loop = (
+        "{% for article in articles %}"
+        "{% permission user has 'permission.change_article' of article %}"
+        "C{% endpermission %}"
+        "{% endfor %}"
+    )
+    templates = (
+        ('permission', Template("{% load permissionif %}" + loop)),
+        ('permission_prefetch', Template(
+            "{% load permissionif %}"
+            "{% permission_prefetch user 'permission.change_article' "
+            "for articles %}" + loop)),
+    )
+
+    def prepare():
+        use_permission_logics(
+            Article,
+            AuthorPermissionLogic(),
+            CollaboratorsPermissionLogic(field_name='editors'),
+        )
+
+    def setup():
+        reset_caches(user)
+
+    for name, template in templates:
+        def run(template=template):
+            template.render(Context({'user': user, 'articles': articles}))
+
+        yield prepare, Benchmark('templatetags.permissionif', run, setup,
+                                 tag=name, objects=len(articles))
+
+
+def get_benchmarks(dataset, handlers=(1, 10, 50), page_size=20):
+    """
+    Get benchmarks of the dataset
+
+    Returns
+    -------
+    iterator
+        An iterator of (prepare function, :class:`Benchmark`). The prepare
+        function register permission logics of the benchmark.
+    """
+    for pair in backend_benchmarks(dataset, handlers):
+        yield pair
+    for pair in logic_benchmarks(dataset):
+        yield pair
+    for pair in module_perms_benchmarks(dataset):
+        yield pair
+    for pair in decorator_benchmarks(dataset):
+        yield pair
+    for pair in template_benchmarks(dataset, page_size):
+        yield pair
+
+
+def _get_article(dataset, author):
+    # an article authored (or not authored) by the first user
+    user = dataset.users[0]
+    for article in dataset.articles:
+        if (article.author_id == user.pk) == author:
+            if author:
+                article.author = user
+            return article
+    return dataset.articles[0]
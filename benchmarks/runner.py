@@ -0,0 +1,113 @@
+# coding=utf-8
+"""
+Measurement utilities of the benchmark suite
+"""
+from __future__ import division
+from __future__ import unicode_literals
+import timeit
+from django.db import connection
+
+
+__all__ = ('Benchmark', 'measure', 'percentile')
+
+
+class Benchmark(object):
+    """
+    A benchmark of an operation
+
+    Attributes
+    ----------
+    name : string
+        A name of the benchmark (e.g. ``'backend.has_perm'``)
+    func : callable
+        An operation which is measured
+    setup : callable or None
+        A function called before each operation out of the measured time
+        (e.g. to clear caches of users)
+    params : dict
+        Parameters of the benchmark which are emitted with the result
+    """
+    def __init__(self, name, func, setup=None, **params):
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.params = params
+
+
+def percentile(values, q):
+    """
+    Get the q-th percentile of sorted values with the nearest-rank method
+    """
+    if not values:
+        return 0.0
+    rank = int(round(q / 100.0 * len(values) + 0.5))
+    return values[min(max(rank, 1), len(values)) - 1]
+
+
+def measure(benchmark, iterations=200, warmup=10, query_iterations=10):
+    """
+    Measure a benchmark
+
+    Operations are timed without the debug cursor and queries are counted in
+    a separate run thus the latency does not include the cost of query
+    logging.
+
+    Parameters
+    ----------
+    benchmark : Benchmark
+        A benchmark which is measured
+    iterations : integer
+        A number of timed operations
+    warmup : integer
+        A number of operations before timing
+    query_iterations : integer
+        A number of operations of which queries are counted
+
+    Returns
+    -------
+    dict
+        A result which contain ``ops_per_sec``, ``p50_us``, ``p99_us``,
+        ``mean_us`` and ``queries_per_op``
+    """
+    func, setup = benchmark.func, benchmark.setup
+    timer = timeit.default_timer
+    for i in range(warmup):
+        if setup:
+            setup()
+        func()
+
+    timings = []
+    for i in range(iterations):
+        if setup:
+            setup()
+        start = timer()
+        func()
+        timings.append(timer() - start)
+
+    queries = 0
+    force_debug_cursor = connection.force_debug_cursor
+    connection.force_debug_cursor = True
+    try:
+        for i in range(query_iterations):
+            if setup:
+                setup()
+            connection.queries_log.clear()
+            func()
+            queries += len(connection.queries_log)
+    finally:
+        connection.force_debug_cursor = force_debug_cursor
+        connection.queries_log.clear()
+
+    total = sum(timings)
+    timings.sort()
+    return {
+        'name': benchmark.name,
+        'params': benchmark.params,
+        'iterations': iterations,
+        'ops_per_sec': iterations / total if total else 0.0,
+        'mean_us': total / iterations * 1e6 if iterations else 0.0,
+        'p50_us': percentile(timings, 50) * 1e6,
+        'p99_us': percentile(timings, 99) * 1e6,
+        'queries_per_op': (queries / query_iterations
+                           if query_iterations else None),
+    }
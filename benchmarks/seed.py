@@ -0,0 +1,87 @@
+# coding=utf-8
+"""
+Dataset of the benchmark suite
+"""
+from __future__ import unicode_literals
+import random
+
+
+__all__ = ('Dataset', 'seed')
+
+
+class Dataset(object):
+    """
+    A seeded dataset
+
+    Attributes
+    ----------
+    users : list
+        Users. Each user belongs to one of ``groups``.
+    groups : list
+        Groups named ``group0``, ``group1``, ...
+    articles : list
+        Articles. Each article has an author and ``collaborators`` editors.
+    """
+    def __init__(self, users, groups, articles):
+        self.users = users
+        self.groups = groups
+        self.articles = articles
+
+
+def seed(users=50, groups=5, articles=200, collaborators=3, random_seed=0):
+    """
+    Seed a dataset with bulk queries
+
+    Parameters
+    ----------
+    users : integer
+        A number of users
+    groups : integer
+        A number of groups
+    articles : integer
+        A number of articles
+    collaborators : integer
+        A number of editors of each article
+    random_seed : integer
+        A seed of the random generator to reproduce the dataset
+
+    Returns
+    -------
+    Dataset
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.models import Group
+    from permission.tests.models import Article
+    rand = random.Random(random_seed)
+    user_model = get_user_model()
+
+    Group.objects.bulk_create([
+        Group(name='group%d' % i) for i in range(groups)
+    ])
+    group_list = list(Group.objects.order_by('pk'))
+    user_model.objects.bulk_create([
+        user_model(username='user%d' % i, password='!')
+        for i in range(users)
+    ])
+    user_list = list(user_model.objects.order_by('pk'))
+    if group_list:
+        through = user_model.groups.through
+        through.objects.bulk_create([
+            through(user_id=user.pk, group_id=rand.choice(group_list).pk)
+            for user in user_list
+        ])
+
+    Article.objects.bulk_create([
+        Article(title='article%d' % i, content='',
+                author=rand.choice(user_list))
+        for i in range(articles)
+    ])
+    article_list = list(Article.objects.order_by('pk'))
+    through = Article.editors.through
+    through.objects.bulk_create([
+        through(article_id=article.pk, user_id=user.pk)
+        for article in article_list
+        for user in rand.sample(user_list, min(collaborators,
+                                               len(user_list)))
+    ])
+    return Dataset(user_list, group_list, article_list)
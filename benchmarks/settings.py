@@ -0,0 +1,51 @@
+# coding=utf-8
+"""
+Django settings of the benchmark suite
+"""
+import os
+from django import VERSION
+
+SECRET_KEY = 'benchmarks'
+
+DEBUG = False
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'permission',
+    'permission.tests',
+]
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        # use a file (e.g. to inspect the dataset) with BENCHMARK_DATABASE
+        'NAME': os.environ.get('BENCHMARK_DATABASE', ':memory:'),
+    }
+}
+
+AUTHENTICATION_BACKENDS = (
+    'django.contrib.auth.backends.ModelBackend',
+    'permission.backends.PermissionBackend',
+)
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {},
+    },
+]
+
+USE_TZ = True
+
+# permission logics are registered by each benchmark
+PERMISSION_AUTODISCOVER_ENABLE = False
+
+if VERSION >= (1, 9):
+    TEMPLATES[0]['OPTIONS']['builtins'] = [
+        'permission.templatetags.permissionif'
+    ]
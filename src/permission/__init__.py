@@ -4,6 +4,7 @@ __version__, VERSION = get_versions('django-permission', allow_ambiguous=True)
 # load shortcut functions
 from permission.utils.logics import add_permission_logic
 from permission.utils.logics import remove_permission_logic
+from permission.querysets import filter_queryset
 
 # autodiscover
 from permission.utils.autodiscover import autodiscover
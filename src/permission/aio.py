@@ -0,0 +1,183 @@
+# coding=utf-8
+"""
+Asynchronous permission checking
+
+Coroutine methods (``ahas_perm``) of permission backend, handlers and logics
+are defined in this module because the ``async def`` syntax is available only
+from Python 3.5. The classes take the methods when
+``permission.compat.has_native_coroutines`` is ``True``.
+
+Permission logics which never hit database (``PermissionLogic.cost`` is
+``MEMORY``) answer inline. Built-in permission logics which hit database use
+the asynchronous ORM when it is available (Django 4.1 or later). Others
+(including sync-only custom permission logics) are called via
+``asgiref.sync.sync_to_async`` or inline when asgiref is not installed.
+"""
+from __future__ import unicode_literals
+
+try:
+    from asgiref.sync import sync_to_async
+except ImportError:
+    sync_to_async = None
+
+
+def has_async_orm():
+    """
+    Return ``True`` if the django ORM has asynchronous methods (e.g.
+    ``QuerySet.aexists``)
+    """
+    from django.db.models.query import QuerySet
+    return hasattr(QuerySet, 'aexists')
+
+
+async def run_sync(func, *args, **kwargs):
+    """
+    Run the synchronous function in a thread via ``sync_to_async``
+
+    The function is called inline when asgiref is not installed.
+    """
+    if sync_to_async is None:
+        return func(*args, **kwargs)
+    return await sync_to_async(func)(*args, **kwargs)
+
+
+async def aget_user_group_names(user_obj):
+    """
+    Asynchronous version of
+    :func:`permission.logics.groupin.get_user_group_names`
+    """
+    from permission.logics.groupin import get_user_group_names
+    from permission.logics.groupin import get_cached_user_group_names
+    from permission.logics.groupin import set_cached_user_group_names
+    group_names = get_cached_user_group_names(user_obj)
+    if group_names is not None:
+        return group_names
+    if not has_async_orm():
+        return await run_sync(get_user_group_names, user_obj)
+    names = []
+    async for name in user_obj.groups.values_list('name', flat=True):
+        names.append(name)
+    group_names = frozenset(names)
+    set_cached_user_group_names(user_obj, group_names)
+    return group_names
+
+
+async def logic_ahas_perm(self, user_obj, perm, obj=None):
+    """
+    Check if user have permission (of object) asynchronously
+
+    The default implementation calls ``has_perm`` inline when the permission
+    logic never hit database, otherwise in a thread.
+    """
+    from permission.logics.base import MEMORY
+    if self.cost == MEMORY:
+        return self.has_perm(user_obj, perm, obj)
+    return await run_sync(self.has_perm, user_obj, perm, obj)
+
+
+async def collaborators_ahas_perm(self, user_obj, perm, obj=None):
+    """
+    Check if user have permission (of object) asynchronously
+
+    The membership is checked with ``QuerySet.aexists`` when the
+    asynchronous ORM is available.
+    """
+    from permission.compat import is_authenticated
+    if (obj is None or not is_authenticated(user_obj) or
+            not user_obj.is_active or
+            self.get_permission_action(perm) is None):
+        # the rule does not hit database
+        return self.has_perm(user_obj, perm, obj)
+    field_path = self._get_field_path(obj.__class__)
+    if field_path.is_relation:
+        result = self._is_prefetched_collaborator(user_obj, obj, field_path)
+        if result is not None:
+            return result
+        if has_async_orm():
+            queryset = self._get_collaborator_queryset(user_obj, obj)
+            return await queryset.aexists()
+    return await run_sync(self._is_collaborator, user_obj, obj)
+
+
+async def groupin_ahas_perm(self, user_obj, perm, obj=None):
+    """
+    Check if user have permission (of object) asynchronously
+
+    Group names of the user are loaded with the asynchronous ORM when it is
+    available.
+    """
+    from permission.compat import is_authenticated
+    if (is_authenticated(user_obj) and
+            self.get_permission_action(perm) is not None and
+            (obj is None or user_obj.is_active)):
+        # load group names thus has_perm does not hit database
+        await aget_user_group_names(user_obj)
+    return self.has_perm(user_obj, perm, obj)
+
+
+async def handler_ahas_perm(self, user_obj, perm, obj=None):
+    """
+    Check if user have permission (of object) asynchronously
+
+    The default implementation calls ``has_perm`` in a thread.
+    """
+    return await run_sync(self.has_perm, user_obj, perm, obj)
+
+
+async def logical_handler_ahas_perm(self, user_obj, perm, obj=None):
+    """
+    Check if user have permission (of object) asynchronously based on
+    ``ahas_perm`` of permission logics of the model
+
+    ``has_perm`` is called in a thread instead when the supported permissions
+    have not been loaded, the shared decision cache or the adaptive ordering
+    is enabled.
+    """
+    from permission.conf import settings
+    from permission.handlers import get_logical_perms_cache
+    from permission.utils.cache import get_decision_key
+    from permission.utils.cache import get_shared_decision_cache
+    if (not hasattr(self, '_perms_cache') or
+            settings.PERMISSION_ADAPTIVE_LOGIC_ORDERING or
+            get_shared_decision_cache() is not None):
+        return await run_sync(self.has_perm, user_obj, perm, obj)
+    if perm not in self.get_supported_permissions():
+        return False
+    cachekey = get_decision_key(perm, obj)
+    cache = get_logical_perms_cache(user_obj, self.model)
+    if cachekey is not None and cachekey in cache:
+        return cache[cachekey]
+    result = False
+    for permission_logic in self.get_permission_logics(perm):
+        if await permission_logic.ahas_perm(user_obj, perm, obj):
+            result = True
+            break
+    if cachekey is not None:
+        cache[cachekey] = result
+    return result
+
+
+async def backend_ahas_perm(self, user_obj, perm, obj=None):
+    """
+    Check if user have permission (of object) asynchronously based on
+    registered handlers.
+
+    See ``PermissionBackend.has_perm`` for the detail.
+    """
+    from permission.conf import settings
+    from permission.utils import permissions
+    from permission.utils.handlers import registry
+    if settings.PERMISSION_CHECK_PERMISSION_PRESENCE:
+        if not permissions.is_perm_presence_known(perm):
+            # the catalogue will be loaded from database
+            await run_sync(permissions.check_perm_presence, perm)
+    if registry.requires_sync(perm):
+        # deferred registrations are run or supported permissions of
+        # handlers are loaded from database
+        handlers = await run_sync(registry.get_handlers_for_perm, perm)
+    else:
+        handlers = registry.get_handlers_for_perm(perm)
+    for handler in handlers:
+        if await handler.ahas_perm(user_obj, perm, obj=obj):
+            return True
+    return False
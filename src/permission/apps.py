@@ -1,4 +1,9 @@
+import logging
 from django.apps import AppConfig
+from django.db import DatabaseError
+
+
+logger = logging.getLogger(__name__)
 
 
 class PermissionConfig(AppConfig):
@@ -7,6 +12,24 @@ class PermissionConfig(AppConfig):
 
     def ready(self):
         from permission.conf import settings
+        from permission.signals import connect_receivers
+        connect_receivers()
         if settings.PERMISSION_AUTODISCOVER_ENABLE:
             from permission.utils.autodiscover import autodiscover
             autodiscover()
+        # handlers of the lazy autodiscover are compiled when they are
+        # registered on the first permission check
+        if (settings.PERMISSION_COMPILE_LOGICS and
+                not settings.PERMISSION_AUTODISCOVER_LAZY):
+            from permission.utils.handlers import registry
+            for handler in registry.get_handlers():
+                if hasattr(handler, 'compile'):
+                    handler.compile()
+        if settings.PERMISSION_WARM_HANDLERS:
+            from permission.utils.handlers import registry
+            try:
+                registry.warm()
+            except DatabaseError:
+                # e.g. tables are not migrated yet
+                logger.warning('Permission handlers were not warmed',
+                               exc_info=True)
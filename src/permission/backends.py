@@ -2,9 +2,16 @@
 """
 Logical permission backends module
 """
+import timeit
 from permission.conf import settings
 from permission.utils.handlers import registry
-from permission.utils.permissions import perm_to_permission
+from permission.utils.permissions import check_perm_presence
+from permission.utils.cache import get_request_cache
+from permission.utils.cache import get_decision_key
+from permission.utils.versions import VersionedCache
+from permission.compat import has_native_coroutines
+from permission.instrumentation import get_current_trace
+from permission.metrics import get_metrics
 
 
 __all__    = ('PermissionBackend',)
@@ -34,6 +41,9 @@ class PermissionBackend(object):
         ``PERMISSION_CHECK_PERMISSION_PRESENCE`` is ``True`` in ``settings``
         module.
 
+        Decisions are cached in the request cache while
+        :class:`permission.middleware.PermissionCacheMiddleware` is active.
+
         Parameters
         ----------
         user_obj : django user model instance
@@ -56,27 +66,108 @@ class PermissionBackend(object):
             ``PERMISSION_CHECK_PERMISSION_PRESENCE`` is ``True`` in ``settings``
             module.
         """
+        trace = get_current_trace()
+        metrics = get_metrics()
+        if trace is None and metrics is None:
+            return self._has_perm(user_obj, perm, obj)
+        check = None
+        if trace is not None:
+            check = trace.start_check('has_perm', perm, user_obj, obj)
+        start = timeit.default_timer()
+        decision = None
+        try:
+            decision = self._has_perm(user_obj, perm, obj, trace, metrics)
+        finally:
+            if check is not None:
+                trace.finish_check(check, decision)
+        if metrics is not None:
+            metrics.record_check(perm, decision,
+                                 timeit.default_timer() - start)
+        return decision
+
+    def _has_perm(self, user_obj, perm, obj=None, trace=None, metrics=None):
+        cache = get_request_cache()
+        cachekey = get_decision_key(perm, obj) if cache is not None else None
+        if cachekey is not None:
+            cache = VersionedCache(cache.get_namespace(user_obj, 'backend'),
+                                   user_obj)
+            decision = cache.get(cachekey)
+            if trace is not None:
+                trace.record_cache('request', decision is not None)
+            if metrics is not None:
+                metrics.record_cache('request', decision is not None)
+            if decision is not None:
+                return decision
+
         if settings.PERMISSION_CHECK_PERMISSION_PRESENCE:
-            # get permission instance from string permission (perm)
             # it raise ObjectDoesNotExists when the permission is not exists
-            try:
-                perm_to_permission(perm)
-            except AttributeError:
-                # Django 1.2 internally use wrong permission string thus ignore
-                pass
+            check_perm_presence(perm)
 
         # get permission handlers fot this perm
-        cache_name = '_%s_cache' % perm
-        if hasattr(self, cache_name):
-            handlers = getattr(self, cache_name)
-        else:
-            handlers = [h for h in registry.get_handlers()
-                        if perm in h.get_supported_permissions()]
-            setattr(self, cache_name, handlers)
+        decision = False
+        handlers = registry.get_handlers_for_perm(perm)
         for handler in handlers:
+            if trace is not None:
+                trace.record_handler(handler)
+            if metrics is not None:
+                metrics.record_handler(handler)
             if handler.has_perm(user_obj, perm, obj=obj):
-                return True
-        return False
+                decision = True
+                break
+        if cachekey is not None:
+            cache[cachekey] = decision
+        return decision
+
+    if has_native_coroutines:
+        from permission.aio import backend_ahas_perm as ahas_perm
+
+    def has_perm_many(self, user_obj, perm, objs):
+        """
+        Check if user have permission of each object based on registered
+        handlers.
+
+        Handlers determine the permissions of the objects at once thus the
+        number of queries does not depend on the number of objects for
+        built-in permission logics.
+
+        Parameters
+        ----------
+        user_obj : django user model instance
+            A django user model instance which be checked
+        perm : string
+            `app_label.codename` formatted permission string
+        objs : iterable
+            Saved django model instances
+
+        Returns
+        -------
+        dict
+            A dictionary which map pk of each object to whether the specified
+            user have specified permission of the object.
+
+        Raises
+        ------
+        django.core.exceptions.ObjectDoesNotExist
+            If the specified string permission does not exist and
+            ``PERMISSION_CHECK_PERMISSION_PRESENCE`` is ``True`` in ``settings``
+            module.
+        """
+        if settings.PERMISSION_CHECK_PERMISSION_PRESENCE:
+            # it raise ObjectDoesNotExists when the permission is not exists
+            check_perm_presence(perm)
+
+        objs = list(objs)
+        result = dict((obj.pk, False) for obj in objs)
+        undecided = objs
+        for handler in registry.get_handlers_for_perm(perm):
+            if not undecided:
+                break
+            decisions = handler.has_perm_many(user_obj, perm, undecided)
+            for obj in undecided:
+                if decisions.get(obj.pk):
+                    result[obj.pk] = True
+            undecided = [obj for obj in undecided if not result[obj.pk]]
+        return result
 
     def has_module_perms(self, user_obj, app_label):
         """
@@ -107,15 +198,33 @@ class PermissionBackend(object):
             ``PERMISSION_CHECK_PERMISSION_PRESENCE`` is ``True`` in ``settings``
             module.
         """
-        # get permission handlers fot this perm
-        cache_name = '_%s_cache' % app_label
-        if hasattr(self, cache_name):
-            handlers = getattr(self, cache_name)
-        else:
-            handlers = [h for h in registry.get_handlers()
-                        if app_label in h.get_supported_app_labels()]
-            setattr(self, cache_name, handlers)
+        trace = get_current_trace()
+        metrics = get_metrics()
+        if trace is None and metrics is None:
+            return self._has_module_perms(user_obj, app_label)
+        check = None
+        if trace is not None:
+            check = trace.start_check('has_module_perms', app_label, user_obj)
+        result = None
+        try:
+            result = self._has_module_perms(user_obj, app_label, trace,
+                                            metrics)
+        finally:
+            if check is not None:
+                trace.finish_check(check, result)
+        if metrics is not None:
+            metrics.record_module_check(app_label, result)
+        return result
+
+    def _has_module_perms(self, user_obj, app_label, trace=None,
+                          metrics=None):
+        # get permission handlers fot this app_label
+        handlers = registry.get_handlers_for_app_label(app_label)
         for handler in handlers:
+            if trace is not None:
+                trace.record_handler(handler)
+            if metrics is not None:
+                metrics.record_handler(handler)
             if handler.has_module_perms(user_obj, app_label):
                 return True
         return False
@@ -76,3 +76,6 @@ try:
 except ImportError:
     # Django 1.2/1.3 does not have six
     import six
+
+# native coroutines (``async def``) are available from Python 3.5
+has_native_coroutines = sys.version_info >= (3, 5)
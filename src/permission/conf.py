@@ -48,6 +48,49 @@ class PermissionConf(AppConf):
     AUTODISCOVER_MODULE_NAME = 'perms'
     AUTODISCOVER_VARIABLE_NAME = 'PERMISSION_LOGICS'
     AUTODISCOVER_ENABLE = True
+    AUTODISCOVER_LAZY = False
+    """Apply autodiscovered permission logics on the first permission check"""
+
+    PERMS_FROM_META = False
+    """Derive perms of models from ``_meta`` instead of querying database"""
+    PERMS_FROM_META_MERGE_DATABASE = False
+    """Add perms found only in database to the perms derived from ``_meta``"""
+
+    WARM_HANDLERS = False
+    """Load supported permissions of all handlers in ``AppConfig.ready()``"""
+
+    MODULE_PERMS_CACHE_SIZE = 1024
+    """Maximum number of cached ``has_module_perms`` results"""
+
+    MODULE_PERMS_CACHE_TIMEOUT = None
+    """Seconds until a cached ``has_module_perms`` result expires"""
+
+    SHARED_CACHE = None
+    """Cache alias to share permission decisions among requests and workers"""
+
+    SHARED_CACHE_TIMEOUT = 300
+    """Seconds until a shared permission decision expires"""
+
+    SHARED_CACHE_KEY_PREFIX = 'permission'
+    """Prefix of cache keys of shared permission decisions"""
+
+    REQUEST_CACHE_SIZE = 4096
+    """Maximum number of entries of the cache of PermissionCacheMiddleware"""
+
+    TRACE_THRESHOLD = 0.05
+    """Seconds of a traced permission check to log it as a slow check"""
+
+    METRICS_ENABLE = False
+    """Collect metrics of permission checks (see permission.metrics)"""
+
+    COMPILE_LOGICS = True
+    """Compile built-in permission logics into decision functions"""
+
+    ADAPTIVE_LOGIC_ORDERING = False
+    """Reorder permission logics by measured latency and grant rate"""
+
+    ADAPTIVE_LOGIC_ORDERING_INTERVAL = 1000
+    """Number of permission checks between reorderings of permission logics"""
 
     CHECK_AUTHENTICATION_BACKENDS = True
     """Check if AUTHENTICATION_BACKENDS is correctly configured"""
@@ -76,8 +76,17 @@ def get_object_from_classbased_instance(
     -------
     instance
         An instance of model object or None
+
+    .. note::
+        When the object is found with ``get_object`` of the view and no
+        ``queryset`` is specified, the object is stored in the instance thus
+        following ``get_object()`` calls in the view (e.g. in ``DetailView``
+        or ``UpdateView``) return it without query as long as ``args`` and
+        ``kwargs`` of the view are not changed.
     """
     from django.views.generic.edit import BaseCreateView
+    # the object is reusable only when the view default queryset is used
+    reusable = not queryset
     # initialize request, args, kwargs of classbased_instance
     # most of methods of classbased view assumed these attributes
     # but these attributes is initialized in ``dispatch`` method.
@@ -103,11 +112,30 @@ def get_object_from_classbased_instance(
             # None
             if isinstance(instance, BaseCreateView):
                 obj = None
+                reusable = False
             else:
                 raise e
+        if reusable:
+            _store_object(instance, obj)
     elif hasattr(instance, 'object'):
         obj = instance.object
     else:
         obj = None
     return obj
 
+
+def _store_object(instance, obj):
+    """
+    Make ``get_object`` of the instance return the object while ``args`` and
+    ``kwargs`` of the instance are same
+    """
+    get_object = instance.get_object
+    args = tuple(instance.args)
+    kwargs = dict(instance.kwargs)
+
+    def get_stored_object(queryset=None):
+        if (queryset is None and tuple(instance.args) == args and
+                instance.kwargs == kwargs):
+            return obj
+        return get_object(queryset)
+    instance.get_object = get_stored_object
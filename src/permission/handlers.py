@@ -1,7 +1,42 @@
 # coding=utf-8
 import collections
+import timeit
+from django.db.models import Q
 from permission.utils.permissions import get_app_perms
 from permission.utils.permissions import get_model_perms
+from permission.utils.cache import get_module_perms_cache
+from permission.utils.cache import get_decision_key
+from permission.utils.cache import get_shared_decision_cache
+from permission.utils.cache import get_request_cache
+from permission.utils.versions import USER
+from permission.utils.versions import VersionedCache
+from permission.utils.versions import get_version_counters
+from permission.compat import has_native_coroutines
+from permission.instrumentation import get_current_trace
+from permission.metrics import get_metrics
+
+
+def _unslice_queryset(queryset):
+    """
+    Return a queryset of the objects of the queryset which can be filtered
+
+    Sliced querysets cannot be filtered thus the primary keys of the slice
+    are evaluated and the limits are replaced by them.
+    """
+    if queryset.query.can_filter():
+        return queryset
+    pks = list(queryset.values_list('pk', flat=True))
+    queryset = queryset.all()
+    queryset.query.clear_limits()
+    return queryset.filter(pk__in=pks)
+
+
+def _get_candidates(queryset):
+    """
+    Return a queryset of the base manager restricted to the objects of the
+    queryset to evaluate ``has_perm_many`` against
+    """
+    return queryset.model._base_manager.filter(pk__in=queryset.values('pk'))
 
 
 class PermissionHandler(object):
@@ -10,6 +45,7 @@ class PermissionHandler(object):
     """
     _includes = None
     _excludes = None
+    _registry = None
 
     @property
     def includes(self):
@@ -17,10 +53,8 @@ class PermissionHandler(object):
 
     @includes.setter
     def includes(self, value):
-        # clear cache
-        if hasattr(self, '_perms_cache'):
-            del self._perms_cache
         self._includes = value
+        self._clear_perms_cache()
 
     @property
     def excludes(self):
@@ -28,10 +62,18 @@ class PermissionHandler(object):
 
     @excludes.setter
     def excludes(self, value):
+        self._excludes = value
+        self._clear_perms_cache()
+
+    def _clear_perms_cache(self):
         # clear cache
         if hasattr(self, '_perms_cache'):
             del self._perms_cache
-        self._excludes = value
+        if hasattr(self, '_app_labels_cache'):
+            del self._app_labels_cache
+        # the registry indexes handlers by supported permissions
+        if self._registry is not None:
+            self._registry.clear_index()
 
     def __init__(self, model_or_app_label):
         """
@@ -85,6 +127,28 @@ class PermissionHandler(object):
                 self._model_perms_cache = get_model_perms(self.model)
         return self._model_perms_cache
 
+    def warm(self, app_perms, model_perms=()):
+        """
+        Seed caches of permissions of the application and the model instead
+        of querying them on the first check.
+
+        It is called by
+        :meth:`permission.utils.handlers.PermissionHandlerRegistry.warm`.
+
+        Parameters
+        ----------
+        app_perms : iterable
+            `app_label.codename` formatted permission strings of the
+            application
+        model_perms : iterable
+            `app_label.codename` formatted permission strings of the model
+        """
+        self._app_perms_cache = set(app_perms)
+        if self.model is not None:
+            self._model_perms_cache = set(model_perms)
+        self._clear_perms_cache()
+        self.get_supported_permissions()
+
     def get_supported_permissions(self):
         """
         Get permissions which this handler can treat.
@@ -155,6 +219,62 @@ class PermissionHandler(object):
             "method. Sub class must override this method."
         ) % self.__class__)
 
+    if has_native_coroutines:
+        from permission.aio import handler_ahas_perm as ahas_perm
+
+    def has_perm_many(self, user_obj, perm, objs):
+        """
+        Check if user have permission of each object
+
+        Sub class may override this method to determine the permissions with
+        less queries. The default implementation calls :meth:`has_perm` for
+        each object.
+
+        Parameters
+        ----------
+        user_obj : django user model instance
+            A django user model instance which be checked
+        perm : string
+            `app_label.codename` formatted permission string
+        objs : iterable
+            Saved django model instances
+
+        Returns
+        -------
+        dict
+            A dictionary which map pk of each object to whether the specified
+            user have specified permission of the object.
+        """
+        return dict((obj.pk, bool(self.has_perm(user_obj, perm, obj)))
+                    for obj in objs)
+
+    def filter_queryset(self, user_obj, perm, queryset):
+        """
+        Filter the queryset to the objects which the user have permission
+
+        Sub class should override this method to filter the queryset in
+        database. The default implementation evaluates :meth:`has_perm_many`
+        for all objects in the queryset. Sliced querysets are accepted.
+
+        Parameters
+        ----------
+        user_obj : django user model instance
+            A django user model instance which be checked
+        perm : string
+            `app_label.codename` formatted permission string
+        queryset : django queryset
+            A queryset of the model of this handler
+
+        Returns
+        -------
+        django queryset
+            A filtered queryset
+        """
+        queryset = _unslice_queryset(queryset)
+        result = self.has_perm_many(user_obj, perm, _get_candidates(queryset))
+        pks = [pk for pk, granted in result.items() if granted]
+        return queryset.filter(pk__in=pks)
+
     def has_module_perms(self, user_obj, app_label):
         """
         Check if user have permission of specified app
@@ -171,19 +291,33 @@ class PermissionHandler(object):
         boolean
             Whether the specified user have any permissions of specified app
 
+        .. note::
+            The result is stored in a process-wide LRU cache which is cleared
+            when django's ``Group`` or ``Permission`` is modified. Entries of
+            a user are stale after the user is saved or deleted.
         """
-        cache_name = "_has_module_perms_%s_%s_cache" % (app_label, user_obj.pk)
-        if hasattr(self, cache_name):
-            return getattr(self, cache_name)
         if self.app_label != app_label:
-            setattr(self, cache_name, False)
-        else:
+            return False
+        cache = get_module_perms_cache()
+        # the version of the user is bumped when the user is saved thus
+        # changes of e.g. is_superuser or is_active are reflected
+        version = get_version_counters().get((USER, user_obj.pk))
+        cachekey = (self, app_label, user_obj.pk, version)
+        result = cache.get(cachekey)
+        trace = get_current_trace()
+        if trace is not None:
+            trace.record_cache('module', result is not None)
+        metrics = get_metrics()
+        if metrics is not None:
+            metrics.record_cache('module', result is not None)
+        if result is None:
+            result = False
             for permission in self.get_supported_permissions():
                 if user_obj.has_perm(permission):
-                    setattr(self, cache_name, True)
-                    return True
-        setattr(self, cache_name, False)
-        return False
+                    result = True
+                    break
+            cache.set(cachekey, result)
+        return result
 
 
 class LogicalPermissionHandler(PermissionHandler):
@@ -210,6 +344,52 @@ class LogicalPermissionHandler(PermissionHandler):
                 "'%s' cannot treat application level permission."
             ) % self.__class__)
         super(LogicalPermissionHandler, self).__init__(model)
+        self._logics_index = None
+        self._logic_stats = {}
+        self._logic_scores = None
+        self._checks_since_reorder = 0
+
+    def get_permission_logics(self, perm):
+        """
+        Get permission logics of the model which can grant the permission
+
+        Permission logics which can never grant the permission (see
+        ``PermissionLogic.get_grantable_permissions``) are excluded. The
+        logics are indexed per permission and the index is rebuilt when
+        ``_permission_logics`` of the model is modified or grantable
+        permissions of a permission logic are changed.
+
+        The logics are ordered by their cost class (``PermissionLogic.cost``)
+        and then by the registration order thus the order is same in every
+        process. When ``PERMISSION_ADAPTIVE_LOGIC_ORDERING`` is ``True``, the
+        logics are periodically reordered by measured latency and grant rate
+        instead (see :meth:`reorder_logics`).
+
+        Parameters
+        ----------
+        perm : string
+            `app_label.codename` formatted permission string
+
+        Returns
+        -------
+        tuple
+            A tuple of permission logics
+        """
+        from permission.logics import PermissionLogic
+        logics = getattr(self.model, '_permission_logics', None) or ()
+        index = self._logics_index
+        if (index is None or index[0] is not logics or
+                index[1] != len(logics) or
+                index[2] != PermissionLogic.generation):
+            index = (logics, len(logics), PermissionLogic.generation, {}, {})
+            self._logics_index = index
+        perm_logics = index[3].get(perm)
+        if perm_logics is None:
+            perm_logics = tuple(sorted(
+                (x for x in logics if _can_grant(x, perm)),
+                key=self._get_logic_sort_key))
+            index[3][perm] = perm_logics
+        return perm_logics
 
     def has_perm(self, user_obj, perm, obj=None):
         """
@@ -217,6 +397,8 @@ class LogicalPermissionHandler(PermissionHandler):
         specified models's ``_permission_logics`` attribute.
 
         The result will be stored in user_obj as a cache to reduce method call.
+        When ``PERMISSION_SHARED_CACHE`` is specified in settings, the result
+        is also stored in the cache to share it among requests and workers.
 
         Parameters
         ----------
@@ -235,21 +417,342 @@ class LogicalPermissionHandler(PermissionHandler):
         """
         if perm not in self.get_supported_permissions():
             return False
+        cachekey = get_decision_key(perm, obj)
+        if cachekey is None:
+            return self._has_perm(user_obj, perm, obj)
         # use cache to reduce method call
-        CACHE_NAME = '_logical_perms_cache'
-        if not hasattr(user_obj, CACHE_NAME):
-            setattr(user_obj, CACHE_NAME, {})
-        cache = getattr(user_obj, CACHE_NAME)
-        cachekey = "%s %s" % (perm, hash(obj))
-        if cachekey not in cache:
-            cache[cachekey] = self._has_perm(user_obj, perm, obj)
-        return cache[cachekey]
+        cache = get_logical_perms_cache(user_obj, self.model)
+        trace = get_current_trace()
+        metrics = get_metrics()
+        try:
+            result = cache[cachekey]
+        except KeyError:
+            if trace is not None:
+                trace.record_cache('user', False)
+            if metrics is not None:
+                metrics.record_cache('user', False)
+        else:
+            if trace is not None:
+                trace.record_cache('user', True)
+            if metrics is not None:
+                metrics.record_cache('user', True)
+            return result
+        shared = get_shared_decision_cache()
+        if shared is not None and shared.is_cacheable(user_obj, cachekey):
+            result = shared.get(user_obj, self.model, cachekey)
+            if trace is not None:
+                trace.record_cache('shared', result is not None)
+            if metrics is not None:
+                metrics.record_cache('shared', result is not None)
+            if result is None:
+                result = self._has_perm(user_obj, perm, obj)
+                shared.set(user_obj, self.model, cachekey, result)
+        else:
+            result = self._has_perm(user_obj, perm, obj)
+        cache[cachekey] = result
+        return result
+
+    if has_native_coroutines:
+        from permission.aio import logical_handler_ahas_perm as ahas_perm
+
+    def has_perm_many(self, user_obj, perm, objs):
+        """
+        Check if user have permission of each object based on specified
+        models's ``_permission_logics`` attribute.
+
+        Each permission logic determines the permissions of the objects which
+        have not been granted by the preceding logics at once via
+        ``PermissionLogic.has_perm_many``. The results will be stored in
+        user_obj as a cache like :meth:`has_perm`.
+
+        Parameters
+        ----------
+        user_obj : django user model instance
+            A django user model instance which be checked
+        perm : string
+            `app_label.codename` formatted permission string
+        objs : iterable
+            Saved django model instances of the model
+
+        Returns
+        -------
+        dict
+            A dictionary which map pk of each object to whether the specified
+            user have specified permission of the object.
+        """
+        objs = list(objs)
+        result = dict((obj.pk, False) for obj in objs)
+        if perm not in self.get_supported_permissions():
+            return result
+        cache = get_logical_perms_cache(user_obj, self.model)
+        pending = []
+        for obj in objs:
+            cachekey = get_decision_key(perm, obj)
+            if cachekey in cache:
+                result[obj.pk] = cache[cachekey]
+            else:
+                pending.append(obj)
+        undecided = pending
+        for permission_logic in self.get_permission_logics(perm):
+            if not undecided:
+                break
+            decisions = permission_logic.has_perm_many(user_obj, perm,
+                                                       undecided)
+            for obj in undecided:
+                if decisions.get(obj.pk):
+                    result[obj.pk] = True
+            undecided = [obj for obj in undecided if not result[obj.pk]]
+        for obj in pending:
+            cachekey = get_decision_key(perm, obj)
+            if cachekey is not None:
+                cache[cachekey] = result[obj.pk]
+        return result
+
+    def filter_queryset(self, user_obj, perm, queryset):
+        """
+        Filter the queryset to the objects which the user have permission
+        based on specified models's ``_permission_logics`` attribute.
+
+        Filters of permission logics (``PermissionLogic.get_queryset_filter``)
+        are combined with OR into a single query. Permission logics which
+        cannot write their rule as a query are evaluated with
+        ``PermissionLogic.has_perm_many`` for the objects in the queryset.
+        Sliced querysets are accepted.
+
+        Parameters
+        ----------
+        user_obj : django user model instance
+            A django user model instance which be checked
+        perm : string
+            `app_label.codename` formatted permission string
+        queryset : django queryset
+            A queryset of the model of this handler
+
+        Returns
+        -------
+        django queryset
+            A filtered queryset
+        """
+        if perm not in self.get_supported_permissions():
+            return queryset.none()
+        queryset = _unslice_queryset(queryset)
+        query = None
+        distinct = False
+        candidates = None
+        for permission_logic in self.get_permission_logics(perm):
+            q = permission_logic.get_queryset_filter(user_obj, perm)
+            if q is True:
+                return queryset
+            elif q is False:
+                continue
+            elif q is None:
+                # the rule cannot be written as a query
+                if candidates is None:
+                    candidates = _get_candidates(queryset)
+                result = permission_logic.has_perm_many(user_obj, perm,
+                                                        candidates)
+                q = Q(pk__in=[pk for pk, granted in result.items()
+                              if granted])
+            elif permission_logic.queryset_filter_requires_distinct:
+                distinct = True
+            query = q if query is None else query | q
+        if query is None:
+            return queryset.none()
+        queryset = queryset.filter(query)
+        if distinct:
+            queryset = queryset.distinct()
+        return queryset
+
+    def get_decision_function(self, perm):
+        """
+        Get a decision function compiled from permission logics of the
+        permission
+
+        See :mod:`permission.utils.compiler` for the detail. The function is
+        compiled once per permission and compiled again when the logics are
+        modified (see :meth:`get_permission_logics`).
+
+        Parameters
+        ----------
+        perm : string
+            `app_label.codename` formatted permission string
+
+        Returns
+        -------
+        function
+            A function which takes ``user_obj`` and ``obj`` (optional)
+        """
+        from permission.utils.compiler import compile_decision_function
+        permission_logics = self.get_permission_logics(perm)
+        # the index is (re)built in get_permission_logics
+        functions = self._logics_index[4]
+        function = functions.get(perm)
+        if function is None:
+            function = compile_decision_function(permission_logics, perm)
+            functions[perm] = function
+        return function
+
+    def compile(self):
+        """
+        Compile decision functions of the permissions which the permission
+        logics of the model can grant
+
+        It is called for each handler in ``AppConfig.ready()`` when
+        ``PERMISSION_COMPILE_LOGICS`` is ``True``. It does not access
+        database; permissions which no permission logic declare are compiled
+        on the first check.
+        """
+        perms = set()
+        for permission_logic in getattr(self.model, '_permission_logics',
+                                        None) or ():
+            perms.update(permission_logic.get_grantable_permissions() or ())
+        for perm in perms:
+            self.get_decision_function(perm)
+
+    def reorder_logics(self):
+        """
+        Reorder permission logics by statistics measured in :meth:`has_perm`
+
+        Permission logics are sorted by the expected time to find a grant
+        (average latency divided by grant rate) thus cheap, frequently
+        granting logics are evaluated first. Permission logics which have not
+        been measured yet are evaluated first to measure them.
+        It is called automatically every
+        ``PERMISSION_ADAPTIVE_LOGIC_ORDERING_INTERVAL`` checks in adaptive
+        mode.
+        """
+        self._checks_since_reorder = 0
+        scores = {}
+        for permission_logic, stats in list(self._logic_stats.items()):
+            calls, grants, seconds = stats
+            if calls:
+                # laplace smoothing to avoid zero division
+                grant_rate = (grants + 1.0) / (calls + 2.0)
+                scores[permission_logic] = seconds / calls / grant_rate
+        self._logic_scores = scores
+        # rebuild the index with the new order
+        self._logics_index = None
+
+    def _get_logic_sort_key(self, permission_logic):
+        from permission.logics.base import COST_ORDER
+        from permission.utils.logics import get_registration_sequence
+        key = (COST_ORDER.get(permission_logic.cost, len(COST_ORDER)),
+               get_registration_sequence(permission_logic))
+        if self._logic_scores is not None:
+            return (self._logic_scores.get(permission_logic, 0.0),) + key
+        return key
 
     def _has_perm(self, user_obj, perm, obj=None):
         if perm not in self.get_supported_permissions():
             return False
-        for permission_logic in getattr(self.model,
-                                        '_permission_logics', set()):
+        trace = get_current_trace()
+        metrics = get_metrics()
+        if trace is not None:
+            return self._has_perm_instrumented(trace, metrics, user_obj,
+                                               perm, obj)
+        if metrics is None:
+            return self._evaluate(user_obj, perm, obj)
+        # the evaluation is measured as a whole thus metrics do not change
+        # the way of the evaluation
+        start = timeit.default_timer()
+        granted = self._evaluate(user_obj, perm, obj, metrics)
+        metrics.record_evaluation(self, granted,
+                                  timeit.default_timer() - start)
+        return granted
+
+    def _evaluate(self, user_obj, perm, obj=None, metrics=None):
+        from permission.conf import settings
+        if settings.PERMISSION_ADAPTIVE_LOGIC_ORDERING:
+            return self._has_perm_adaptive(user_obj, perm, obj,
+                                           self.get_permission_logics(perm),
+                                           metrics)
+        if settings.PERMISSION_COMPILE_LOGICS:
+            return self.get_decision_function(perm)(user_obj, obj)
+        permission_logics = self.get_permission_logics(perm)
+        for permission_logic in permission_logics:
             if permission_logic.has_perm(user_obj, perm, obj):
                 return True
         return False
+
+    def _has_perm_instrumented(self, trace, metrics, user_obj, perm, obj):
+        # evaluate permission logics one by one (instead of the decision
+        # function) to record each of them in the trace
+        handler_start = timeit.default_timer()
+        result = False
+        for permission_logic in self.get_permission_logics(perm):
+            record = trace.start_logic(permission_logic)
+            start = timeit.default_timer()
+            granted = None
+            try:
+                granted = bool(permission_logic.has_perm(user_obj, perm, obj))
+            finally:
+                trace.finish_logic(record, granted)
+            if metrics is not None:
+                metrics.record_logic(permission_logic, granted,
+                                     timeit.default_timer() - start)
+            if granted:
+                result = True
+                break
+        if metrics is not None:
+            metrics.record_evaluation(self, result,
+                                      timeit.default_timer() - handler_start)
+        return result
+
+    def _has_perm_adaptive(self, user_obj, perm, obj, permission_logics,
+                           metrics=None):
+        from permission.conf import settings
+        # statistics are approximate; races among threads are acceptable
+        granted = False
+        for permission_logic in permission_logics:
+            start = timeit.default_timer()
+            granted = bool(permission_logic.has_perm(user_obj, perm, obj))
+            elapsed = timeit.default_timer() - start
+            stats = self._logic_stats.get(permission_logic)
+            if stats is None:
+                stats = self._logic_stats[permission_logic] = [0, 0, 0.0]
+            stats[0] += 1
+            stats[1] += granted
+            stats[2] += elapsed
+            if metrics is not None:
+                metrics.record_logic(permission_logic, granted, elapsed)
+            if granted:
+                break
+        self._checks_since_reorder += 1
+        interval = settings.PERMISSION_ADAPTIVE_LOGIC_ORDERING_INTERVAL
+        if self._checks_since_reorder >= interval:
+            self.reorder_logics()
+        return granted
+
+
+def get_logical_perms_cache(user_obj, model=None):
+    """
+    Get a dictionary-like object which cache decisions of
+    LogicalPermissionHandler in the request cache (when
+    :class:`permission.middleware.PermissionCacheMiddleware` is active) or in
+    the user instance
+
+    Stale decisions (e.g. decisions of saved objects) are discarded with
+    version counters (see :mod:`permission.utils.versions`).
+
+    Parameters
+    ----------
+    user_obj : django user model instance
+        A django user model instance
+    model : django model class or None
+        A model of the handler which is used for decisions without object
+    """
+    request_cache = get_request_cache()
+    if request_cache is not None:
+        store = request_cache.get_namespace(user_obj, 'logical_perms')
+    else:
+        CACHE_NAME = '_logical_perms_cache'
+        store = getattr(user_obj, CACHE_NAME, None)
+        if store is None:
+            store = {}
+            setattr(user_obj, CACHE_NAME, store)
+    return VersionedCache(store, user_obj, model)
+
+
+def _can_grant(permission_logic, perm):
+    perms = permission_logic.get_grantable_permissions()
+    return perms is None or perm in perms
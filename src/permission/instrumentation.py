@@ -0,0 +1,363 @@
+# coding=utf-8
+"""
+Tracing of permission checks
+
+Use :func:`trace` (or :class:`permission.middleware.PermissionTraceMiddleware`)
+to record each ``has_perm`` and ``has_module_perms`` call: the handlers, the
+permission logics evaluated in order with their wall time and SQL queries,
+cache hits and misses, and the result.
+
+Examples
+--------
+>>> from permission.instrumentation import trace
+>>> with trace() as t:
+...     user.has_perm('blog.change_article', article)
+>>> t.summary()['logics']
+{'AuthorPermissionLogic': {'calls': 1, 'grants': 1, ...}}
+
+Hooks only check a module global when no trace is active thus the overhead of
+permission checks is negligible while tracing is off.
+"""
+from __future__ import unicode_literals
+import logging
+import threading
+import timeit
+from contextlib import contextmanager
+try:
+    from contextvars import ContextVar
+except ImportError:
+    # Python 3.6 or earlier
+    ContextVar = None
+
+
+__all__ = ('Trace', 'trace', 'get_current_trace')
+
+
+logger = logging.getLogger(__name__)
+
+_timer = timeit.default_timer
+
+# a number of active traces in all threads; hooks return immediately when it
+# is zero
+_active = 0
+_active_lock = threading.Lock()
+
+if ContextVar is not None:
+    _current_trace = ContextVar('permission_trace', default=None)
+
+    def _get_trace():
+        return _current_trace.get()
+
+    def _set_trace(value):
+        return _current_trace.set(value)
+
+    def _reset_trace(token):
+        _current_trace.reset(token)
+else:
+    _local = threading.local()
+
+    def _get_trace():
+        return getattr(_local, 'trace', None)
+
+    def _set_trace(value):
+        token = _get_trace()
+        _local.trace = value
+        return token
+
+    def _reset_trace(token):
+        _local.trace = token
+
+
+def get_current_trace():
+    """
+    Get the active trace of the current context or ``None``
+    """
+    if not _active:
+        return None
+    return _get_trace()
+
+
+class CheckRecord(object):
+    """
+    A record of a ``has_perm`` or ``has_module_perms`` call
+
+    Attributes
+    ----------
+    kind : string
+        ``'has_perm'`` or ``'has_module_perms'``
+    target : string
+        A permission or an application label
+    user : object
+        A pk of the user
+    obj : string or None
+        A representation of the object
+    depth : integer
+        A number of enclosing checks (e.g. ``has_module_perms`` calls
+        ``has_perm``)
+    handlers : list
+        Names of handlers which were asked
+    logics : list
+        :class:`LogicRecord` of permission logics in evaluation order
+    cache : list
+        (tier, hit) tuples of cache lookups
+    queries : list
+        SQL queries issued in the check
+    result : boolean or None
+        The result
+    seconds : float
+        Wall time of the check
+    """
+    def __init__(self, kind, target, user_obj, obj, depth):
+        self.kind = kind
+        self.target = target
+        self.user = getattr(user_obj, 'pk', None)
+        self.obj = None if obj is None else '%s:%s' % (
+            obj.__class__.__name__, getattr(obj, 'pk', id(obj)))
+        self.depth = depth
+        self.handlers = []
+        self.logics = []
+        self.cache = []
+        self.queries = []
+        self.result = None
+        self.seconds = 0.0
+        self._start = None
+        self._marks = None
+
+    def as_dict(self):
+        """Get a JSON serializable representation of this record"""
+        return {
+            'kind': self.kind,
+            'target': self.target,
+            'user': self.user,
+            'obj': self.obj,
+            'depth': self.depth,
+            'handlers': list(self.handlers),
+            'logics': [x.as_dict() for x in self.logics],
+            'cache': [{'tier': t, 'hit': h} for t, h in self.cache],
+            'queries': list(self.queries),
+            'result': self.result,
+            'seconds': self.seconds,
+        }
+
+
+class LogicRecord(object):
+    """
+    A record of an evaluation of a permission logic
+    """
+    def __init__(self, name):
+        self.name = name
+        self.result = None
+        self.seconds = 0.0
+        self.queries = []
+        self._start = None
+        self._marks = None
+
+    def as_dict(self):
+        """Get a JSON serializable representation of this record"""
+        return {
+            'name': self.name,
+            'result': self.result,
+            'seconds': self.seconds,
+            'queries': list(self.queries),
+        }
+
+
+class Trace(object):
+    """
+    Records of permission checks in a context
+
+    Use :func:`trace` instead of instantiating this class directly.
+    """
+    def __init__(self, threshold=None):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        threshold : number or None
+            Checks which take ``threshold`` seconds or longer are logged with
+            ``WARNING`` level. ``None`` to disable logging.
+        """
+        self.threshold = threshold
+        self.checks = []
+        self._stack = []
+        self._token = None
+        self._debug_cursors = None
+
+    @property
+    def active(self):
+        """Whether this trace is activated"""
+        return self._debug_cursors is not None
+
+    def activate(self):
+        """
+        Activate this trace in the current context and log SQL queries of
+        database connections
+        """
+        global _active
+        from django.db import connections
+        self._debug_cursors = []
+        for connection in connections.all():
+            self._debug_cursors.append(
+                (connection, connection.force_debug_cursor))
+            connection.force_debug_cursor = True
+        self._token = _set_trace(self)
+        with _active_lock:
+            _active += 1
+
+    def deactivate(self):
+        """
+        Deactivate this trace
+        """
+        global _active
+        with _active_lock:
+            _active -= 1
+        _reset_trace(self._token)
+        for connection, force_debug_cursor in self._debug_cursors:
+            connection.force_debug_cursor = force_debug_cursor
+        self._token = self._debug_cursors = None
+
+    def start_check(self, kind, target, user_obj, obj=None):
+        """Start a record of a check"""
+        record = CheckRecord(kind, target, user_obj, obj, len(self._stack))
+        self.checks.append(record)
+        self._stack.append(record)
+        record._marks = _get_query_marks()
+        record._start = _timer()
+        return record
+
+    def finish_check(self, record, result):
+        """Finish a record of a check and log it if it is slow"""
+        record.seconds = _timer() - record._start
+        record.queries = _get_queries_since(record._marks)
+        record.result = result
+        record._marks = None
+        self._stack.pop()
+        if self.threshold is not None and record.seconds >= self.threshold:
+            logger.warning(
+                'Slow permission check: %s(%s, user=%s, obj=%s) took %.3f '
+                'seconds with %d queries (handlers: %s, logics: %s)',
+                record.kind, record.target, record.user, record.obj,
+                record.seconds, len(record.queries),
+                ', '.join(record.handlers) or '-',
+                ', '.join('%s %.3fs' % (x.name, x.seconds)
+                          for x in record.logics) or '-',
+            )
+
+    def record_handler(self, handler):
+        """Record a handler asked in the current check"""
+        if self._stack:
+            model = getattr(handler, 'model', None)
+            if model is not None:
+                target = '%s.%s' % (model._meta.app_label,
+                                    model._meta.object_name)
+            else:
+                target = getattr(handler, 'app_label', None)
+            self._stack[-1].handlers.append('%s(%s)' % (
+                handler.__class__.__name__, target))
+
+    def record_cache(self, tier, hit):
+        """Record a cache lookup (e.g. ``'request'``) of the current check"""
+        if self._stack:
+            self._stack[-1].cache.append((tier, bool(hit)))
+
+    def start_logic(self, permission_logic):
+        """Start a record of an evaluation of the permission logic"""
+        record = LogicRecord(permission_logic.__class__.__name__)
+        if self._stack:
+            self._stack[-1].logics.append(record)
+        record._marks = _get_query_marks()
+        record._start = _timer()
+        return record
+
+    def finish_logic(self, record, result):
+        """Finish a record of an evaluation of a permission logic"""
+        record.seconds = _timer() - record._start
+        record.queries = _get_queries_since(record._marks)
+        record.result = result
+        record._marks = None
+
+    def summary(self):
+        """
+        Aggregate the records
+
+        Returns
+        -------
+        dict
+            Numbers of checks, grants and queries, total wall time, cache hits
+            and misses per tier, and statistics per handler and per logic.
+            Nested checks are not counted in the totals.
+        """
+        summary = {
+            'checks': 0,
+            'granted': 0,
+            'seconds': 0.0,
+            'queries': 0,
+            'cache': {},
+            'handlers': {},
+            'logics': {},
+        }
+        for check in self.checks:
+            if check.depth == 0:
+                summary['checks'] += 1
+                summary['granted'] += bool(check.result)
+                summary['seconds'] += check.seconds
+                summary['queries'] += len(check.queries)
+            for tier, hit in check.cache:
+                stats = summary['cache'].setdefault(
+                    tier, {'hits': 0, 'misses': 0})
+                stats['hits' if hit else 'misses'] += 1
+            for name in check.handlers:
+                stats = summary['handlers'].setdefault(
+                    name, {'checks': 0, 'seconds': 0.0})
+                stats['checks'] += 1
+                stats['seconds'] += check.seconds
+            for logic in check.logics:
+                stats = summary['logics'].setdefault(logic.name, {
+                    'calls': 0, 'grants': 0, 'seconds': 0.0, 'queries': 0,
+                })
+                stats['calls'] += 1
+                stats['grants'] += bool(logic.result)
+                stats['seconds'] += logic.seconds
+                stats['queries'] += len(logic.queries)
+        return summary
+
+
+@contextmanager
+def trace(threshold=None):
+    """
+    Trace permission checks in the context
+
+    Parameters
+    ----------
+    threshold : number or None
+        Checks which take ``threshold`` seconds or longer are logged.
+        ``PERMISSION_TRACE_THRESHOLD`` is used if ``None``.
+
+    Yields
+    ------
+    Trace
+    """
+    if threshold is None:
+        from permission.conf import settings
+        threshold = settings.PERMISSION_TRACE_THRESHOLD
+    record = Trace(threshold=threshold)
+    record.activate()
+    try:
+        yield record
+    finally:
+        record.deactivate()
+
+
+def _get_query_marks():
+    from django.db import connections
+    return [(x, len(x.queries_log)) for x in connections.all()]
+
+
+def _get_queries_since(marks):
+    queries = []
+    for connection, mark in marks:
+        log = connection.queries_log
+        if len(log) > mark:
+            queries.extend(x['sql'] for x in list(log)[mark:])
+    return queries
@@ -2,9 +2,12 @@
 """
 Permission logic module for author based permission system
 """
+from django.db.models import Q
 from permission.conf import settings
 from permission.logics.base import PermissionLogic
-from permission.utils.field_lookup import field_lookup
+from permission.logics.base import MEMORY
+from permission.logics.base import DATABASE
+from permission.utils.field_lookup import compile_field_path
 from permission.compat import is_authenticated
 
 
@@ -12,6 +15,8 @@ class AuthorPermissionLogic(PermissionLogic):
     """
     Permission logic class for author based permission system
     """
+    permission_actions = ('change', 'delete')
+
     def __init__(self,
                  field_name=None,
                  any_permission=None,
@@ -67,6 +72,52 @@ class AuthorPermissionLogic(PermissionLogic):
             self.delete_permission = \
                 settings.PERMISSION_DEFAULT_APL_DELETE_PERMISSION
 
+    _field_path = None
+
+    def prepare(self):
+        """
+        Compile ``field_name`` for the model this logic is registered to
+        """
+        super(AuthorPermissionLogic, self).prepare()
+        self._field_path = compile_field_path(self.model, self.field_name)
+        # the foreign key id is compared without query
+        self.cost = MEMORY if self._field_path.attname else DATABASE
+
+    def _get_field_path(self, model):
+        field_path = self._field_path
+        if (field_path is None or field_path.model is not model or
+                field_path.field_path != self.field_name):
+            # not prepared, an object of a different class, or field_name
+            # has been changed after the logic was registered
+            field_path = compile_field_path(model, self.field_name)
+            if model is getattr(self, 'model', None):
+                self._field_path = field_path
+        return field_path
+
+    def _is_related_user(self, user_obj, field_path):
+        # a chain of foreign keys can only refer users of the related model;
+        # proxy and concrete instances are equal as django's Model.__eq__
+        concrete_model = getattr(getattr(user_obj, '_meta', None),
+                                 'concrete_model', None)
+        return (concrete_model is not None and concrete_model is
+                field_path.related_model._meta.concrete_model)
+
+    def _is_author(self, user_obj, obj):
+        field_path = self._get_field_path(obj.__class__)
+        if not field_path.is_foreign_key_chain:
+            # field_name is not a chain of foreign keys thus lookup it
+            author = field_path.lookup(obj)
+            return author == user_obj
+        if not self._is_related_user(user_obj, field_path):
+            return False
+        if field_path.attname:
+            # compare the foreign key id without loading the author
+            return getattr(obj, field_path.attname) == user_obj.pk
+        # resolve the final foreign key id with a single query
+        values = list(obj.__class__._base_manager.filter(
+            pk=obj.pk).values_list(self.field_name, flat=True)[:1])
+        return bool(values) and values[0] == user_obj.pk
+
     def has_perm(self, user_obj, perm, obj=None):
         """
         Check if user have permission (of object)
@@ -80,6 +131,9 @@ class AuthorPermissionLogic(PermissionLogic):
 
         If an object is specified, it will return ``True`` if the user is
         specified in ``field_name`` of the object (e.g. ``obj.author``).
+        The foreign key id (e.g. ``obj.author_id``) is compared with the pk of
+        the user thus the author is not loaded. A chain of foreign keys (e.g.
+        ``project__owner``) is resolved with a single query.
         So once user create an object and the object store who is the author in
         ``field_name`` attribute (default: ``author``), the author can change
         or delete the object (you can change this behavior to set
@@ -103,31 +157,86 @@ class AuthorPermissionLogic(PermissionLogic):
         """
         if not is_authenticated(user_obj):
             return False
-        # construct the permission full name
-        change_permission = self.get_full_permission_string('change')
-        delete_permission = self.get_full_permission_string('delete')
-        # check if the user is authenticated
+        action = self.get_permission_action(perm)
         if obj is None:
             # object permission without obj should return True
             # Ref: https://code.djangoproject.com/wiki/RowLevelPermissions
-            if self.any_permission:
-                return True
-            if self.change_permission and perm == change_permission:
-                return True
-            if self.delete_permission and perm == delete_permission:
-                return True
-            return False
-        elif user_obj.is_active:
-            # get author instance
-            author = field_lookup(obj, self.field_name)
-            if author == user_obj:
-                if self.any_permission:
-                    # have any kind of permissions to the obj
-                    return True
-                if (self.change_permission and
-                        perm == change_permission):
-                    return True
-                if (self.delete_permission and
-                        perm == delete_permission):
-                    return True
+            return action is not None
+        elif user_obj.is_active and action is not None:
+            return self._is_author(user_obj, obj)
         return False
+
+    def has_perm_many(self, user_obj, perm, objs):
+        """
+        Check if user have permission of each object with a single query
+
+        See :meth:`has_perm` for the rule of the permission.
+
+        Parameters
+        ----------
+        user_obj : django user model instance
+            A django user model instance which be checked
+        perm : string
+            `app_label.codename` formatted permission string
+        objs : iterable
+            Saved django model instances of the model which this permission
+            logic is registered to
+
+        Returns
+        -------
+        dict
+            A dictionary which map pk of each object to whether the specified
+            user have specified permission of the object.
+        """
+        objs = list(objs)
+        result = dict((obj.pk, False) for obj in objs)
+        if (not objs or not is_authenticated(user_obj) or
+                not user_obj.is_active):
+            return result
+        if self.get_permission_action(perm) is None:
+            return result
+        field_path = self._get_field_path(self.model)
+        if not field_path.is_foreign_key_chain:
+            # field_name is looked up in the same way as has_perm
+            return super(AuthorPermissionLogic, self).has_perm_many(
+                user_obj, perm, objs)
+        if not self._is_related_user(user_obj, field_path):
+            return result
+        pks = set(self.model._base_manager.filter(**{
+            'pk__in': list(result),
+            self.field_name: user_obj,
+        }).values_list('pk', flat=True))
+        for pk in pks:
+            result[pk] = True
+        return result
+
+    def get_queryset_filter(self, user_obj, perm):
+        """
+        Get a django query filter of objects which the user have permission
+
+        Parameters
+        ----------
+        user_obj : django user model instance
+            A django user model instance which be checked
+        perm : string
+            `app_label.codename` formatted permission string
+
+        Returns
+        -------
+        boolean or django.db.models.Q
+            A ``Q`` object which filter objects whose ``field_name`` is the
+            user, ``False`` if the user cannot have the permission of any
+            object, or ``None`` if ``field_name`` is not a chain of foreign
+            keys.
+        """
+        if not is_authenticated(user_obj) or not user_obj.is_active:
+            return False
+        if self.get_permission_action(perm) is None:
+            return False
+        field_path = self._get_field_path(self.model)
+        if not field_path.is_foreign_key_chain:
+            return None
+        if not self._is_related_user(user_obj, field_path):
+            return False
+        return Q(**{self.field_name: user_obj})
+
@@ -1,10 +1,73 @@
 # coding=utf-8
+from permission.compat import has_native_coroutines
+
+
+MEMORY = 'memory'
+"""A cost class of permission logics which never hit database"""
+
+DATABASE = 'database'
+"""A cost class of permission logics which may hit database"""
+
+COST_ORDER = {MEMORY: 0, DATABASE: 1}
+"""An evaluation order of cost classes"""
+
+
+class PermissionFlag(object):
+    """
+    A boolean flag of permission logic (e.g. ``change_permission``)
+
+    Setting the flag discards the permission table of the permission logic
+    thus the table is rebuilt with the new value on the next check.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return instance.__dict__.get(self.name)
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
+        instance.__dict__.pop('_permission_table', None)
+        # let handlers know that grantable permissions may be changed
+        PermissionLogic.generation += 1
+        model = instance.__dict__.get('model')
+        if model is not None:
+            # cached decisions of the model may be changed
+            from permission.utils.versions import get_version_counters
+            get_version_counters().bump_model(model)
 
 
 class PermissionLogic(object):
     """
     Abstract permission logic class
     """
+    permission_actions = ()
+    """
+    Actions which can be granted by ``<action>_permission`` flags (e.g.
+    ``('change', 'delete')``). ``any_permission`` flag grants all permissions.
+    """
+
+    cost = DATABASE
+    """
+    A cost class of :meth:`has_perm` (:data:`MEMORY` or :data:`DATABASE`).
+    Handlers evaluate cheaper permission logics first.
+    """
+
+    any_permission = PermissionFlag('any_permission')
+    add_permission = PermissionFlag('add_permission')
+    change_permission = PermissionFlag('change_permission')
+    delete_permission = PermissionFlag('delete_permission')
+
+    _permission_table = None
+
+    generation = 0
+    """
+    A counter which is incremented when grantable permissions of any
+    permission logic may be changed
+    """
+
     def get_full_permission_string(self, perm):
         """
         Return full permission string (app_label.perm_model)
@@ -17,6 +80,92 @@ class PermissionLogic(object):
         model_name = self.model._meta.object_name.lower()
         return "%s.%s_%s" % (app_label, perm, model_name)
 
+    def prepare(self):
+        """
+        Prepare this permission logic for :attr:`model`
+
+        It is called by :func:`permission.utils.logics.add_permission_logic`
+        after the model is stored to :attr:`model`. Sub class can override
+        this method to compile anything which does not need to be computed
+        on each permission check (e.g. field paths).
+        """
+        self._permission_table = self._build_permission_table()
+        PermissionLogic.generation += 1
+
+    def _build_permission_table(self):
+        table = {}
+        for action in self.permission_actions:
+            if getattr(self, '%s_permission' % action):
+                table[self.get_full_permission_string(action)] = action
+        if self.any_permission:
+            # the key for permissions which are not listed
+            table[None] = 'any'
+        return table
+
+    def get_permission_action(self, perm):
+        """
+        Get an action which grant the permission in this permission logic
+
+        The table of permissions and actions is built from
+        :attr:`permission_actions` and the flags when the logic is registered
+        (and again when a flag is changed) thus it is a single dictionary
+        lookup. The built-in logics grant the same permissions with or without
+        object; the object is tested by the logic itself.
+
+        Parameters
+        ----------
+        perm : string
+            `app_label.codename` formatted permission string
+
+        Returns
+        -------
+        string or None
+            'add', 'change', 'delete', or 'any' (granted by
+            ``any_permission``). ``None`` if no flag grant the permission.
+        """
+        table = self._permission_table
+        if table is None:
+            table = self._permission_table = self._build_permission_table()
+        return table.get(perm, table.get(None))
+
+    def get_grantable_permissions(self):
+        """
+        Get permissions which this permission logic can grant
+
+        Handlers skip permission logics which can never grant the permission
+        being checked. The default implementation reports the permissions
+        granted by the flags in :attr:`permission_actions` (see
+        :meth:`get_permission_action`). It returns ``None`` when
+        ``any_permission`` is set, or when the class does not declare
+        :attr:`permission_actions` or overrides ``has_perm``,
+        ``has_perm_many`` or ``get_queryset_filter`` after declaring it.
+        Sub class which grant permissions in other way should override this
+        method.
+
+        Returns
+        -------
+        frozenset or None
+            A set of `app_label.codename` formatted permission strings or
+            ``None`` if this permission logic may grant any permission.
+        """
+        for klass in self.__class__.__mro__:
+            if 'permission_actions' in vars(klass):
+                break
+            if any(name in vars(klass) for name in ('has_perm',
+                                                    'has_perm_many',
+                                                    'get_queryset_filter')):
+                # the rule may not follow the permission table
+                return None
+        if not self.permission_actions:
+            return None
+        table = self._permission_table
+        if table is None:
+            table = self._permission_table = self._build_permission_table()
+        if None in table:
+            # any_permission
+            return None
+        return frozenset(table)
+
     def has_perm(self, user_obj, perm, obj=None):
         """
         Check if user have permission (of object)
@@ -43,3 +192,60 @@ class PermissionLogic(object):
                 "'%s' does not override `has_perm(user_obj, perm, obj=None)` "
                 "method. Sub class of `PermissionLogic` must override this "
                 "method.")
+
+    if has_native_coroutines:
+        from permission.aio import logic_ahas_perm as ahas_perm
+
+    def has_perm_many(self, user_obj, perm, objs):
+        """
+        Check if user have permission of each object
+
+        Sub class should override this method to determine the permissions
+        with a constant number of queries. The default implementation calls
+        :meth:`has_perm` for each object.
+
+        Parameters
+        ----------
+        user_obj : django user model instance
+            A django user model instance which be checked
+        perm : string
+            `app_label.codename` formatted permission string
+        objs : iterable
+            Saved django model instances of the model which this permission
+            logic is registered to
+
+        Returns
+        -------
+        dict
+            A dictionary which map pk of each object to whether the specified
+            user have specified permission of the object.
+        """
+        return dict((obj.pk, bool(self.has_perm(user_obj, perm, obj)))
+                    for obj in objs)
+
+    queryset_filter_requires_distinct = False
+    """Whether the filter of :meth:`get_queryset_filter` may duplicate rows"""
+
+    def get_queryset_filter(self, user_obj, perm):
+        """
+        Get a django query filter of objects which the user have permission
+
+        Parameters
+        ----------
+        user_obj : django user model instance
+            A django user model instance which be checked
+        perm : string
+            `app_label.codename` formatted permission string
+
+        Returns
+        -------
+        boolean, django.db.models.Q, or None
+            ``True`` for all objects, ``False`` for no object, a ``Q`` object
+            to filter the objects, or ``None`` when the rule of this
+            permission logic cannot be written as a query.
+
+        .. note::
+            The default implementation returns ``None`` thus
+            :meth:`has_perm_many` is used for each object instead.
+        """
+        return None
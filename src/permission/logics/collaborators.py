@@ -2,16 +2,22 @@
 """
 Permission logic module for collaborators based permission system
 """
+from django.db.models import Q
 from permission.conf import settings
 from permission.logics.base import PermissionLogic
-from permission.utils.field_lookup import field_lookup
+from permission.utils.field_lookup import compile_field_path
 from permission.compat import is_authenticated
+from permission.compat import has_native_coroutines
 
 
 class CollaboratorsPermissionLogic(PermissionLogic):
     """
     Permission logic class for collaborators based permission system
     """
+    permission_actions = ('change', 'delete')
+
+    queryset_filter_requires_distinct = True
+
     def __init__(self,
                  field_name=None,
                  any_permission=None,
@@ -69,6 +75,52 @@ class CollaboratorsPermissionLogic(PermissionLogic):
             self.delete_permission = \
                 settings.PERMISSION_DEFAULT_CPL_DELETE_PERMISSION
 
+    _field_path = None
+
+    def prepare(self):
+        """
+        Compile ``field_name`` for the model this logic is registered to
+        """
+        super(CollaboratorsPermissionLogic, self).prepare()
+        self._field_path = compile_field_path(self.model, self.field_name)
+
+    def _get_field_path(self, model):
+        field_path = self._field_path
+        if (field_path is None or field_path.model is not model or
+                field_path.field_path != self.field_name):
+            # not prepared, an object of a different class, or field_name
+            # has been changed after the logic was registered
+            field_path = compile_field_path(model, self.field_name)
+            if model is getattr(self, 'model', None):
+                self._field_path = field_path
+        return field_path
+
+    def _is_prefetched_collaborator(self, user_obj, obj, field_path):
+        # return None if the collaborators are not prefetched
+        if len(field_path.hops) == 1 and field_path.is_multiple:
+            accessor_name = field_path.hops[0][0]
+            collaborators = getattr(obj, accessor_name).all()
+            if collaborators._result_cache is not None:
+                return any(x.pk == user_obj.pk for x in collaborators)
+        return None
+
+    def _get_collaborator_queryset(self, user_obj, obj):
+        return obj.__class__._base_manager.filter(**{
+            'pk': obj.pk,
+            self.field_name: user_obj,
+        })
+
+    def _is_collaborator(self, user_obj, obj):
+        field_path = self._get_field_path(obj.__class__)
+        if not field_path.is_relation:
+            # field_name is not a relation (e.g. property) thus iterate it
+            return any(x == user_obj for x in field_path.iterate(obj))
+        result = self._is_prefetched_collaborator(user_obj, obj, field_path)
+        if result is not None:
+            return result
+        # check the membership in database without loading collaborators
+        return self._get_collaborator_queryset(user_obj, obj).exists()
+
     def has_perm(self, user_obj, perm, obj=None):
         """
         Check if user have permission (of object)
@@ -83,6 +135,9 @@ class CollaboratorsPermissionLogic(PermissionLogic):
 
         If an object is specified, it will return ``True`` if the user is
         found in ``field_name`` of the object (e.g. ``obj.collaborators``).
+        The membership is checked with a single ``EXISTS`` query (or in
+        memory when the collaborators are prefetched) thus collaborators are
+        not loaded.
         So once the object store the user as a collaborator in
         ``field_name`` attribute (default: ``collaborators``), the collaborator
         can change or delete the object (you can change this behavior to set
@@ -106,32 +161,81 @@ class CollaboratorsPermissionLogic(PermissionLogic):
         """
         if not is_authenticated(user_obj):
             return False
-        # construct the permission full name
-        change_permission = self.get_full_permission_string('change')
-        delete_permission = self.get_full_permission_string('delete')
+        action = self.get_permission_action(perm)
         if obj is None:
             # object permission without obj should return True
             # Ref: https://code.djangoproject.com/wiki/RowLevelPermissions
-            if self.any_permission:
-                return True
-            if self.change_permission and perm == change_permission:
-                return True
-            if self.delete_permission and perm == delete_permission:
-                return True
-            return False
-        elif user_obj.is_active:
-            # get collaborator queryset
-            collaborators = field_lookup(obj, self.field_name)
-            if hasattr(collaborators, 'all'):
-                collaborators = collaborators.all()
-            if user_obj in collaborators:
-                if self.any_permission:
-                    # have any kind of permissions to the obj
-                    return True
-                if (self.change_permission and
-                        perm == change_permission):
-                    return True
-                if (self.delete_permission and
-                        perm == delete_permission):
-                    return True
+            return action is not None
+        elif user_obj.is_active and action is not None:
+            return self._is_collaborator(user_obj, obj)
         return False
+
+    if has_native_coroutines:
+        from permission.aio import collaborators_ahas_perm as ahas_perm
+
+    def has_perm_many(self, user_obj, perm, objs):
+        """
+        Check if user have permission of each object with a single query
+
+        See :meth:`has_perm` for the rule of the permission.
+
+        Parameters
+        ----------
+        user_obj : django user model instance
+            A django user model instance which be checked
+        perm : string
+            `app_label.codename` formatted permission string
+        objs : iterable
+            Saved django model instances of the model which this permission
+            logic is registered to
+
+        Returns
+        -------
+        dict
+            A dictionary which map pk of each object to whether the specified
+            user have specified permission of the object.
+        """
+        objs = list(objs)
+        result = dict((obj.pk, False) for obj in objs)
+        if (not objs or not is_authenticated(user_obj) or
+                not user_obj.is_active):
+            return result
+        if self.get_permission_action(perm) is None:
+            return result
+        if not self._get_field_path(self.model).is_relation:
+            # field_name is not a relation (e.g. property)
+            return super(CollaboratorsPermissionLogic, self).has_perm_many(
+                user_obj, perm, objs)
+        pks = set(self.model._base_manager.filter(**{
+            'pk__in': list(result),
+            self.field_name: user_obj,
+        }).values_list('pk', flat=True))
+        for pk in pks:
+            result[pk] = True
+        return result
+
+    def get_queryset_filter(self, user_obj, perm):
+        """
+        Get a django query filter of objects which the user have permission
+
+        Parameters
+        ----------
+        user_obj : django user model instance
+            A django user model instance which be checked
+        perm : string
+            `app_label.codename` formatted permission string
+
+        Returns
+        -------
+        boolean or django.db.models.Q
+            A ``Q`` object which filter objects whose ``field_name`` is the
+            user, ``False`` if the user cannot have the permission of any
+            object, or ``None`` if ``field_name`` is not a relation.
+        """
+        if not is_authenticated(user_obj) or not user_obj.is_active:
+            return False
+        if self.get_permission_action(perm) is None:
+            return False
+        if not self._get_field_path(self.model).is_relation:
+            return None
+        return Q(**{self.field_name: user_obj})
@@ -5,12 +5,83 @@ Permission logic module for group based permission system
 from permission.conf import settings
 from permission.logics.base import PermissionLogic
 from permission.compat import is_authenticated
+from permission.compat import has_native_coroutines
+from permission.utils.cache import get_request_cache
+from permission.utils.versions import USER
+from permission.utils.versions import get_version_counters
+
+CACHE_NAME = '_permission_group_names_cache'
+CACHE_NAMESPACE = 'group_names'
+
+
+def get_user_group_names(user_obj):
+    """
+    Get a frozenset of group names which the user belongs to.
+
+    The names are loaded with a single query and stored in the request cache
+    (when :class:`permission.middleware.PermissionCacheMiddleware` is active)
+    or in the user instance thus all GroupInPermissionLogic instances share
+    them without queries.
+    """
+    group_names = get_cached_user_group_names(user_obj)
+    if group_names is None:
+        group_names = frozenset(
+            user_obj.groups.values_list('name', flat=True))
+        set_cached_user_group_names(user_obj, group_names)
+    return group_names
+
+
+def get_cached_user_group_names(user_obj):
+    """
+    Get the cached group names of the user or ``None`` when it is not cached
+    or stale (groups of the user were changed)
+    """
+    cache = get_request_cache()
+    if cache is not None:
+        entry = cache.get(user_obj, CACHE_NAMESPACE, None)
+    else:
+        entry = getattr(user_obj, CACHE_NAME, None)
+    if entry is None:
+        return None
+    version, group_names = entry
+    if version != _get_user_version(user_obj):
+        return None
+    return group_names
+
+
+def set_cached_user_group_names(user_obj, group_names):
+    """
+    Cache the group names of the user
+    """
+    entry = (_get_user_version(user_obj), group_names)
+    cache = get_request_cache()
+    if cache is not None:
+        cache.set(user_obj, CACHE_NAMESPACE, None, entry)
+    else:
+        setattr(user_obj, CACHE_NAME, entry)
+
+
+def _get_user_version(user_obj):
+    return get_version_counters().get((USER, user_obj.pk))
+
+
+def clear_user_group_names(user_obj):
+    """
+    Clear the group names stored in the request cache and the user instance.
+    """
+    cache = get_request_cache()
+    if cache is not None:
+        cache.delete(user_obj, CACHE_NAMESPACE, None)
+    if hasattr(user_obj, CACHE_NAME):
+        delattr(user_obj, CACHE_NAME)
 
 
 class GroupInPermissionLogic(PermissionLogic):
     """
     Permission logic class for group based permission system
     """
+    permission_actions = ('add', 'change', 'delete')
+
     def __init__(self,
                  group_names,
                  any_permission=None,
@@ -71,6 +142,11 @@ class GroupInPermissionLogic(PermissionLogic):
             self.delete_permission = \
                 settings.PERMISSION_DEFAULT_GIPL_DELETE_PERMISSION
 
+    def _in_groups(self, user_obj, obj=None):
+        # obj is ignored; the signature is shared with object tests
+        group_names = get_user_group_names(user_obj)
+        return not group_names.isdisjoint(self.group_names)
+
     def has_perm(self, user_obj, perm, obj=None):
         """
         Check if user have permission (of object)
@@ -84,6 +160,8 @@ class GroupInPermissionLogic(PermissionLogic):
 
         If an object is specified, it will return ``True`` if the user is
         in group specified in ``group_names`` of this instance.
+        Group names of the user are loaded once per user instance (see
+        :func:`get_user_group_names`).
         This permission logic is used mainly for group based role permission
         system.
         You can change this behavior to set ``any_permission``,
@@ -107,32 +185,66 @@ class GroupInPermissionLogic(PermissionLogic):
         """
         if not is_authenticated(user_obj):
             return False
-        # construct the permission full name
-        add_permission = self.get_full_permission_string('add')
-        change_permission = self.get_full_permission_string('change')
-        delete_permission = self.get_full_permission_string('delete')
+        action = self.get_permission_action(perm)
         if obj is None:
-            if user_obj.groups.filter(name__in=self.group_names):
-                if self.add_permission and perm == add_permission:
-                    return True
-                if self.change_permission and perm == change_permission:
-                    return True
-                if self.delete_permission and perm == delete_permission:
-                    return True
-                return self.any_permission
-            return False
-        elif user_obj.is_active:
-            if user_obj.groups.filter(name__in=self.group_names):
-                if self.any_permission:
-                    # have any kind of permissions to the obj
-                    return True
-                if (self.add_permission and
-                        perm == add_permission):
-                    return True
-                if (self.change_permission and
-                        perm == change_permission):
-                    return True
-                if (self.delete_permission and
-                        perm == delete_permission):
-                    return True
+            return action is not None and self._in_groups(user_obj)
+        elif user_obj.is_active and action is not None:
+            return self._in_groups(user_obj)
         return False
+
+    if has_native_coroutines:
+        from permission.aio import groupin_ahas_perm as ahas_perm
+
+    def has_perm_many(self, user_obj, perm, objs):
+        """
+        Check if user have permission of each object with at most one query
+
+        See :meth:`has_perm` for the rule of the permission.
+
+        Parameters
+        ----------
+        user_obj : django user model instance
+            A django user model instance which be checked
+        perm : string
+            `app_label.codename` formatted permission string
+        objs : iterable
+            Saved django model instances of the model which this permission
+            logic is registered to
+
+        Returns
+        -------
+        dict
+            A dictionary which map pk of each object to whether the specified
+            user have specified permission of the object.
+        """
+        objs = list(objs)
+        if (not objs or not is_authenticated(user_obj) or
+                not user_obj.is_active):
+            return dict((obj.pk, False) for obj in objs)
+        # the permission does not depend on the object
+        granted = self.has_perm(user_obj, perm, objs[0])
+        return dict((obj.pk, granted) for obj in objs)
+
+    def get_queryset_filter(self, user_obj, perm):
+        """
+        Get a django query filter of objects which the user have permission
+
+        Parameters
+        ----------
+        user_obj : django user model instance
+            A django user model instance which be checked
+        perm : string
+            `app_label.codename` formatted permission string
+
+        Returns
+        -------
+        boolean
+            ``True`` if the user have the permission of all objects,
+            otherwise ``False``.
+        """
+        if not is_authenticated(user_obj) or not user_obj.is_active:
+            return False
+        # the permission does not depend on the object
+        if self.get_permission_action(perm) is None:
+            return False
+        return self._in_groups(user_obj)
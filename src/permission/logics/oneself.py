@@ -2,8 +2,10 @@
 """
 Permission logic module to  manage users' self-modifications
 """
+from django.db.models import Q
 from permission.conf import settings
 from permission.logics.base import PermissionLogic
+from permission.logics.base import MEMORY
 from permission.compat import is_authenticated
 
 
@@ -14,6 +16,10 @@ class OneselfPermissionLogic(PermissionLogic):
     Written by quasiyoke.
     https://github.com/lambdalisue/django-permission/pull/27
     """
+    cost = MEMORY
+
+    permission_actions = ('change', 'delete')
+
     def __init__(self,
                  any_permission=None,
                  change_permission=None,
@@ -89,30 +95,62 @@ class OneselfPermissionLogic(PermissionLogic):
         """
         if not is_authenticated(user_obj):
             return False
-        # construct the permission full name
-        change_permission = self.get_full_permission_string('change')
-        delete_permission = self.get_full_permission_string('delete')
-        # check if the user is authenticated
+        action = self.get_permission_action(perm)
         if obj is None:
             # object permission without obj should return True
             # Ref: https://code.djangoproject.com/wiki/RowLevelPermissions
-            if self.any_permission:
-                return True
-            if self.change_permission and perm == change_permission:
-                return True
-            if self.delete_permission and perm == delete_permission:
-                return True
-            return False
-        elif user_obj.is_active:
+            return action is not None
+        elif user_obj.is_active and action is not None:
             # check if the user trying to interact with himself
-            if obj == user_obj:
-                if self.any_permission:
-                    # have any kind of permissions to himself
-                    return True
-                if (self.change_permission and
-                        perm == change_permission):
-                    return True
-                if (self.delete_permission and
-                        perm == delete_permission):
-                    return True
+            return obj == user_obj
         return False
+
+    def has_perm_many(self, user_obj, perm, objs):
+        """
+        Check if user have permission of each object with no query
+
+        See :meth:`has_perm` for the rule of the permission.
+
+        Parameters
+        ----------
+        user_obj : django user model instance
+            A django user model instance which be checked
+        perm : string
+            `app_label.codename` formatted permission string
+        objs : iterable
+            Saved django model instances of the model which this permission
+            logic is registered to
+
+        Returns
+        -------
+        dict
+            A dictionary which map pk of each object to whether the specified
+            user have specified permission of the object.
+        """
+        objs = list(objs)
+        result = dict((obj.pk, False) for obj in objs)
+        for obj in objs:
+            if obj == user_obj:
+                result[obj.pk] = self.has_perm(user_obj, perm, obj)
+        return result
+
+    def get_queryset_filter(self, user_obj, perm):
+        """
+        Get a django query filter of objects which the user have permission
+
+        Parameters
+        ----------
+        user_obj : django user model instance
+            A django user model instance which be checked
+        perm : string
+            `app_label.codename` formatted permission string
+
+        Returns
+        -------
+        boolean or django.db.models.Q
+            A ``Q`` object which filter the user itself or ``False`` if the
+            user cannot have the permission of himself.
+        """
+        if not self.has_perm(user_obj, perm, user_obj):
+            return False
+        return Q(pk=user_obj.pk)
@@ -4,6 +4,7 @@ Permission logic module for author based permission system
 """
 from permission.conf import settings
 from permission.logics.base import PermissionLogic
+from permission.logics.base import MEMORY
 from permission.compat import is_authenticated
 
 
@@ -11,6 +12,10 @@ class StaffPermissionLogic(PermissionLogic):
     """
     Permission logic class for is_staff authority based permission system
     """
+    cost = MEMORY
+
+    permission_actions = ('add', 'change', 'delete')
+
     def __init__(self,
                  any_permission=None,
                  add_permission=None,
@@ -100,32 +105,63 @@ class StaffPermissionLogic(PermissionLogic):
         """
         if not is_authenticated(user_obj):
             return False
-        # construct the permission full name
-        add_permission = self.get_full_permission_string('add')
-        change_permission = self.get_full_permission_string('change')
-        delete_permission = self.get_full_permission_string('delete')
+        action = self.get_permission_action(perm)
         if obj is None:
-            if user_obj.is_staff:
-                if self.add_permission and perm == add_permission:
-                    return True
-                if self.change_permission and perm == change_permission:
-                    return True
-                if self.delete_permission and perm == delete_permission:
-                    return True
-                return self.any_permission
-            return False
-        elif user_obj.is_active:
-            if user_obj.is_staff:
-                if self.any_permission:
-                    # have any kind of permissions to the obj
-                    return True
-                if (self.add_permission and
-                        perm == add_permission):
-                    return True
-                if (self.change_permission and
-                        perm == change_permission):
-                    return True
-                if (self.delete_permission and
-                        perm == delete_permission):
-                    return True
+            return action is not None and user_obj.is_staff
+        elif user_obj.is_active and action is not None:
+            return user_obj.is_staff
         return False
+
+    def has_perm_many(self, user_obj, perm, objs):
+        """
+        Check if user have permission of each object with no query
+
+        See :meth:`has_perm` for the rule of the permission.
+
+        Parameters
+        ----------
+        user_obj : django user model instance
+            A django user model instance which be checked
+        perm : string
+            `app_label.codename` formatted permission string
+        objs : iterable
+            Saved django model instances of the model which this permission
+            logic is registered to
+
+        Returns
+        -------
+        dict
+            A dictionary which map pk of each object to whether the specified
+            user have specified permission of the object.
+        """
+        objs = list(objs)
+        if (not objs or not is_authenticated(user_obj) or
+                not user_obj.is_active):
+            return dict((obj.pk, False) for obj in objs)
+        # the permission does not depend on the object
+        granted = self.has_perm(user_obj, perm, objs[0])
+        return dict((obj.pk, granted) for obj in objs)
+
+    def get_queryset_filter(self, user_obj, perm):
+        """
+        Get a django query filter of objects which the user have permission
+
+        Parameters
+        ----------
+        user_obj : django user model instance
+            A django user model instance which be checked
+        perm : string
+            `app_label.codename` formatted permission string
+
+        Returns
+        -------
+        boolean
+            ``True`` if the user have the permission of all objects,
+            otherwise ``False``.
+        """
+        if not is_authenticated(user_obj) or not user_obj.is_active:
+            return False
+        # the permission does not depend on the object
+        if self.get_permission_action(perm) is None:
+            return False
+        return bool(user_obj.is_staff)
@@ -0,0 +1,22 @@
+# coding=utf-8
+"""
+Load supported permissions of all registered permission handlers
+"""
+from __future__ import unicode_literals
+import timeit
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ('Load supported permissions of all registered permission '
+            'handlers with a single query and report the result.')
+
+    def handle(self, *args, **options):
+        from permission.utils.handlers import registry
+        from permission.utils.permissions import get_perm_catalogue
+        start = timeit.default_timer()
+        count = registry.warm()
+        seconds = timeit.default_timer() - start
+        self.stdout.write('Warmed %d permission handlers with %d perms in '
+                          '%.3f seconds' % (count, len(get_perm_catalogue()),
+                                            seconds))
@@ -0,0 +1,382 @@
+# coding=utf-8
+"""
+Process-level metrics of permission checks
+
+Counters and histograms of permission checks (per permission, handler, and
+permission logic), grants and denies, cache hits and misses, and latencies are
+kept in a thread-safe registry while ``PERMISSION_METRICS_ENABLE`` is ``True``
+and rendered in the Prometheus text exposition format with
+:func:`render_metrics` (or :func:`permission.views.metrics`).
+
+Examples
+--------
+>>> from permission.metrics import render_metrics
+>>> print(render_metrics())
+# HELP permission_checks_total Permission checks of the backend
+# TYPE permission_checks_total counter
+permission_checks_total{perm="blog.change_article",result="granted"} 3.0
+...
+"""
+from __future__ import unicode_literals
+import bisect
+import threading
+from collections import OrderedDict
+from django.core.signals import setting_changed
+
+
+__all__ = ('Counter', 'Histogram', 'MetricsRegistry', 'PermissionMetrics',
+           'get_metrics', 'render_metrics', 'write_metrics')
+
+
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+"""Default upper bounds (seconds) of buckets of latency histograms"""
+
+
+class Counter(object):
+    """
+    A monotonically increasing counter with labels
+    """
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=(), lock=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = lock or threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        """
+        Increment the counter of the label values
+
+        Parameters
+        ----------
+        labels : tuple
+            Label values in the order of ``labelnames``
+        amount : number
+            An amount to increment
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, labels=()):
+        """Get the value of the label values"""
+        return self._values.get(labels, 0)
+
+    def clear(self):
+        """Reset all values"""
+        with self._lock:
+            self._values.clear()
+
+    def samples(self):
+        """
+        Get samples as a list of (name suffix, labels, value)
+        """
+        with self._lock:
+            items = sorted(self._values.items(), key=_sort_key)
+        return [('', list(zip(self.labelnames, labels)), value)
+                for labels, value in items]
+
+
+class Histogram(Counter):
+    """
+    A histogram of observed values (e.g. latencies) with labels
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), lock=None,
+                 buckets=DEFAULT_BUCKETS):
+        super(Histogram, self).__init__(name, documentation, labelnames,
+                                        lock)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labels=(), value=0.0):
+        """
+        Observe a value of the label values
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [
+                    [0] * (len(self.buckets) + 1), 0.0, 0,
+                ]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def get(self, labels=()):
+        """Get (bucket counts, sum, count) of the label values"""
+        entry = self._values.get(labels)
+        if entry is None:
+            return [0] * (len(self.buckets) + 1), 0.0, 0
+        return list(entry[0]), entry[1], entry[2]
+
+    def samples(self):
+        """
+        Get samples as a list of (name suffix, labels, value)
+        """
+        with self._lock:
+            items = sorted(((k, self.get(k)) for k in self._values),
+                           key=_sort_key)
+        samples = []
+        for labels, (counts, total, count) in items:
+            labels = list(zip(self.labelnames, labels))
+            cumulative = 0
+            bounds = [_format_value(x) for x in self.buckets] + ['+Inf']
+            for bound, bucket in zip(bounds, counts):
+                cumulative += bucket
+                samples.append(('_bucket', labels + [('le', bound)],
+                                cumulative))
+            samples.append(('_sum', labels, total))
+            samples.append(('_count', labels, count))
+        return samples
+
+
+class MetricsRegistry(object):
+    """
+    A thread-safe registry of metrics
+    """
+    def __init__(self):
+        self._metrics = OrderedDict()
+        self._lock = threading.Lock()
+
+    def counter(self, name, documentation, labelnames=()):
+        """Get or create a :class:`Counter`"""
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(),
+                  buckets=DEFAULT_BUCKETS):
+        """Get or create a :class:`Histogram`"""
+        return self._get_or_create(Histogram, name, documentation,
+                                   labelnames, buckets=buckets)
+
+    def _get_or_create(self, cls, name, documentation, labelnames,
+                       **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = cls(name, documentation, labelnames, **kwargs)
+                    self._metrics[name] = metric
+        if not isinstance(metric, cls):
+            raise ValueError("A metric '%s' is already registered as %s" % (
+                name, metric.kind))
+        return metric
+
+    def get_metric(self, name):
+        """Get a metric by name or ``None``"""
+        return self._metrics.get(name)
+
+    def clear(self):
+        """Reset values of all metrics"""
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+    def render(self):
+        """
+        Render all metrics in the Prometheus text exposition format
+
+        Returns
+        -------
+        string
+        """
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append('# HELP %s %s' % (
+                metric.name, _escape_help(metric.documentation)))
+            lines.append('# TYPE %s %s' % (metric.name, metric.kind))
+            for suffix, labels, value in metric.samples():
+                if labels:
+                    labels = '{%s}' % ','.join(
+                        '%s="%s"' % (k, _escape_label(v)) for k, v in labels)
+                else:
+                    labels = ''
+                lines.append('%s%s%s %s' % (metric.name, suffix, labels,
+                                            _format_value(value)))
+        return '\n'.join(lines) + '\n'
+
+
+class PermissionMetrics(object):
+    """
+    Metrics of the permission layer
+
+    Permission backend, handlers, and permission logics call the ``record_*``
+    methods while metrics are enabled. Evaluations of handlers are measured
+    as a whole; permission logics are measured one by one only in the
+    adaptive ordering mode (``PERMISSION_ADAPTIVE_LOGIC_ORDERING``) and while
+    a trace is active since compiled decision functions evaluate them at
+    once.
+    """
+    def __init__(self, registry=None):
+        self.registry = registry or MetricsRegistry()
+        self.checks = self.registry.counter(
+            'permission_checks_total',
+            'Permission checks of the backend',
+            ('perm', 'result'))
+        self.check_duration = self.registry.histogram(
+            'permission_check_duration_seconds',
+            'Latency of permission checks of the backend',
+            ('perm',))
+        self.module_checks = self.registry.counter(
+            'permission_module_checks_total',
+            'Module permission checks of the backend',
+            ('app_label', 'result'))
+        self.handler_checks = self.registry.counter(
+            'permission_handler_checks_total',
+            'Permission checks asked to handlers',
+            ('handler',))
+        self.handler_evaluations = self.registry.counter(
+            'permission_handler_evaluations_total',
+            'Evaluations of permission logics of handlers',
+            ('handler', 'result'))
+        self.handler_duration = self.registry.histogram(
+            'permission_handler_duration_seconds',
+            'Latency of evaluations of permission logics of handlers',
+            ('handler',))
+        self.logic_evaluations = self.registry.counter(
+            'permission_logic_evaluations_total',
+            'Evaluations of permission logics',
+            ('logic', 'result'))
+        self.logic_duration = self.registry.histogram(
+            'permission_logic_duration_seconds',
+            'Latency of evaluations of permission logics',
+            ('logic',))
+        self.cache_requests = self.registry.counter(
+            'permission_cache_requests_total',
+            'Lookups of caches of permission decisions',
+            ('tier', 'result'))
+
+    def record_check(self, perm, granted, seconds):
+        """Record a permission check of the backend"""
+        self.checks.inc((perm, _result(granted)))
+        self.check_duration.observe((perm,), seconds)
+
+    def record_module_check(self, app_label, granted):
+        """Record a module permission check of the backend"""
+        self.module_checks.inc((app_label, _result(granted)))
+
+    def record_handler(self, handler):
+        """Record a handler asked by the backend"""
+        self.handler_checks.inc((_get_handler_label(handler),))
+
+    def record_evaluation(self, handler, granted, seconds):
+        """
+        Record an evaluation of permission logics of a handler (e.g. a call
+        of a compiled decision function)
+        """
+        label = _get_handler_label(handler)
+        self.handler_evaluations.inc((label, _result(granted)))
+        self.handler_duration.observe((label,), seconds)
+
+    def record_logic(self, permission_logic, granted, seconds):
+        """Record an evaluation of a permission logic"""
+        name = permission_logic.__class__.__name__
+        self.logic_evaluations.inc((name, _result(granted)))
+        self.logic_duration.observe((name,), seconds)
+
+    def record_cache(self, tier, hit):
+        """Record a cache lookup"""
+        self.cache_requests.inc((tier, 'hit' if hit else 'miss'))
+
+    def get_cache_hit_ratio(self, tier):
+        """
+        Get a ratio of hits of the cache tier (0.0 when it was not used)
+        """
+        hits = self.cache_requests.get((tier, 'hit'))
+        total = hits + self.cache_requests.get((tier, 'miss'))
+        return float(hits) / total if total else 0.0
+
+
+_metrics = None
+_enabled = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """
+    Get the process-wide metrics of the permission layer
+
+    Returns
+    -------
+    PermissionMetrics or None
+        ``None`` if ``PERMISSION_METRICS_ENABLE`` is not ``True``
+    """
+    global _metrics, _enabled
+    if _enabled is None:
+        from permission.conf import settings
+        _enabled = bool(settings.PERMISSION_METRICS_ENABLE)
+    if not _enabled:
+        return None
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = PermissionMetrics()
+    return _metrics
+
+
+def render_metrics():
+    """
+    Render the metrics in the Prometheus text exposition format
+
+    Returns
+    -------
+    string
+        An empty string if metrics are not enabled
+    """
+    metrics = get_metrics()
+    if metrics is None:
+        return ''
+    return metrics.registry.render()
+
+
+def write_metrics(path):
+    """
+    Write the metrics in the Prometheus text exposition format to the file
+    (e.g. for the textfile collector of node exporter)
+    """
+    import io
+    with io.open(path, 'w', encoding='utf-8') as fp:
+        fp.write(render_metrics())
+
+
+def _reset_enabled(setting, **kwargs):
+    global _enabled
+    if setting == 'PERMISSION_METRICS_ENABLE':
+        _enabled = None
+
+
+setting_changed.connect(_reset_enabled,
+                        dispatch_uid='permission.metrics.reset_enabled')
+
+
+def _result(granted):
+    return 'granted' if granted else 'denied'
+
+
+def _get_handler_label(handler):
+    model = getattr(handler, 'model', None)
+    if model is not None:
+        return '%s.%s' % (model._meta.app_label, model._meta.object_name)
+    return getattr(handler, 'app_label', None) or repr(handler)
+
+
+def _sort_key(item):
+    return tuple('%s' % x for x in item[0])
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return '%s' % value
+
+
+def _escape_help(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _escape_label(value):
+    return ('%s' % value).replace('\\', '\\\\').replace(
+        '"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,87 @@
+# coding=utf-8
+"""
+Middleware of django-permission
+"""
+from __future__ import unicode_literals
+from permission.utils.cache import activate_request_cache
+from permission.utils.cache import deactivate_request_cache
+from permission.instrumentation import Trace
+from permission.instrumentation import logger as trace_logger
+
+try:
+    from django.utils.deprecation import MiddlewareMixin
+except ImportError:
+    # Django 1.9 or earlier
+    MiddlewareMixin = object
+
+
+__all__ = ('PermissionCacheMiddleware', 'PermissionTraceMiddleware')
+
+
+class PermissionCacheMiddleware(MiddlewareMixin):
+    """
+    A middleware which provide a cache of permission checks for each request
+
+    Permission decisions, group names of users and prefetched permissions of
+    templates are stored in a bounded cache (``PERMISSION_REQUEST_CACHE_SIZE``
+    entries) instead of user instances while the request is processed. The
+    cache is dropped when the response is returned thus decisions never leak
+    to other requests even if the user instance is cached or pickled.
+
+    Examples
+    --------
+    >>> MIDDLEWARE = [
+    ...     # ...
+    ...     'permission.middleware.PermissionCacheMiddleware',
+    ... ]
+    """
+    TOKEN_NAME = '_permission_cache_token'
+
+    def process_request(self, request):
+        setattr(request, self.TOKEN_NAME, activate_request_cache())
+
+    def process_response(self, request, response):
+        if hasattr(request, self.TOKEN_NAME):
+            token = getattr(request, self.TOKEN_NAME)
+            delattr(request, self.TOKEN_NAME)
+            deactivate_request_cache(token)
+        return response
+
+
+class PermissionTraceMiddleware(MiddlewareMixin):
+    """
+    A middleware which trace permission checks of each request
+
+    The trace is available as ``request.permission_trace`` (see
+    :class:`permission.instrumentation.Trace`). Checks which take
+    ``PERMISSION_TRACE_THRESHOLD`` seconds or longer are logged with
+    ``WARNING`` level and the summary of the request is logged with ``DEBUG``
+    level to ``permission.instrumentation`` logger.
+
+    Examples
+    --------
+    >>> MIDDLEWARE = [
+    ...     'permission.middleware.PermissionTraceMiddleware',
+    ...     # ...
+    ... ]
+    """
+    def process_request(self, request):
+        from permission.conf import settings
+        trace = Trace(threshold=settings.PERMISSION_TRACE_THRESHOLD)
+        trace.activate()
+        request.permission_trace = trace
+
+    def process_response(self, request, response):
+        trace = getattr(request, 'permission_trace', None)
+        if trace is not None and trace.active:
+            trace.deactivate()
+            if trace.checks:
+                summary = trace.summary()
+                trace_logger.debug(
+                    'Permission checks of %s: %d checks (%d granted) took '
+                    '%.3f seconds with %d queries',
+                    request.path, summary['checks'], summary['granted'],
+                    summary['seconds'], summary['queries'],
+                    extra={'permission_summary': summary},
+                )
+        return response
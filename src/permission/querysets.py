@@ -0,0 +1,81 @@
+# coding=utf-8
+"""
+Queryset utilities to filter objects by permissions in database
+"""
+from django.db import models
+from permission.utils.handlers import registry
+
+
+__all__ = ('filter_queryset', 'PermissionQuerySetMixin',
+           'PermissionQuerySet', 'PermissionManager')
+
+
+def filter_queryset(user_obj, perm, queryset_or_model):
+    """
+    Filter a queryset to the objects which the user have the permission
+
+    Object permissions determined by the permission logics of the model are
+    translated into a single query thus objects are not loaded into python.
+    Active superusers have the permission of all objects like django's
+    ``User.has_perm``.
+
+    Parameters
+    ----------
+    user_obj : django user model instance
+        A django user model instance which be checked
+    perm : string
+        `app_label.codename` formatted permission string
+    queryset_or_model : queryset or model
+        A queryset or model to filter
+
+    Returns
+    -------
+    django queryset
+        A filtered queryset
+
+    Examples
+    --------
+    >>> from permission import filter_queryset
+    >>> articles = filter_queryset(request.user, 'blog.change_article',
+    ...                            Article.objects.order_by('-created_at'))
+    """
+    if isinstance(queryset_or_model, type) and \
+            issubclass(queryset_or_model, models.Model):
+        queryset = queryset_or_model._default_manager.all()
+    else:
+        queryset = queryset_or_model
+    if user_obj.is_active and getattr(user_obj, 'is_superuser', False):
+        return queryset
+    for handler in registry.get_handlers_for_perm(perm):
+        if handler.model is queryset.model:
+            return handler.filter_queryset(user_obj, perm, queryset)
+    return queryset.none()
+
+
+class PermissionQuerySetMixin(object):
+    """
+    A queryset mixin to filter objects by permissions
+
+    Examples
+    --------
+    >>> class ArticleQuerySet(PermissionQuerySetMixin, models.QuerySet):
+    ...     pass
+    >>> class Article(models.Model):
+    ...     objects = ArticleQuerySet.as_manager()
+    >>> Article.objects.filter_by_perm(request.user, 'blog.change_article')
+    """
+    def filter_by_perm(self, user_obj, perm):
+        """
+        Filter to the objects which the user have the permission
+
+        See :func:`filter_queryset` for the detail.
+        """
+        return filter_queryset(user_obj, perm, self)
+
+
+class PermissionQuerySet(PermissionQuerySetMixin, models.QuerySet):
+    """A queryset which can filter objects by permissions"""
+
+
+PermissionManager = models.Manager.from_queryset(PermissionQuerySet)
+"""A manager which can filter objects by permissions"""
@@ -0,0 +1,303 @@
+# coding=utf-8
+"""
+Signal receivers which invalidate cached permission results
+"""
+from __future__ import unicode_literals
+from django.db.models.signals import post_save
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_init
+from django.db.models.signals import pre_delete
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_migrate
+from permission.utils.cache import get_module_perms_cache
+from permission.utils.cache import get_shared_decision_cache
+from permission.utils.permissions import clear_perm_catalogue
+from permission.utils.versions import get_version_counters
+
+
+__all__ = ('connect_receivers', 'permission_logics_changed',
+           'get_relation_dependents', 'get_hop_dependents')
+
+
+def clear_module_perms_cache(sender, **kwargs):
+    """Clear cached ``has_module_perms`` results"""
+    get_module_perms_cache().clear()
+
+
+def clear_module_perms_cache_on_m2m_changed(sender, action, **kwargs):
+    """Clear cached ``has_module_perms`` results when relations changed"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        get_module_perms_cache().clear()
+
+
+def clear_perm_catalogue_on_change(sender, **kwargs):
+    """Clear the catalogue of perms when permissions may be changed"""
+    clear_perm_catalogue()
+
+
+def _bump_user(user_pk):
+    get_version_counters().bump_user(user_pk)
+    shared = get_shared_decision_cache()
+    if shared is not None:
+        shared.bump_user(user_pk)
+
+
+def _bump_model(model):
+    get_version_counters().bump_model(model)
+    shared = get_shared_decision_cache()
+    if shared is not None:
+        shared.bump_model(model)
+
+
+def _bump_object(model, pk):
+    get_version_counters().bump_object(model, pk)
+    shared = get_shared_decision_cache()
+    if shared is not None:
+        shared.bump_object(model, pk)
+
+
+def bump_object_generation(sender, instance, **kwargs):
+    """
+    Make cached decisions of a saved or deleted object of a model which has
+    permission logics stale
+    """
+    if instance.pk is None:
+        return
+    # other processes may have cached decisions of models whose
+    # registrations are still deferred in this process
+    _materialize(sender._meta.app_label)
+    # foreign keys of intermediate hops of field paths (e.g. ``author`` of
+    # ``single_bridge__author``) may have been changed
+    for dependent in get_hop_dependents().get(sender._meta.concrete_model,
+                                              ()):
+        _bump_model(dependent)
+    if not hasattr(sender, '_permission_logics'):
+        return
+    _bump_object(sender, instance.pk)
+
+
+def bump_object_generation_on_m2m_changed(sender, instance, action, reverse,
+                                          model, pk_set=None, **kwargs):
+    """
+    Make cached decisions of objects stale when relations which permission
+    logics depend on (e.g. ``field_name`` of CollaboratorsPermissionLogic)
+    were changed
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    # relations of deferred registrations are unknown until they are run
+    _materialize()
+    for dependent in get_relation_dependents().get(sender, ()):
+        if isinstance(instance, dependent):
+            _bump_object(dependent, instance.pk)
+        elif issubclass(model, dependent) and pk_set is not None:
+            for pk in pk_set:
+                _bump_object(dependent, pk)
+        else:
+            # the relation is not on the model (e.g. ``bridge__editors``) or
+            # the changed objects are unknown (e.g. cleared)
+            _bump_model(dependent)
+
+
+def _materialize(app_label=None):
+    from permission.utils.handlers import registry
+    if registry.is_deferred(app_label):
+        registry.materialize(app_label)
+
+
+def bump_user_generation(sender, instance, **kwargs):
+    """Make cached decisions of a saved or deleted user stale"""
+    _bump_user(instance.pk)
+
+
+def bump_user_generation_on_m2m_changed(sender, instance, action, reverse,
+                                        model, pk_set=None, **kwargs):
+    """Make cached decisions of users whose groups were changed stale"""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            _bump_user(instance.pk)
+    elif action in ('post_add', 'post_remove'):
+        for pk in pk_set or ():
+            _bump_user(pk)
+    elif action == 'pre_clear':
+        # members of the group are unknown after the group is cleared
+        members = model._default_manager.filter(groups=instance)
+        for pk in members.values_list('pk', flat=True):
+            _bump_user(pk)
+
+
+def remember_group_name(sender, instance, **kwargs):
+    """Remember the name of a loaded group to find renames on save"""
+    instance.__dict__['_permission_group_name'] = instance.__dict__.get(
+        'name')
+
+
+def bump_group_members_generation(sender, instance, created, **kwargs):
+    """
+    Make cached decisions of members of a renamed group stale (e.g.
+    decisions of GroupInPermissionLogic)
+    """
+    name = instance.__dict__.get('name')
+    if created or instance.__dict__.get('_permission_group_name') == name:
+        return
+    instance.__dict__['_permission_group_name'] = name
+    _bump_group_members(instance)
+
+
+def bump_group_members_generation_on_delete(sender, instance, **kwargs):
+    """Make cached decisions of members of a deleted group stale"""
+    # members are unknown after the group is deleted
+    _bump_group_members(instance)
+
+
+def _bump_group_members(group):
+    from django.contrib.auth import get_user_model
+    members = get_user_model()._default_manager.filter(groups=group)
+    for pk in members.values_list('pk', flat=True):
+        _bump_user(pk)
+
+
+def permission_logics_changed(model):
+    """
+    Make cached decisions of the model stale when permission logics of the
+    model were added or removed
+
+    Only the counters of this process are bumped; decisions in the shared
+    cache are not discarded every time workers register permission logics.
+    """
+    global _dependents
+    _dependents = None
+    get_version_counters().bump_model(model)
+
+
+_dependents = None
+
+
+def get_relation_dependents():
+    """
+    Get a dictionary which map through models of many to many relations to
+    models which have permission logics depending on the relations
+
+    The dictionary is built from the registry on demand and rebuilt after
+    permission logics were changed (see :func:`permission_logics_changed`).
+    """
+    return _get_dependents()[0]
+
+
+def get_hop_dependents():
+    """
+    Get a dictionary which map models holding foreign keys of intermediate
+    hops of field paths (e.g. ``Bridge`` of ``single_bridge__author``) to
+    models which have permission logics depending on the foreign keys
+
+    Field paths which are not query lookups (e.g. properties) are not
+    tracked.
+    """
+    return _get_dependents()[1]
+
+
+def _get_dependents():
+    global _dependents
+    dependents = _dependents
+    if dependents is None:
+        from permission.utils.handlers import registry
+        from permission.logics import AuthorPermissionLogic
+        from permission.logics import CollaboratorsPermissionLogic
+        relations = {}
+        hops = {}
+        for handler in registry.get_handlers():
+            model = handler.model
+            for logic in getattr(model, '_permission_logics', ()):
+                if not isinstance(logic, (AuthorPermissionLogic,
+                                          CollaboratorsPermissionLogic)):
+                    continue
+                field_path = logic._get_field_path(model)
+                current = model
+                for field in field_path.fields or ():
+                    through = _get_through_model(field)
+                    if through is not None:
+                        relations.setdefault(through, set()).add(model)
+                    holder = _get_holder_model(current, field)
+                    if holder is not None and holder is not model:
+                        holder = holder._meta.concrete_model
+                        hops.setdefault(holder, set()).add(model)
+                    current = field.related_model
+        _dependents = dependents = (relations, hops)
+    return dependents
+
+
+def _get_holder_model(model, field):
+    if getattr(field, 'many_to_many', False):
+        # changes are notified via m2m_changed of the through model
+        return None
+    if hasattr(field, 'get_accessor_name'):
+        # reverse relation; the foreign key is on the related model
+        return field.related_model
+    return model
+
+
+def _get_through_model(field):
+    if not getattr(field, 'many_to_many', False):
+        return None
+    if hasattr(field, 'get_accessor_name'):
+        # reverse relation
+        return field.through
+    rel = getattr(field, 'remote_field', None) or field.rel
+    return rel.through
+
+
+def connect_receivers():
+    """
+    Connect signal receivers to django's auth models
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.models import Group
+    from django.contrib.auth.models import Permission
+    user_model = get_user_model()
+
+    for model in (Group, Permission):
+        uid = 'permission.clear_module_perms_cache.%s' % model.__name__
+        post_save.connect(clear_module_perms_cache, sender=model,
+                          dispatch_uid=uid)
+        post_delete.connect(clear_module_perms_cache, sender=model,
+                            dispatch_uid=uid)
+    through_models = [Group.permissions.through]
+    for name in ('groups', 'user_permissions'):
+        # custom user model may not have PermissionsMixin
+        if hasattr(user_model, name):
+            through_models.append(getattr(user_model, name).through)
+    for through in through_models:
+        m2m_changed.connect(clear_module_perms_cache_on_m2m_changed,
+                            sender=through,
+                            dispatch_uid='permission.%s' % through.__name__)
+
+    # catalogue of perms
+    post_migrate.connect(clear_perm_catalogue_on_change,
+                         dispatch_uid='permission.clear_perm_catalogue')
+    post_save.connect(clear_perm_catalogue_on_change, sender=Permission,
+                      dispatch_uid='permission.clear_perm_catalogue')
+    post_delete.connect(clear_perm_catalogue_on_change, sender=Permission,
+                        dispatch_uid='permission.clear_perm_catalogue')
+
+    # version counters of cached decisions
+    post_save.connect(bump_object_generation,
+                      dispatch_uid='permission.bump_object_generation')
+    post_delete.connect(bump_object_generation,
+                        dispatch_uid='permission.bump_object_generation')
+    m2m_changed.connect(bump_object_generation_on_m2m_changed,
+                        dispatch_uid='permission.bump_object_generation')
+    post_save.connect(bump_user_generation, sender=user_model,
+                      dispatch_uid='permission.bump_user_generation')
+    post_delete.connect(bump_user_generation, sender=user_model,
+                        dispatch_uid='permission.bump_user_generation')
+    if hasattr(user_model, 'groups'):
+        post_init.connect(remember_group_name, sender=Group,
+                          dispatch_uid='permission.remember_group_name')
+        post_save.connect(bump_group_members_generation, sender=Group,
+                          dispatch_uid='permission.bump_group_members')
+        pre_delete.connect(bump_group_members_generation_on_delete,
+                           sender=Group,
+                           dispatch_uid='permission.bump_group_members')
+        m2m_changed.connect(bump_user_generation_on_m2m_changed,
+                            sender=user_model.groups.through,
+                            dispatch_uid='permission.bump_user_generation')
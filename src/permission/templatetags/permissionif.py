@@ -10,6 +10,10 @@ from django.template.smartif import OPERATORS
 from django.template.defaulttags import IfNode
 from django.template.defaulttags import TemplateLiteral
 from permission.conf import settings
+from permission.utils.cache import get_decision_key
+from permission.utils.cache import get_request_cache
+from permission.utils.versions import VersionedCache
+from permission.utils.permissions import user_has_perm_many
 
 register = template.Library()
 
@@ -23,11 +27,35 @@ def of_operator(context, x, y):
     return x.eval(context), y.eval(context)
 
 
+PREFETCH_CACHE_NAME = '_permission_prefetch_cache'
+PREFETCH_NAMESPACE = 'prefetch'
+
+
+def _get_prefetch_key(user, perm, obj):
+    # the user is identified with pk thus all anonymous users share decisions
+    cachekey = get_decision_key(perm, obj)
+    if cachekey is None:
+        return None
+    return (getattr(user, 'pk', None),) + cachekey
+
+
+def _get_request_prefetch_cache(user):
+    request_cache = get_request_cache()
+    if request_cache is None:
+        return None
+    return VersionedCache(
+        request_cache.get_namespace(user, PREFETCH_NAMESPACE), user)
+
+
 def has_operator(context, x, y):
     """
     'has' operator of permission if
 
-    This operator is used to specify the user object of permission
+    This operator is used to specify the user object of permission.
+    Decisions prefetched with ``permission_prefetch`` tag are used first.
+    They are found in the render context or, while
+    :class:`permission.middleware.PermissionCacheMiddleware` is active, in the
+    request cache thus included templates share them as well.
     """
     user = x.eval(context)
     perm = y.eval(context)
@@ -35,6 +63,18 @@ def has_operator(context, x, y):
         perm, obj = perm
     else:
         obj = None
+    cache = context.render_context.get(PREFETCH_CACHE_NAME)
+    if cache:
+        key = _get_prefetch_key(user, perm, obj)
+        if key in cache:
+            return cache[key]
+    request_cache = _get_request_prefetch_cache(user)
+    if request_cache is not None:
+        cachekey = get_decision_key(perm, obj)
+        if cachekey is not None:
+            decision = request_cache.get(cachekey)
+            if decision is not None:
+                return decision
     return user.has_perm(perm, obj)
 
 # Add 'of' and 'has' operator to existing operators
@@ -129,6 +169,81 @@ def do_permissionif(parser, token):
 do_permissionif.Parser = TemplatePermissionIfParser
 
 
+class PermissionPrefetchNode(template.Node):
+    """
+    A node which prefetch permission decisions into the render context
+    """
+    def __init__(self, user, perms, objs=None):
+        self.user = user
+        self.perms = perms
+        self.objs = objs
+
+    def render(self, context):
+        user = self.user.resolve(context)
+        perms = [perm.resolve(context) for perm in self.perms]
+        if PREFETCH_CACHE_NAME not in context.render_context:
+            context.render_context[PREFETCH_CACHE_NAME] = {}
+        cache = context.render_context[PREFETCH_CACHE_NAME]
+        request_cache = _get_request_prefetch_cache(user)
+
+        def store(perm, obj, granted):
+            cache[_get_prefetch_key(user, perm, obj)] = granted
+            if request_cache is not None:
+                request_cache[get_decision_key(perm, obj)] = granted
+
+        if self.objs is None:
+            for perm in perms:
+                store(perm, None, user.has_perm(perm))
+            return ''
+        objs = [obj for obj in (self.objs.resolve(context) or ())
+                if getattr(obj, 'pk', None) is not None]
+        for perm in perms:
+            result = user_has_perm_many(user, perm, objs)
+            for obj, granted in result.items():
+                store(perm, obj, granted)
+        return ''
+
+
+@register.tag('permission_prefetch')
+def do_permission_prefetch(parser, token):
+    """
+    Prefetch permissions of objects for following permission if
+
+    Permissions of all objects are determined at once (with a constant number
+    of queries for built-in permission logics) and following ``has``
+    operators in the same template use the results.
+
+    Examples
+    --------
+    ::
+
+        {% permission_prefetch user 'blog.change_article' 'blog.delete_article' for article_list %}
+        {% for article in article_list %}
+            {% if user has 'blog.change_article' of article %}
+                <a href="...">Edit</a>
+            {% endif %}
+        {% endfor %}
+
+    .. note::
+        The results are stored in the render context thus they are not
+        shared with included templates.
+    """
+    bits = token.split_contents()
+    tag_name = bits[0]
+    bits = bits[1:]
+    objs = None
+    if len(bits) >= 2 and bits[-2] == 'for':
+        objs = parser.compile_filter(bits[-1])
+        bits = bits[:-2]
+    if len(bits) < 2 or 'for' in bits:
+        raise TemplateSyntaxError(
+            "'%s' tag requires a user, one or more permissions, and "
+            "optionally 'for' and objects" % tag_name)
+    user = parser.compile_filter(bits[0])
+    perms = [parser.compile_filter(bit) for bit in bits[1:]]
+    return PermissionPrefetchNode(user, perms, objs)
+
+
 # To replace builtin if
 def replace_builtin_if(replace=False):
     if replace:
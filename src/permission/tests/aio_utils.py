@@ -0,0 +1,18 @@
+# coding=utf-8
+"""
+Coroutine helpers of the test suite
+
+Only imported when ``permission.compat.has_native_coroutines`` is ``True``
+because the ``async def`` syntax is available only from Python 3.5.
+"""
+
+
+def recording_run_sync(run_sync, calls):
+    """
+    Return a coroutine function which records the called function in
+    ``calls`` and delegates to ``run_sync``
+    """
+    async def wrapper(func, *args, **kwargs):
+        calls.append(func)
+        return await run_sync(func, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,14 @@
+# coding=utf-8
+"""
+Permission logics discovered by the autodiscover tests
+"""
+from permission.logics import AuthorPermissionLogic
+from permission.logics import CollaboratorsPermissionLogic
+
+
+PERMISSION_LOGICS = (
+    ('permission.Bridge', AuthorPermissionLogic(
+        any_permission=False, change_permission=True)),
+    ('permission.Bridge', CollaboratorsPermissionLogic(
+        field_name='editors', any_permission=False, change_permission=True)),
+)
@@ -0,0 +1,130 @@
+# coding=utf-8
+import unittest
+from django.test import TestCase, override_settings
+from ..compat import has_native_coroutines
+from ..logics import PermissionLogic
+from ..logics import CollaboratorsPermissionLogic
+from ..logics import GroupInPermissionLogic
+from ..logics import StaffPermissionLogic
+from ..utils.logics import add_permission_logic
+from ..utils.handlers import registry
+from .utils import create_user, create_anonymous, create_group
+from .utils import create_article
+from .models import Article
+
+
+def run(coroutine):
+    import asyncio
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+class SyncOnlyPermissionLogic(PermissionLogic):
+    def has_perm(self, user_obj, perm, obj=None):
+        return user_obj.username == 'sync'
+
+
+@unittest.skipIf(not has_native_coroutines,
+                 'native coroutines are not available')
+@override_settings(
+    PERMISSION_CHECK_PERMISSION_PRESENCE=False,
+    PERMISSION_DEFAULT_GIPL_ANY_PERMISSION=False,
+    PERMISSION_DEFAULT_GIPL_ADD_PERMISSION=True,
+    PERMISSION_DEFAULT_GIPL_CHANGE_PERMISSION=True,
+    PERMISSION_DEFAULT_GIPL_DELETE_PERMISSION=False,
+)
+class PermissionAioTestCase(TestCase):
+    def setUp(self):
+        self.staff = create_user('staff', is_staff=True)
+        self.editor = create_user('editor')
+        self.member = create_user('member')
+        self.sync = create_user('sync')
+        self.anonymous = create_anonymous()
+        create_group('admin', self.member)
+        self.perm1 = 'permission.add_article'
+        self.perm2 = 'permission.change_article'
+        self.perm3 = 'permission.delete_article'
+        self.article = create_article('test')
+        self.article.editors.add(self.editor)
+        self.original_logics = getattr(Article, '_permission_logics', set())
+        Article._permission_logics = set()
+        self.logics = [
+            StaffPermissionLogic(),
+            CollaboratorsPermissionLogic(field_name='editors'),
+            GroupInPermissionLogic('admin'),
+            SyncOnlyPermissionLogic(),
+        ]
+        for permission_logic in self.logics:
+            add_permission_logic(Article, permission_logic)
+        registry.clear_index()
+
+    def tearDown(self):
+        Article._permission_logics = self.original_logics
+        registry.clear_index()
+
+    def test_logic_ahas_perm(self):
+        users = (self.staff, self.editor, self.member, self.sync,
+                 self.anonymous)
+        for permission_logic in self.logics:
+            for user in users:
+                for perm in (self.perm1, self.perm2, self.perm3):
+                    for obj in (None, self.article):
+                        self.assertEqual(
+                            run(permission_logic.ahas_perm(user, perm, obj)),
+                            permission_logic.has_perm(user, perm, obj),
+                            (permission_logic, user, perm, obj))
+
+    def test_logic_ahas_perm_memory(self):
+        permission_logic = self.logics[0]
+        with self.assertNumQueries(0):
+            self.assertTrue(run(permission_logic.ahas_perm(
+                self.staff, self.perm2, self.article)))
+
+    def test_backend_ahas_perm(self):
+        from ..backends import PermissionBackend
+        backend = PermissionBackend()
+        users = (self.staff, self.editor, self.member, self.sync,
+                 self.anonymous)
+        for user in users:
+            for perm in (self.perm1, self.perm2, self.perm3):
+                for obj in (None, self.article):
+                    self.assertEqual(
+                        run(backend.ahas_perm(user, perm, obj)),
+                        backend.has_perm(user, perm, obj),
+                        (user, perm, obj))
+
+    def test_handler_ahas_perm_cache(self):
+        handler = Article._permission_handler
+        handler.get_supported_permissions()
+        self.assertTrue(run(handler.ahas_perm(self.editor, self.perm2,
+                                              self.article)))
+        # the decision is cached in the user instance
+        with self.assertNumQueries(0):
+            self.assertTrue(run(handler.ahas_perm(self.editor, self.perm2,
+                                                  self.article)))
+            self.assertTrue(handler.has_perm(self.editor, self.perm2,
+                                             self.article))
+
+    def test_backend_ahas_perm_run_sync(self):
+        from .. import aio
+        from ..backends import PermissionBackend
+        from ..utils.permissions import get_perm_catalogue
+        from .aio_utils import recording_run_sync
+        backend = PermissionBackend()
+        registry.get_handlers_for_perm(self.perm2)
+        get_perm_catalogue()
+        calls = []
+        original = aio.run_sync
+        aio.run_sync = recording_run_sync(original, calls)
+        try:
+            with override_settings(PERMISSION_CHECK_PERMISSION_PRESENCE=True):
+                self.assertTrue(run(backend.ahas_perm(self.staff, self.perm2,
+                                                      self.article)))
+                self.assertEqual(calls, [])
+                # deferred registrations are run out of the event loop
+                registry.defer('permission', lambda: None)
+                self.assertTrue(run(backend.ahas_perm(self.staff, self.perm2,
+                                                      self.article)))
+                self.assertEqual(calls, [registry.get_handlers_for_perm])
+                self.assertFalse(registry.is_deferred('permission'))
+        finally:
+            aio.run_sync = original
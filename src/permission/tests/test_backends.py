@@ -21,9 +21,11 @@ class PermissionPermissionBackendTestCase(TestCase):
         self.perm3 = 'permission.delete_article'
         self.article = create_article('test')
         self.original_get_handlers = registry.get_handlers
+        registry.clear_index()
 
     def tearDown(self):
         registry.get_handlers = self.original_get_handlers
+        registry.clear_index()
 
     def test_constructor(self):
         backend = PermissionBackend()
@@ -178,3 +180,51 @@ class PermissionPermissionBackendTestCase(TestCase):
         self.assertTrue(registry.get_handlers()[1].get_supported_app_labels.called)
         self.assertTrue(registry.get_handlers()[0].has_module_perms.called)
         self.assertTrue(registry.get_handlers()[1].has_module_perms.called)
+
+    def test_has_perm_use_registry_index(self):
+        perms = [
+            'permission.add_article',
+            'permission.change_article',
+            'permission.delete_article',
+        ]
+        registry.get_handlers = MagicMock(return_value=[
+            MagicMock(get_supported_permissions=MagicMock(return_value=perms),
+                      has_perm=MagicMock(return_value=False)),
+        ])
+
+        self.assertFalse(PermissionBackend().has_perm(self.user, self.perm1))
+        self.assertFalse(PermissionBackend().has_perm(self.user, self.perm2))
+        # the index is shared among backend instances
+        self.assertEqual(registry.get_handlers.call_count, 1)
+        self.assertEqual(registry.get_handlers()[0].has_perm.call_count, 2)
+
+    @override_settings(
+        PERMISSION_CHECK_PERMISSION_PRESENCE=False,
+    )
+    def test_has_perm_many(self):
+        article2 = create_article('test2')
+        perms = [
+            'permission.add_article',
+            'permission.change_article',
+            'permission.delete_article',
+        ]
+        registry.get_handlers = MagicMock(return_value=[
+            MagicMock(get_supported_permissions=MagicMock(return_value=perms),
+                      has_perm_many=MagicMock(return_value={
+                          self.article.pk: True,
+                      })),
+            MagicMock(get_supported_permissions=MagicMock(return_value=perms),
+                      has_perm_many=MagicMock(return_value={
+                          article2.pk: False,
+                      })),
+        ])
+
+        backend = PermissionBackend()
+        result = backend.has_perm_many(self.user, self.perm1,
+                                       [self.article, article2])
+        self.assertEqual(result, {self.article.pk: True, article2.pk: False})
+        # granted objects are not passed to the following handlers
+        handlers = registry.get_handlers()
+        handlers[1].has_perm_many.assert_called_once_with(
+            self.user, self.perm1, [article2])
+
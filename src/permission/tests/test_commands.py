@@ -0,0 +1,18 @@
+# coding=utf-8
+from django.core.management import call_command
+from django.test import TestCase
+from .compat import MagicMock
+from ..utils.handlers import registry
+from ..utils.permissions import clear_perm_catalogue
+
+
+class PermissionCommandsTestCase(TestCase):
+    def tearDown(self):
+        clear_perm_catalogue()
+
+    def test_warm_permission_handlers(self):
+        stdout = MagicMock()
+        call_command('warm_permission_handlers', stdout=stdout)
+        message = stdout.write.call_args[0][0]
+        self.assertTrue(message.startswith(
+            'Warmed %d permission handlers' % len(registry.get_handlers())))
@@ -203,3 +203,32 @@ class PermissionClassDecoratorsTestCase(TestCase):
             )
         self.assertTrue(self.view_func.called)
 
+
+    def test_reuse_object(self):
+        from django.http import HttpResponse
+        from django.views.generic import DetailView
+        from ..models import Article
+        from ..utils import create_article
+        article1 = create_article('test1')
+        article2 = create_article('test2')
+        self.handler.has_perm.return_value = True
+        self.request.method = 'GET'
+
+        class ArticleDetailView(DetailView):
+            model = Article
+
+            def get(self, request, *args, **kwargs):
+                self.object = self.get_object()
+                # the object is not reused for other kwargs
+                self.kwargs = {'pk': article2.pk}
+                other = self.get_object()
+                return HttpResponse('%s,%s' % (self.object.title,
+                                               other.title))
+
+        view = permission_required('permission.change_article')(
+            ArticleDetailView).as_view()
+        with self.assertNumQueries(2):
+            response = view(self.request, pk=article1.pk)
+        self.assertEqual(response.content, b'test1,test2')
+        self.request.user.has_perm.assert_called_with(
+            'permission.change_article', obj=article1)
@@ -203,3 +203,29 @@ class PermissionClassDecoratorsTestCase(TestCase):
             )
         self.assertTrue(self.view_func.called)
 
+
+    def test_reuse_object(self):
+        from django.http import HttpResponse
+        from django.views.generic import DetailView
+        from ..models import Article
+        from ..utils import create_article
+        article = create_article('test')
+        self.handler.has_perm.return_value = True
+        self.request.method = 'GET'
+
+        class ArticleDetailView(DetailView):
+            model = Article
+
+            @permission_required('permission.change_article')
+            def dispatch(self, request, *args, **kwargs):
+                return super(ArticleDetailView, self).dispatch(
+                    request, *args, **kwargs)
+
+            def get(self, request, *args, **kwargs):
+                self.object = self.get_object()
+                return HttpResponse(self.object.title)
+
+        with self.assertNumQueries(1):
+            response = ArticleDetailView.as_view()(self.request,
+                                                   pk=article.pk)
+        self.assertEqual(response.content, b'test')
@@ -236,6 +236,36 @@ class PermissionPermissionHandlersTestCase(TestCase):
         self.assertFalse(instance.has_module_perms(user, 'unknown'))
         self.assertFalse(user.has_perm.called)
 
+    def test_has_module_perms_cache(self):
+        from django.contrib.auth.models import Group
+        instance = self.handler(Article)
+        user = MagicMock()
+        user.has_perm.return_value = True
+        self.assertTrue(instance.has_module_perms(user, 'permission'))
+        self.assertEqual(user.has_perm.call_count, 1)
+        self.assertTrue(instance.has_module_perms(user, 'permission'))
+        self.assertEqual(user.has_perm.call_count, 1)
+        # modification of Group clears the cache
+        Group.objects.create(name='staff')
+        self.assertTrue(instance.has_module_perms(user, 'permission'))
+        self.assertEqual(user.has_perm.call_count, 2)
+
+    def test_has_module_perms_cache_user_saved(self):
+        instance = self.handler(Article)
+        # a permission which other permission logics of the tests do not
+        # grant
+        instance.includes = ['auth.add_group']
+        self.assertFalse(instance.has_module_perms(self.user, 'permission'))
+        # modification of the user makes the cached result stale
+        self.user.is_superuser = True
+        self.user.save()
+        self.assertTrue(instance.has_module_perms(self.user, 'permission'))
+        # ModelBackend caches permissions in the user instance
+        user = self.user.__class__.objects.get(pk=self.user.pk)
+        user.is_superuser = False
+        user.save()
+        self.assertFalse(instance.has_module_perms(user, 'permission'))
+
 
 @override_settings(
     PERMISSION_DEFAULT_PERMISSION_HANDLER=LogicalPermissionHandler,
@@ -255,8 +285,12 @@ class PermissionLogicalPermissionHandlerTestCase(TestCase):
         from permission import add_permission_logic
         self.mock_logic1 = MagicMock(spec=PermissionLogic)
         self.mock_logic1.has_perm = MagicMock(return_value=False)
+        self.mock_logic1.get_grantable_permissions = MagicMock(
+            return_value=None)
         self.mock_logic2 = MagicMock(spec=PermissionLogic)
         self.mock_logic2.has_perm = MagicMock(return_value=False)
+        self.mock_logic2.get_grantable_permissions = MagicMock(
+            return_value=None)
         add_permission_logic(Article, self.mock_logic1)
         add_permission_logic(Article, self.mock_logic2)
 
@@ -295,3 +329,202 @@ class PermissionLogicalPermissionHandlerTestCase(TestCase):
                                            'permission.add_article'))
         self.assertEqual(self.mock_logic1.has_perm.call_count, 1)
         self.assertEqual(self.mock_logic2.has_perm.call_count, 1)
+
+    def test_has_perm_cache_distinguish_models(self):
+        from .utils import create_bridge
+        instance = self.handler(Article)
+        instance.get_supported_permissions = MagicMock(return_value=[
+            'permission.change_article',
+        ])
+        bridge = create_bridge()
+        bridge.pk = self.article.pk
+        self.mock_logic1.has_perm.side_effect = (
+            lambda user_obj, perm, obj: obj == self.article)
+        self.assertTrue(instance.has_perm(self.user,
+                                          'permission.change_article',
+                                          self.article))
+        self.assertFalse(instance.has_perm(self.user,
+                                           'permission.change_article',
+                                           bridge))
+
+    @override_settings(
+        PERMISSION_SHARED_CACHE='default',
+    )
+    def test_has_perm_shared_cache(self):
+        from django.contrib.auth.models import User
+        from django.core.cache import caches
+        caches['default'].clear()
+        instance = self.handler(Article)
+        instance.get_supported_permissions = MagicMock(return_value=[
+            'permission.change_article',
+        ])
+        perm = 'permission.change_article'
+        self.assertFalse(instance.has_perm(self.user, perm, self.article))
+        self.assertEqual(self.mock_logic1.has_perm.call_count, 1)
+        # another user instance (e.g. next request) use the shared cache
+        user = User.objects.get(pk=self.user.pk)
+        self.assertFalse(instance.has_perm(user, perm, self.article))
+        self.assertEqual(self.mock_logic1.has_perm.call_count, 1)
+        # modification of the object make the shared decisions stale
+        self.article.save()
+        user = User.objects.get(pk=self.user.pk)
+        self.assertFalse(instance.has_perm(user, perm, self.article))
+        self.assertEqual(self.mock_logic1.has_perm.call_count, 2)
+
+    def test_has_perm_many(self):
+        from permission.logics import AuthorPermissionLogic
+        from permission.logics import StaffPermissionLogic
+        from permission import add_permission_logic
+        Article._permission_logics = set()
+        add_permission_logic(Article, StaffPermissionLogic())
+        add_permission_logic(Article, AuthorPermissionLogic(
+            any_permission=False))
+        instance = self.handler(Article)
+        instance.get_supported_permissions = MagicMock(return_value=[
+            'permission.change_article',
+        ])
+        article2 = create_article('test2', user=self.user)
+        articles = [self.article, article2]
+        perm = 'permission.change_article'
+        self.assertEqual(instance.has_perm_many(self.user, perm, articles), {
+            self.article.pk: False,
+            article2.pk: True,
+        })
+        self.assertEqual(instance.has_perm_many(self.user, 'unknown',
+                                                articles), {
+            self.article.pk: False,
+            article2.pk: False,
+        })
+        # results are cached as well as has_perm
+        with self.assertNumQueries(0):
+            self.assertFalse(instance.has_perm(self.user, perm, self.article))
+            self.assertTrue(instance.has_perm(self.user, perm, article2))
+
+
+    def test_get_permission_logics(self):
+        from permission.logics import AuthorPermissionLogic
+        from permission.logics import StaffPermissionLogic
+        from permission import add_permission_logic, remove_permission_logic
+        author_logic = AuthorPermissionLogic(any_permission=False,
+                                             change_permission=True,
+                                             delete_permission=False)
+        add_permission_logic(Article, author_logic)
+        instance = self.handler(Article)
+        perm_logics = instance.get_permission_logics(self.perm2)
+        self.assertEqual(set(perm_logics), set([
+            self.mock_logic1, self.mock_logic2, author_logic,
+        ]))
+        # the author logic can never grant delete permission
+        perm_logics = instance.get_permission_logics(self.perm3)
+        self.assertEqual(set(perm_logics), set([
+            self.mock_logic1, self.mock_logic2,
+        ]))
+        # the index is rebuilt when the flag is changed
+        author_logic.delete_permission = True
+        self.assertTrue(author_logic in
+                        instance.get_permission_logics(self.perm3))
+        # the index is rebuilt when logics are added or removed
+        staff_logic = StaffPermissionLogic(any_permission=True)
+        add_permission_logic(Article, staff_logic)
+        self.assertTrue(staff_logic in
+                        instance.get_permission_logics(self.perm1))
+        remove_permission_logic(Article, staff_logic)
+        self.assertFalse(staff_logic in
+                         instance.get_permission_logics(self.perm1))
+        remove_permission_logic(Article, AuthorPermissionLogic)
+        self.assertFalse(author_logic in
+                         instance.get_permission_logics(self.perm2))
+
+    def test_has_perm_skip_logics_which_cannot_grant(self):
+        from permission.logics import CollaboratorsPermissionLogic
+        from permission import add_permission_logic
+        Article._permission_logics = set()
+        add_permission_logic(Article, CollaboratorsPermissionLogic(
+            field_name='editors',
+            any_permission=False,
+            change_permission=True,
+            delete_permission=False))
+        instance = self.handler(Article)
+        instance.get_supported_permissions = MagicMock(return_value=[
+            self.perm2, self.perm3,
+        ])
+        with self.assertNumQueries(0):
+            self.assertFalse(instance.has_perm(self.user, self.perm3,
+                                               self.article))
+
+    def test_get_permission_logics_order(self):
+        from permission.logics import CollaboratorsPermissionLogic
+        from permission.logics import GroupInPermissionLogic
+        from permission.logics import StaffPermissionLogic
+        from permission import add_permission_logic
+        Article._permission_logics = set()
+        collaborators_logic = CollaboratorsPermissionLogic(
+            field_name='editors')
+        groupin_logic = GroupInPermissionLogic('admin')
+        staff_logic = StaffPermissionLogic()
+        add_permission_logic(Article, collaborators_logic)
+        add_permission_logic(Article, groupin_logic)
+        add_permission_logic(Article, staff_logic)
+        instance = self.handler(Article)
+        # memory-only logic first, then in the registration order
+        self.assertEqual(instance.get_permission_logics(self.perm2), (
+            staff_logic, collaborators_logic, groupin_logic,
+        ))
+
+    @override_settings(
+        PERMISSION_ADAPTIVE_LOGIC_ORDERING=True,
+        PERMISSION_ADAPTIVE_LOGIC_ORDERING_INTERVAL=3,
+    )
+    def test_has_perm_adaptive_ordering(self):
+        from permission.logics import PermissionLogic
+        from permission import add_permission_logic
+        Article._permission_logics = set()
+        rare_logic = MagicMock(spec=PermissionLogic)
+        rare_logic.cost = 'memory'
+        rare_logic.has_perm = MagicMock(return_value=False)
+        rare_logic.get_grantable_permissions = MagicMock(return_value=None)
+        frequent_logic = MagicMock(spec=PermissionLogic)
+        frequent_logic.cost = 'database'
+        frequent_logic.has_perm = MagicMock(return_value=True)
+        frequent_logic.get_grantable_permissions = MagicMock(
+            return_value=None)
+        add_permission_logic(Article, rare_logic)
+        add_permission_logic(Article, frequent_logic)
+        instance = self.handler(Article)
+        instance.get_supported_permissions = MagicMock(return_value=[
+            self.perm2,
+        ])
+        self.assertEqual(instance.get_permission_logics(self.perm2),
+                         (rare_logic, frequent_logic))
+        for i in range(3):
+            self.assertTrue(instance._has_perm(self.user, self.perm2,
+                                               self.article))
+        # reordered after 3 checks
+        self.assertEqual(instance._logic_stats[rare_logic][:2], [3, 0])
+        self.assertEqual(instance._logic_stats[frequent_logic][:2], [3, 3])
+        self.assertEqual(instance.get_permission_logics(self.perm2),
+                         (frequent_logic, rare_logic))
+        rare_logic.has_perm.reset_mock()
+        self.assertTrue(instance._has_perm(self.user, self.perm2,
+                                           self.article))
+        self.assertFalse(rare_logic.has_perm.called)
+
+    def test_compile(self):
+        from permission.logics import AuthorPermissionLogic
+        from permission import add_permission_logic
+        Article._permission_logics = set()
+        add_permission_logic(Article, AuthorPermissionLogic(
+            any_permission=False))
+        instance = self.handler(Article)
+        with self.assertNumQueries(0):
+            instance.compile()
+        self.assertEqual(set(instance._logics_index[4]), set([
+            'permission.change_article',
+            'permission.delete_article',
+        ]))
+        function = instance.get_decision_function(self.perm2)
+        self.assertTrue(function is
+                        instance.get_decision_function(self.perm2))
+        article = create_article('test2', user=self.user)
+        self.assertTrue(function(self.user, article))
+        self.assertFalse(function(self.user, self.article))
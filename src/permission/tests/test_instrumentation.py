@@ -0,0 +1,117 @@
+# coding=utf-8
+from django.test import TestCase, override_settings
+from ..backends import PermissionBackend
+from ..instrumentation import trace
+from ..instrumentation import get_current_trace
+from ..logics import AuthorPermissionLogic
+from ..logics import CollaboratorsPermissionLogic
+from ..middleware import PermissionTraceMiddleware
+from ..utils.handlers import registry
+from ..utils.logics import add_permission_logic
+from .compat import MagicMock
+from .models import Article
+from .utils import create_user, create_article
+
+
+@override_settings(
+    PERMISSION_CHECK_PERMISSION_PRESENCE=False,
+)
+class PermissionInstrumentationTestCase(TestCase):
+    def setUp(self):
+        self.registry_backup = registry._registry
+        self.attrs_backup = {}
+        registry._registry = {}
+        for name in ('_permission_logics', '_permission_handler'):
+            if hasattr(Article, name):
+                self.attrs_backup[name] = getattr(Article, name)
+                delattr(Article, name)
+        add_permission_logic(Article, AuthorPermissionLogic(
+            any_permission=False, change_permission=True))
+        add_permission_logic(Article, CollaboratorsPermissionLogic(
+            field_name='editors', any_permission=False,
+            change_permission=True))
+        self.user = create_user('john')
+        self.article = create_article('test')
+        self.perm = 'permission.change_article'
+        self.backend = PermissionBackend()
+        # load supported permissions
+        Article._permission_handler.get_supported_permissions()
+
+    def tearDown(self):
+        registry._registry = self.registry_backup
+        delattr(Article, '_permission_logics')
+        delattr(Article, '_permission_handler')
+        for name, value in self.attrs_backup.items():
+            setattr(Article, name, value)
+
+    def test_trace_off(self):
+        self.assertEqual(get_current_trace(), None)
+        self.assertFalse(self.backend.has_perm(self.user, self.perm,
+                                               self.article))
+
+    def test_trace_has_perm(self):
+        with trace() as t:
+            self.assertEqual(get_current_trace(), t)
+            self.assertFalse(self.backend.has_perm(self.user, self.perm,
+                                                   self.article))
+            self.assertFalse(self.backend.has_perm(self.user, self.perm,
+                                                   self.article))
+        self.assertEqual(get_current_trace(), None)
+        self.assertEqual(len(t.checks), 2)
+        check = t.checks[0]
+        self.assertEqual(check.kind, 'has_perm')
+        self.assertEqual(check.target, self.perm)
+        self.assertEqual(check.result, False)
+        self.assertEqual(check.handlers,
+                         ['LogicalPermissionHandler(permission.Article)'])
+        # the cheaper logic is evaluated first
+        self.assertEqual([x.name for x in check.logics], [
+            'AuthorPermissionLogic',
+            'CollaboratorsPermissionLogic',
+        ])
+        self.assertEqual(len(check.logics[0].queries), 0)
+        self.assertEqual(len(check.logics[1].queries), 1)
+        self.assertEqual(len(check.queries), 1)
+        self.assertEqual(check.cache, [('user', False)])
+        # the second check use the cache
+        self.assertEqual(t.checks[1].cache, [('user', True)])
+        self.assertEqual(t.checks[1].logics, [])
+
+        summary = t.summary()
+        self.assertEqual(summary['checks'], 2)
+        self.assertEqual(summary['granted'], 0)
+        self.assertEqual(summary['queries'], 1)
+        self.assertEqual(summary['cache'], {'user': {'hits': 1, 'misses': 1}})
+        self.assertEqual(summary['logics']['CollaboratorsPermissionLogic'][
+            'queries'], 1)
+        self.assertEqual(check.as_dict()['logics'][0]['name'],
+                         'AuthorPermissionLogic')
+
+    def test_trace_has_module_perms(self):
+        with trace() as t:
+            self.backend.has_module_perms(self.user, 'permission')
+        self.assertEqual(t.checks[0].kind, 'has_module_perms')
+        self.assertEqual(t.checks[0].cache, [('module', False)])
+        # has_perm called in has_module_perms is nested
+        self.assertTrue(all(x.depth == 1 for x in t.checks[1:]))
+        self.assertEqual(t.summary()['checks'], 1)
+
+    def test_threshold(self):
+        from ..instrumentation import logger
+        logger_warning = logger.warning
+        logger.warning = MagicMock()
+        try:
+            with trace(threshold=0):
+                self.backend.has_perm(self.user, self.perm, self.article)
+            self.assertEqual(logger.warning.call_count, 1)
+        finally:
+            logger.warning = logger_warning
+
+    def test_middleware(self):
+        middleware = PermissionTraceMiddleware(lambda request: None)
+        request = MagicMock(spec=['path'], path='/')
+        middleware.process_request(request)
+        self.backend.has_perm(self.user, self.perm, self.article)
+        middleware.process_response(request, MagicMock())
+        self.assertEqual(get_current_trace(), None)
+        self.assertEqual(request.permission_trace.summary()['checks'], 1)
@@ -1,4 +1,6 @@
 # coding=utf-8
+from django.apps.registry import Apps
+from django.contrib.auth.models import User
 from django.test import TestCase, override_settings
 from ... import add_permission_logic
 from ...logics import AuthorPermissionLogic
@@ -6,6 +8,14 @@ from ..utils import create_user, create_anonymous, create_article
 from ..compat import MagicMock
 
 
+class ProxyUser(User):
+    class Meta:
+        # not to be migrated with the test models
+        apps = Apps()
+        app_label = 'permission'
+        proxy = True
+
+
 @override_settings(
     PERMISSION_DEFAULT_APL_FIELD_NAME='author',
     PERMISSION_DEFAULT_APL_ANY_PERMISSION=True,
@@ -216,3 +226,98 @@ class PermissionLogicsAuthorPermissionLogicTestCase(TestCase):
         add_permission_logic(self.article.__class__, permission_logic)
         self.assertFalse(
                 permission_logic.has_perm(self.user2, self.perm3, self.article))
+
+    def test_has_perm_many(self):
+        permission_logic = AuthorPermissionLogic(any_permission=False)
+        add_permission_logic(self.article.__class__, permission_logic)
+        articles = [self.article] + [
+            create_article('test%d' % i, user=self.user1) for i in range(3)]
+        with self.assertNumQueries(1):
+            result = permission_logic.has_perm_many(
+                self.user2, self.perm2, articles)
+        self.assertEqual(result, dict(
+            (x.pk, x.author == self.user2) for x in articles))
+        with self.assertNumQueries(0):
+            result = permission_logic.has_perm_many(
+                self.user2, self.perm1, articles)
+        self.assertFalse(any(result.values()))
+        self.assertFalse(any(permission_logic.has_perm_many(
+            self.anonymous, self.perm2, articles).values()))
+
+    def test_has_perm_many_with_filtering_default_manager(self):
+        from ..utils import empty_default_manager
+        permission_logic = AuthorPermissionLogic(any_permission=False)
+        add_permission_logic(self.article.__class__, permission_logic)
+        articles = [self.article] + [
+            create_article('test%d' % i, user=self.user1) for i in range(3)]
+        with empty_default_manager(self.article.__class__):
+            result = permission_logic.has_perm_many(
+                self.user2, self.perm2, articles)
+        self.assertEqual(result, dict(
+            (x.pk, permission_logic.has_perm(self.user2, self.perm2, x))
+            for x in articles))
+        self.assertTrue(result[self.article.pk])
+
+    def test_non_relation_field_name_parity(self):
+        permission_logic = AuthorPermissionLogic(
+            field_name='author__username', any_permission=True)
+        add_permission_logic(self.article.__class__, permission_logic)
+        articles = [self.article, create_article('test2', user=self.user1)]
+        expected = dict(
+            (x.pk, permission_logic.has_perm(self.user2, self.perm2, x))
+            for x in articles)
+        self.assertEqual(permission_logic.has_perm_many(
+            self.user2, self.perm2, articles), expected)
+        q = permission_logic.get_queryset_filter(self.user2, self.perm2)
+        if q is not None:
+            queryset = self.article.__class__.objects.filter(
+                q, pk__in=expected)
+            self.assertEqual(
+                set(queryset.values_list('pk', flat=True)),
+                set(pk for pk, granted in expected.items() if granted))
+
+    def test_has_perm_with_obj_proxy_user(self):
+        from ..utils import create_bridge
+        user = ProxyUser.objects.get(pk=self.user2.pk)
+        article = create_article('test2', bridge=create_bridge(self.user2))
+        for field_name, obj in (('author', self.article),
+                                ('single_bridge__author', article)):
+            permission_logic = AuthorPermissionLogic(field_name=field_name)
+            add_permission_logic(self.article.__class__, permission_logic)
+            # proxy and concrete instances are equal as Model.__eq__
+            self.assertTrue(permission_logic.has_perm(user, self.perm2, obj))
+            self.assertEqual(permission_logic.has_perm_many(
+                user, self.perm2, [obj]), {obj.pk: True})
+
+    def test_is_related_user_proxy_model(self):
+        permission_logic = AuthorPermissionLogic()
+        add_permission_logic(self.article.__class__, permission_logic)
+        # a foreign key to a proxy model refers concrete instances as well
+        field_path = MagicMock(related_model=ProxyUser)
+        self.assertTrue(permission_logic._is_related_user(
+            self.user2, field_path))
+        field_path = MagicMock(related_model=self.article.__class__)
+        self.assertFalse(permission_logic._is_related_user(
+            self.user2, field_path))
+
+    def test_has_perm_with_obj_without_loading_author(self):
+        permission_logic = AuthorPermissionLogic()
+        add_permission_logic(self.article.__class__, permission_logic)
+        article = self.article.__class__.objects.get(pk=self.article.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(permission_logic.has_perm(
+                self.user2, self.perm2, article))
+            self.assertFalse(permission_logic.has_perm(
+                self.user1, self.perm2, article))
+
+    def test_has_perm_with_obj_multiple_hops(self):
+        from ..utils import create_bridge
+        permission_logic = AuthorPermissionLogic(
+            field_name='single_bridge__author')
+        add_permission_logic(self.article.__class__, permission_logic)
+        article = create_article('test2', bridge=create_bridge(self.user1))
+        with self.assertNumQueries(1):
+            self.assertTrue(permission_logic.has_perm(
+                self.user1, self.perm2, article))
+        self.assertFalse(permission_logic.has_perm(
+            self.user2, self.perm2, article))
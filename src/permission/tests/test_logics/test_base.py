@@ -52,3 +52,58 @@ class PermissionLogicsPermissionLogicTestCase(TestCase):
         self.assertRaises(NotImplementedError,
                           permission_logic.has_perm,
                           self.user, self.perm3, self.article)
+
+    def test_get_permission_action(self):
+        permission_logic = PermissionLogic()
+        permission_logic.permission_actions = ('change', 'delete')
+        permission_logic.model = self.article.__class__
+        permission_logic.change_permission = True
+        permission_logic.delete_permission = False
+        permission_logic.prepare()
+        self.assertEqual(permission_logic.get_permission_action(self.perm1),
+                         None)
+        self.assertEqual(permission_logic.get_permission_action(self.perm2),
+                         'change')
+        self.assertEqual(permission_logic.get_permission_action(self.perm3),
+                         None)
+        # the table is rebuilt when a flag is changed
+        permission_logic.delete_permission = True
+        self.assertEqual(permission_logic.get_permission_action(self.perm3),
+                         'delete')
+        permission_logic.any_permission = True
+        self.assertEqual(permission_logic.get_permission_action(self.perm1),
+                         'any')
+        self.assertEqual(permission_logic.get_permission_action(self.perm2),
+                         'change')
+
+    def test_get_permission_action_without_model(self):
+        permission_logic = PermissionLogic()
+        permission_logic.permission_actions = ('change',)
+        permission_logic.change_permission = True
+        self.assertRaises(AttributeError,
+                          permission_logic.get_permission_action,
+                          self.perm2)
+
+    def test_get_grantable_permissions(self):
+        from ...logics import AuthorPermissionLogic
+        permission_logic = PermissionLogic()
+        self.assertEqual(permission_logic.get_grantable_permissions(), None)
+        permission_logic = AuthorPermissionLogic(any_permission=False,
+                                                 change_permission=True,
+                                                 delete_permission=False)
+        permission_logic.model = self.article.__class__
+        self.assertEqual(permission_logic.get_grantable_permissions(),
+                         frozenset([self.perm2]))
+        permission_logic.any_permission = True
+        self.assertEqual(permission_logic.get_grantable_permissions(), None)
+
+    def test_get_grantable_permissions_of_custom_logic(self):
+        from ...logics import AuthorPermissionLogic
+
+        class CustomPermissionLogic(AuthorPermissionLogic):
+            def has_perm(self, user_obj, perm, obj=None):
+                return True
+
+        permission_logic = CustomPermissionLogic(any_permission=False)
+        permission_logic.model = self.article.__class__
+        self.assertEqual(permission_logic.get_grantable_permissions(), None)
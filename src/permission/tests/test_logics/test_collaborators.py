@@ -216,3 +216,107 @@ class PermissionLogicsCollaboratorsPermissionLogicTestCase(TestCase):
         add_permission_logic(self.article.__class__, permission_logic)
         self.assertFalse(
                 permission_logic.has_perm(self.user2, self.perm3, self.article))
+
+    def test_has_perm_many(self):
+        permission_logic = CollaboratorsPermissionLogic(any_permission=False)
+        add_permission_logic(self.article.__class__, permission_logic)
+        article2 = create_article('test2')
+        article2.authors.add(self.user1)
+        article2.authors.add(self.user2)
+        article3 = create_article('test3')
+        article3.authors.add(self.user1)
+        articles = [self.article, article2, article3]
+        with self.assertNumQueries(1):
+            result = permission_logic.has_perm_many(
+                self.user2, self.perm2, articles)
+        self.assertEqual(result, {
+            self.article.pk: True,
+            article2.pk: True,
+            article3.pk: False,
+        })
+        with self.assertNumQueries(0):
+            result = permission_logic.has_perm_many(
+                self.user2, self.perm1, articles)
+        self.assertFalse(any(result.values()))
+
+    def test_has_perm_many_with_filtering_default_manager(self):
+        from ..utils import empty_default_manager
+        permission_logic = CollaboratorsPermissionLogic(any_permission=False)
+        add_permission_logic(self.article.__class__, permission_logic)
+        article2 = create_article('test2')
+        article2.authors.add(self.user1)
+        articles = [self.article, article2]
+        with empty_default_manager(self.article.__class__):
+            result = permission_logic.has_perm_many(
+                self.user2, self.perm2, articles)
+        self.assertEqual(result, {
+            self.article.pk: True,
+            article2.pk: False,
+        })
+
+    def test_non_relation_field_name_parity(self):
+        permission_logic = CollaboratorsPermissionLogic(
+            field_name='authors__username', any_permission=True)
+        add_permission_logic(self.article.__class__, permission_logic)
+        articles = [self.article, create_article('test2', user=self.user1)]
+        expected = dict(
+            (x.pk, permission_logic.has_perm(self.user2, self.perm2, x))
+            for x in articles)
+        self.assertEqual(permission_logic.has_perm_many(
+            self.user2, self.perm2, articles), expected)
+        q = permission_logic.get_queryset_filter(self.user2, self.perm2)
+        if q is not None:
+            queryset = self.article.__class__.objects.filter(
+                q, pk__in=expected)
+            self.assertEqual(
+                set(queryset.values_list('pk', flat=True)),
+                set(pk for pk, granted in expected.items() if granted))
+
+    def test_has_perm_with_obj_single_query(self):
+        permission_logic = CollaboratorsPermissionLogic()
+        add_permission_logic(self.article.__class__, permission_logic)
+        with self.assertNumQueries(1):
+            self.assertTrue(permission_logic.has_perm(
+                self.user2, self.perm2, self.article))
+        with self.assertNumQueries(1):
+            self.assertFalse(permission_logic.has_perm(
+                self.user1, self.perm2, self.article))
+
+    def test_has_perm_with_obj_prefetched(self):
+        permission_logic = CollaboratorsPermissionLogic()
+        add_permission_logic(self.article.__class__, permission_logic)
+        article = self.article.__class__.objects.prefetch_related(
+            'authors').get(pk=self.article.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(permission_logic.has_perm(
+                self.user2, self.perm2, article))
+            self.assertFalse(permission_logic.has_perm(
+                self.user1, self.perm2, article))
+
+    def test_has_perm_with_obj_multiple_hops(self):
+        from ..utils import create_bridge
+        permission_logic = CollaboratorsPermissionLogic(
+            field_name='multiple_bridge__editors')
+        add_permission_logic(self.article.__class__, permission_logic)
+        bridge = create_bridge(editors=[self.user1])
+        self.article.multiple_bridge.add(bridge)
+        with self.assertNumQueries(1):
+            self.assertTrue(permission_logic.has_perm(
+                self.user1, self.perm2, self.article))
+        self.assertFalse(permission_logic.has_perm(
+            self.user2, self.perm2, self.article))
+
+    def test_prepare_compile_field_path(self):
+        permission_logic = CollaboratorsPermissionLogic()
+        add_permission_logic(self.article.__class__, permission_logic)
+        field_path = permission_logic._field_path
+        self.assertEqual(field_path.field_path, 'authors')
+        self.assertTrue(field_path.model is self.article.__class__)
+        # the compiled path is reused
+        permission_logic.has_perm(self.user2, self.perm2, self.article)
+        self.assertTrue(permission_logic._field_path is field_path)
+        # field_name changed after the logic was registered
+        permission_logic.field_name = 'editors'
+        self.assertFalse(permission_logic.has_perm(
+            self.user2, self.perm2, self.article))
+        self.assertEqual(permission_logic._field_path.field_path, 'editors')
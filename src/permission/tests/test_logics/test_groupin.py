@@ -276,3 +276,30 @@ class PermissionLogicsAuthorPermissionLogicTestCase(TestCase):
         self.assertFalse(
                 permission_logic.has_perm(self.user3, self.perm3, self.article))
 
+    def test_has_perm_many(self):
+        permission_logic = GroupInPermissionLogic('admin')
+        add_permission_logic(self.article.__class__, permission_logic)
+        articles = [self.article, create_article('test2')]
+        with self.assertNumQueries(1):
+            result = permission_logic.has_perm_many(
+                self.user1, self.perm2, articles)
+        self.assertEqual(result, dict((x.pk, True) for x in articles))
+        result = permission_logic.has_perm_many(
+            self.user2, self.perm2, articles)
+        self.assertEqual(result, dict((x.pk, False) for x in articles))
+
+    def test_has_perm_group_names_shared(self):
+        permission_logic1 = GroupInPermissionLogic('admin')
+        permission_logic2 = GroupInPermissionLogic('staff')
+        add_permission_logic(self.article.__class__, permission_logic1)
+        add_permission_logic(self.article.__class__, permission_logic2)
+        with self.assertNumQueries(1):
+            self.assertTrue(permission_logic1.has_perm(self.user1, self.perm1))
+            self.assertFalse(permission_logic2.has_perm(self.user1, self.perm1))
+            self.assertTrue(permission_logic1.has_perm(
+                self.user1, self.perm2, self.article))
+            self.assertFalse(permission_logic2.has_perm(
+                self.user1, self.perm2, self.article))
+        # group names are reloaded when groups of the user are changed
+        self.user1.groups.add(self.group2)
+        self.assertTrue(permission_logic2.has_perm(self.user1, self.perm1))
@@ -189,3 +189,12 @@ class PermissionLogicsOneselfPermissionLogicTestCase(TestCase):
         add_permission_logic(self.user1.__class__, permission_logic)
         self.assertFalse(
                 permission_logic.has_perm(self.user1, self.perm3, self.user1))
+
+    def test_has_perm_many(self):
+        permission_logic = OneselfPermissionLogic()
+        add_permission_logic(self.user1.__class__, permission_logic)
+        users = [self.user1, self.user2]
+        with self.assertNumQueries(0):
+            result = permission_logic.has_perm_many(
+                self.user1, self.perm2, users)
+        self.assertEqual(result, {self.user1.pk: True, self.user2.pk: False})
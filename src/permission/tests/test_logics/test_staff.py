@@ -171,3 +171,25 @@ class PermissionLogicsStaffPermissionLogicTestCase(TestCase):
                 permission_logic.has_perm(self.user1, self.perm3, self.article))
         self.assertFalse(
                 permission_logic.has_perm(self.user2, self.perm3, self.article))
+
+    def test_has_perm_many(self):
+        permission_logic = StaffPermissionLogic()
+        add_permission_logic(self.article.__class__, permission_logic)
+        articles = [self.article, create_article('test2')]
+        with self.assertNumQueries(0):
+            result = permission_logic.has_perm_many(
+                self.user1, self.perm2, articles)
+        self.assertEqual(result, dict((x.pk, True) for x in articles))
+        result = permission_logic.has_perm_many(
+            self.user2, self.perm2, articles)
+        self.assertEqual(result, dict((x.pk, False) for x in articles))
+
+    def test_has_perm_with_flag_changed_after_registration(self):
+        permission_logic = StaffPermissionLogic(any_permission=False,
+                                                change_permission=True)
+        add_permission_logic(self.article.__class__, permission_logic)
+        self.assertTrue(
+            permission_logic.has_perm(self.user1, self.perm2, self.article))
+        permission_logic.change_permission = False
+        self.assertFalse(
+            permission_logic.has_perm(self.user1, self.perm2, self.article))
@@ -0,0 +1,207 @@
+# coding=utf-8
+import os
+import shutil
+import tempfile
+from django.http import Http404
+from django.test import TestCase, override_settings
+from django.test import RequestFactory
+from ..backends import PermissionBackend
+from ..logics import AuthorPermissionLogic
+from ..logics import CollaboratorsPermissionLogic
+from ..metrics import MetricsRegistry
+from ..metrics import get_metrics
+from ..metrics import render_metrics
+from ..metrics import write_metrics
+from ..utils.handlers import registry
+from ..utils.logics import add_permission_logic
+from ..views import metrics as metrics_view
+from .compat import MagicMock
+from .models import Article
+from .utils import create_user, create_article
+
+
+class MetricsRegistryTestCase(TestCase):
+    def test_counter(self):
+        r = MetricsRegistry()
+        counter = r.counter('checks_total', 'Checks', ('perm',))
+        counter.inc(('a.b',))
+        counter.inc(('a.b',), 2)
+        self.assertEqual(counter.get(('a.b',)), 3)
+        self.assertEqual(counter.get(('a.c',)), 0)
+        # get or create
+        self.assertTrue(r.counter('checks_total', 'Checks') is counter)
+        self.assertRaises(ValueError, r.histogram, 'checks_total', 'Checks')
+        self.assertEqual(r.render(), (
+            '# HELP checks_total Checks\n'
+            '# TYPE checks_total counter\n'
+            'checks_total{perm="a.b"} 3\n'
+        ))
+        r.clear()
+        self.assertEqual(counter.get(('a.b',)), 0)
+
+    def test_histogram(self):
+        r = MetricsRegistry()
+        histogram = r.histogram('duration_seconds', 'Duration', ('perm',),
+                                buckets=(0.1, 1.0))
+        histogram.observe(('a.b',), 0.05)
+        histogram.observe(('a.b',), 0.5)
+        histogram.observe(('a.b',), 5.0)
+        self.assertEqual(histogram.get(('a.b',)), ([1, 1, 1], 5.55, 3))
+        self.assertEqual(r.render(), (
+            '# HELP duration_seconds Duration\n'
+            '# TYPE duration_seconds histogram\n'
+            'duration_seconds_bucket{perm="a.b",le="0.1"} 1\n'
+            'duration_seconds_bucket{perm="a.b",le="1.0"} 2\n'
+            'duration_seconds_bucket{perm="a.b",le="+Inf"} 3\n'
+            'duration_seconds_sum{perm="a.b"} 5.55\n'
+            'duration_seconds_count{perm="a.b"} 3\n'
+        ))
+
+    def test_escape(self):
+        r = MetricsRegistry()
+        counter = r.counter('escaped_total', 'Back\\slash\nnewline',
+                            ('label',))
+        counter.inc(('"quoted"\\\n',))
+        self.assertEqual(r.render(), (
+            '# HELP escaped_total Back\\\\slash\\nnewline\n'
+            '# TYPE escaped_total counter\n'
+            'escaped_total{label="\\"quoted\\"\\\\\\n"} 1\n'
+        ))
+
+
+@override_settings(
+    PERMISSION_CHECK_PERMISSION_PRESENCE=False,
+    PERMISSION_METRICS_ENABLE=True,
+)
+class PermissionMetricsTestCase(TestCase):
+    def setUp(self):
+        self.registry_backup = registry._registry
+        self.attrs_backup = {}
+        registry._registry = {}
+        for name in ('_permission_logics', '_permission_handler'):
+            if hasattr(Article, name):
+                self.attrs_backup[name] = getattr(Article, name)
+                delattr(Article, name)
+        add_permission_logic(Article, AuthorPermissionLogic(
+            any_permission=False, change_permission=True))
+        add_permission_logic(Article, CollaboratorsPermissionLogic(
+            field_name='editors', any_permission=False,
+            change_permission=True))
+        self.user = create_user('john')
+        self.article = create_article('test')
+        self.perm = 'permission.change_article'
+        self.backend = PermissionBackend()
+        # load supported permissions
+        Article._permission_handler.get_supported_permissions()
+        self.metrics = get_metrics()
+        self.metrics.registry.clear()
+
+    def tearDown(self):
+        self.metrics.registry.clear()
+        registry._registry = self.registry_backup
+        delattr(Article, '_permission_logics')
+        delattr(Article, '_permission_handler')
+        for name, value in self.attrs_backup.items():
+            setattr(Article, name, value)
+
+    def test_disabled(self):
+        with override_settings(PERMISSION_METRICS_ENABLE=False):
+            self.assertEqual(get_metrics(), None)
+            self.assertEqual(render_metrics(), '')
+            self.backend.has_perm(self.user, self.perm, self.article)
+        self.assertEqual(self.metrics.checks.get((self.perm, 'denied')), 0)
+
+    def test_has_perm(self):
+        self.assertFalse(self.backend.has_perm(self.user, self.perm,
+                                               self.article))
+        self.assertFalse(self.backend.has_perm(self.user, self.perm,
+                                               self.article))
+        self.assertTrue(self.backend.has_perm(self.article.author, self.perm,
+                                              self.article))
+        m = self.metrics
+        self.assertEqual(m.checks.get((self.perm, 'denied')), 2)
+        self.assertEqual(m.checks.get((self.perm, 'granted')), 1)
+        self.assertEqual(m.check_duration.get((self.perm,))[2], 3)
+        self.assertEqual(m.handler_checks.get(('permission.Article',)), 3)
+        self.assertEqual(m.handler_evaluations.get(
+            ('permission.Article', 'denied')), 1)
+        self.assertEqual(m.handler_evaluations.get(
+            ('permission.Article', 'granted')), 1)
+        self.assertEqual(m.handler_duration.get(('permission.Article',))[2],
+                         2)
+        # the compiled decision function evaluates permission logics at once
+        self.assertEqual(m.logic_evaluations.get(
+            ('AuthorPermissionLogic', 'denied')), 0)
+        # the second check of john use the cache
+        self.assertEqual(m.cache_requests.get(('user', 'hit')), 1)
+        self.assertEqual(m.cache_requests.get(('user', 'miss')), 2)
+        self.assertAlmostEqual(m.get_cache_hit_ratio('user'), 1 / 3.0)
+        self.assertEqual(m.get_cache_hit_ratio('shared'), 0.0)
+
+    def test_has_perm_use_decision_function(self):
+        handler = Article._permission_handler
+        mock = MagicMock(side_effect=handler.get_decision_function)
+        handler.get_decision_function = mock
+        try:
+            self.assertFalse(self.backend.has_perm(self.user, self.perm,
+                                                   self.article))
+        finally:
+            del handler.get_decision_function
+        mock.assert_called_with(self.perm)
+
+    @override_settings(PERMISSION_ADAPTIVE_LOGIC_ORDERING=True)
+    def test_has_perm_adaptive(self):
+        handler = Article._permission_handler
+        self.assertFalse(self.backend.has_perm(self.user, self.perm,
+                                               self.article))
+        self.assertTrue(self.backend.has_perm(self.article.author, self.perm,
+                                              self.article))
+        m = self.metrics
+        self.assertEqual(m.logic_evaluations.get(
+            ('AuthorPermissionLogic', 'denied')), 1)
+        self.assertEqual(m.logic_evaluations.get(
+            ('AuthorPermissionLogic', 'granted')), 1)
+        self.assertEqual(m.logic_evaluations.get(
+            ('CollaboratorsPermissionLogic', 'denied')), 1)
+        self.assertEqual(m.handler_evaluations.get(
+            ('permission.Article', 'granted')), 1)
+        # statistics of the adaptive ordering are collected as well
+        self.assertEqual(sum(x[0] for x in handler._logic_stats.values()), 3)
+
+    def test_has_module_perms(self):
+        result = self.backend.has_module_perms(self.user, 'permission')
+        self.assertEqual(self.metrics.module_checks.get(
+            ('permission', 'granted' if result else 'denied')), 1)
+
+    def test_render_metrics(self):
+        self.backend.has_perm(self.user, self.perm, self.article)
+        text = render_metrics()
+        self.assertIn('# TYPE permission_checks_total counter\n', text)
+        self.assertIn(
+            'permission_checks_total{perm="permission.change_article",'
+            'result="denied"} 1\n', text)
+        self.assertIn(
+            'permission_check_duration_seconds_count'
+            '{perm="permission.change_article"} 1\n', text)
+
+    def test_write_metrics(self):
+        self.backend.has_perm(self.user, self.perm, self.article)
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'permission.prom')
+            write_metrics(path)
+            with open(path) as fp:
+                self.assertEqual(fp.read(), render_metrics())
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_view(self):
+        self.backend.has_perm(self.user, self.perm, self.article)
+        request = RequestFactory().get('/metrics')
+        response = metrics_view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith(
+            'text/plain; version=0.0.4'))
+        self.assertIn(b'permission_checks_total', response.content)
+        with override_settings(PERMISSION_METRICS_ENABLE=False):
+            self.assertRaises(Http404, metrics_view, request)
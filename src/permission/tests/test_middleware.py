@@ -0,0 +1,77 @@
+# coding=utf-8
+import pickle
+from django.test import TestCase, override_settings
+from ..middleware import PermissionCacheMiddleware
+from ..backends import PermissionBackend
+from ..handlers import get_logical_perms_cache
+from ..logics.groupin import get_user_group_names
+from ..utils.cache import RequestCache
+from ..utils.cache import get_request_cache
+from ..utils.handlers import registry
+from .compat import MagicMock
+from .utils import create_user, create_group, create_article
+
+
+@override_settings(
+    PERMISSION_CHECK_PERMISSION_PRESENCE=False,
+)
+class PermissionCacheMiddlewareTestCase(TestCase):
+    def setUp(self):
+        self.user = create_user('john')
+        self.group = create_group('admin', self.user)
+        self.article = create_article('test')
+        self.perm = 'permission.change_article'
+        self.request = MagicMock(spec=[])
+        self.response = MagicMock()
+        self.middleware = PermissionCacheMiddleware(lambda request: None)
+        self.original_get_handlers = registry.get_handlers
+        registry.clear_index()
+
+    def tearDown(self):
+        registry.get_handlers = self.original_get_handlers
+        registry.clear_index()
+
+    def test_process_request_response(self):
+        self.assertEqual(get_request_cache(), None)
+        self.middleware.process_request(self.request)
+        self.assertTrue(isinstance(get_request_cache(), RequestCache))
+        response = self.middleware.process_response(self.request,
+                                                    self.response)
+        self.assertTrue(response is self.response)
+        self.assertEqual(get_request_cache(), None)
+
+    def test_process_response_without_request(self):
+        # e.g. a previous middleware returned a response
+        self.middleware.process_response(self.request, self.response)
+        self.assertEqual(get_request_cache(), None)
+
+    def test_backend_decisions(self):
+        handler = MagicMock(
+            get_supported_permissions=MagicMock(return_value=[self.perm]),
+            has_perm=MagicMock(return_value=True))
+        registry.get_handlers = MagicMock(return_value=[handler])
+        backend = PermissionBackend()
+
+        self.middleware.process_request(self.request)
+        self.assertTrue(backend.has_perm(self.user, self.perm, self.article))
+        self.assertTrue(backend.has_perm(self.user, self.perm, self.article))
+        self.assertEqual(handler.has_perm.call_count, 1)
+        self.middleware.process_response(self.request, self.response)
+
+        # the cache is dropped with the response
+        self.assertTrue(backend.has_perm(self.user, self.perm, self.article))
+        self.assertEqual(handler.has_perm.call_count, 2)
+
+    def test_user_instance_is_not_touched(self):
+        self.middleware.process_request(self.request)
+        get_logical_perms_cache(self.user)['key'] = True
+        with self.assertNumQueries(1):
+            get_user_group_names(self.user)
+            get_user_group_names(self.user)
+        self.assertFalse('_logical_perms_cache' in self.user.__dict__)
+        self.assertFalse('_permission_group_names_cache' in self.user.__dict__)
+        pickled = pickle.loads(pickle.dumps(self.user))
+        self.middleware.process_response(self.request, self.response)
+
+        self.assertFalse('_logical_perms_cache' in pickled.__dict__)
+        self.assertFalse('key' in get_logical_perms_cache(self.user))
@@ -0,0 +1,146 @@
+# coding=utf-8
+from django.test import TestCase
+from .. import filter_queryset
+from ..logics import PermissionLogic
+from ..logics import AuthorPermissionLogic
+from ..logics import CollaboratorsPermissionLogic
+from ..logics import StaffPermissionLogic
+from ..querysets import PermissionQuerySet
+from ..utils.handlers import registry
+from ..utils.logics import add_permission_logic
+from .models import Article
+from .utils import create_user, create_anonymous, create_article
+
+
+class OddPermissionLogic(PermissionLogic):
+    def has_perm(self, user_obj, perm, obj=None):
+        return obj is not None and obj.pk % 2 == 1
+
+
+class PermissionQuerysetsTestCase(TestCase):
+    def setUp(self):
+        # clear registry
+        self.registry_backup = registry._registry
+        registry._registry = {}
+        # clear attributes
+        if hasattr(Article, '_permission_logics'):
+            delattr(Article, '_permission_logics')
+        if hasattr(Article, '_permission_handler'):
+            delattr(Article, '_permission_handler')
+        self.user1 = create_user('john')
+        self.user2 = create_user('tony')
+        self.staff = create_user('peter', is_staff=True)
+        self.superuser = create_user('admin', is_superuser=True)
+        self.anonymous = create_anonymous()
+        self.perm1 = 'permission.add_article'
+        self.perm2 = 'permission.change_article'
+        self.perm3 = 'permission.delete_article'
+        self.article1 = create_article('test1', user=self.user1)
+        self.article2 = create_article('test2', user=self.user2)
+        self.article3 = create_article('test3', user=self.user2)
+        self.article1.authors.add(self.user2)
+        self.article2.authors.add(self.user1, self.user2)
+
+    def tearDown(self):
+        registry._registry = self.registry_backup
+        delattr(Article, '_permission_logics')
+        delattr(Article, '_permission_handler')
+
+    def assertPks(self, queryset, objs):
+        self.assertEqual(sorted(x.pk for x in queryset),
+                         sorted(x.pk for x in objs))
+
+    def test_filter_queryset_author(self):
+        add_permission_logic(Article, AuthorPermissionLogic(
+            any_permission=False, delete_permission=False))
+        qs = Article.objects.all()
+        self.assertPks(filter_queryset(self.user2, self.perm2, qs),
+                       [self.article2, self.article3])
+        self.assertPks(filter_queryset(self.user2, self.perm3, qs), [])
+        self.assertPks(filter_queryset(self.anonymous, self.perm2, qs), [])
+
+    def test_filter_queryset_collaborators(self):
+        add_permission_logic(Article, CollaboratorsPermissionLogic(
+            field_name='authors', any_permission=False))
+        qs = Article.objects.all()
+        # load supported permissions of the handler
+        registry.get_handlers_for_perm(self.perm2)
+        with self.assertNumQueries(1):
+            self.assertPks(filter_queryset(self.user2, self.perm2, qs),
+                           [self.article1, self.article2])
+
+    def test_filter_queryset_or(self):
+        add_permission_logic(Article, AuthorPermissionLogic(
+            any_permission=False))
+        add_permission_logic(Article, CollaboratorsPermissionLogic(
+            field_name='authors', any_permission=False))
+        qs = Article.objects.all()
+        self.assertPks(filter_queryset(self.user1, self.perm2, qs),
+                       [self.article1, self.article2])
+        self.assertPks(filter_queryset(self.user2, self.perm2, qs),
+                       [self.article1, self.article2, self.article3])
+
+    def test_filter_queryset_staff(self):
+        add_permission_logic(Article, StaffPermissionLogic(
+            any_permission=False))
+        add_permission_logic(Article, AuthorPermissionLogic(
+            any_permission=False))
+        qs = Article.objects.all()
+        self.assertPks(filter_queryset(self.staff, self.perm2, qs),
+                       [self.article1, self.article2, self.article3])
+        self.assertPks(filter_queryset(self.user1, self.perm2, qs),
+                       [self.article1])
+
+    def test_filter_queryset_custom_logic(self):
+        add_permission_logic(Article, OddPermissionLogic())
+        qs = Article.objects.all()
+        expected = [x for x in (self.article1, self.article2, self.article3)
+                    if x.pk % 2 == 1]
+        self.assertPks(filter_queryset(self.user1, self.perm2, qs), expected)
+
+    def test_filter_queryset_sliced(self):
+        add_permission_logic(Article, OddPermissionLogic())
+        add_permission_logic(Article, AuthorPermissionLogic(
+            any_permission=False))
+        qs = Article.objects.order_by('pk')[:2]
+        expected = [x for x in (self.article1, self.article2)
+                    if x.pk % 2 == 1 or x.author == self.user2]
+        self.assertPks(filter_queryset(self.user2, self.perm2, qs), expected)
+
+    def test_filter_queryset_sliced_evaluated_objects(self):
+        evaluated = []
+        logic = OddPermissionLogic()
+        logic.has_perm = lambda user_obj, perm, obj=None: (
+            evaluated.append(obj) or False)
+        add_permission_logic(Article, logic)
+        qs = Article.objects.order_by('pk')[:2]
+        self.assertPks(filter_queryset(self.user1, self.perm2, qs), [])
+        # objects out of the slice are not evaluated
+        self.assertPks(evaluated, [self.article1, self.article2])
+
+    def test_filter_queryset_sliced_handler(self):
+        from ..handlers import PermissionHandler
+        add_permission_logic(Article, OddPermissionLogic())
+        handler = PermissionHandler(Article)
+        handler.has_perm = lambda user_obj, perm, obj=None: obj.pk % 2 == 1
+        qs = Article.objects.order_by('pk')[1:]
+        expected = [x for x in (self.article2, self.article3)
+                    if x.pk % 2 == 1]
+        self.assertPks(handler.filter_queryset(self.user1, self.perm2, qs),
+                       expected)
+
+    def test_filter_queryset_superuser(self):
+        add_permission_logic(Article, AuthorPermissionLogic())
+        self.assertPks(filter_queryset(self.superuser, self.perm2, Article),
+                       [self.article1, self.article2, self.article3])
+
+    def test_filter_queryset_unknown_perm(self):
+        add_permission_logic(Article, AuthorPermissionLogic())
+        self.assertPks(filter_queryset(self.user1, 'permission.unknown',
+                                       Article), [])
+
+    def test_permission_queryset(self):
+        add_permission_logic(Article, AuthorPermissionLogic())
+        qs = PermissionQuerySet(model=Article)
+        self.assertPks(qs.filter_by_perm(self.user1, self.perm2),
+                       [self.article1])
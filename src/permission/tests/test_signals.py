@@ -0,0 +1,139 @@
+# coding=utf-8
+from django.test import TestCase, override_settings
+from ..handlers import LogicalPermissionHandler
+from ..logics import AuthorPermissionLogic
+from ..logics import CollaboratorsPermissionLogic
+from ..logics import GroupInPermissionLogic
+from ..utils.handlers import registry
+from ..utils.logics import add_permission_logic
+from .models import Article
+from .utils import create_user, create_group, create_article, create_bridge
+
+
+@override_settings(
+    PERMISSION_CHECK_PERMISSION_PRESENCE=False,
+)
+class PermissionSignalsTestCase(TestCase):
+    def setUp(self):
+        self.registry_backup = registry._registry
+        registry._registry = {}
+        if hasattr(Article, '_permission_logics'):
+            delattr(Article, '_permission_logics')
+        if hasattr(Article, '_permission_handler'):
+            delattr(Article, '_permission_handler')
+        self.user = create_user('john')
+        self.article = create_article('test')
+        self.perm = 'permission.change_article'
+
+    def tearDown(self):
+        registry._registry = self.registry_backup
+        if hasattr(Article, '_permission_logics'):
+            delattr(Article, '_permission_logics')
+        if hasattr(Article, '_permission_handler'):
+            delattr(Article, '_permission_handler')
+
+    def add_collaborators_logic(self, field_name):
+        add_permission_logic(Article, CollaboratorsPermissionLogic(
+            field_name=field_name, any_permission=True))
+        return LogicalPermissionHandler(Article)
+
+    def test_add_permission_logic(self):
+        handler = LogicalPermissionHandler(Article)
+        self.assertFalse(handler.has_perm(self.user, self.perm, self.article))
+        add_permission_logic(Article, GroupInPermissionLogic(
+            'admin', any_permission=True))
+        create_group('admin', self.user)
+        handler = LogicalPermissionHandler(Article)
+        self.assertTrue(handler.has_perm(self.user, self.perm, self.article))
+
+    def test_object_saved(self):
+        handler = self.add_collaborators_logic('editors')
+        self.assertFalse(handler.has_perm(self.user, self.perm, self.article))
+        # the decision is cached in the user instance
+        with self.assertNumQueries(0):
+            handler.has_perm(self.user, self.perm, self.article)
+        self.article.save()
+        with self.assertNumQueries(1):
+            handler.has_perm(self.user, self.perm, self.article)
+
+    def test_collaborators_added(self):
+        handler = self.add_collaborators_logic('editors')
+        self.assertFalse(handler.has_perm(self.user, self.perm, self.article))
+        self.article.editors.add(self.user)
+        self.assertTrue(handler.has_perm(self.user, self.perm, self.article))
+        self.article.editors.remove(self.user)
+        self.assertFalse(handler.has_perm(self.user, self.perm, self.article))
+
+    def test_collaborators_added_reverse(self):
+        handler = self.add_collaborators_logic('editors')
+        self.assertFalse(handler.has_perm(self.user, self.perm, self.article))
+        self.user.permission_test_articles_editors.add(self.article)
+        self.assertTrue(handler.has_perm(self.user, self.perm, self.article))
+        self.user.permission_test_articles_editors.clear()
+        self.assertFalse(handler.has_perm(self.user, self.perm, self.article))
+
+    def test_collaborators_added_through_bridge(self):
+        handler = self.add_collaborators_logic('multiple_bridge__editors')
+        bridge = create_bridge()
+        self.article.multiple_bridge.add(bridge)
+        self.assertFalse(handler.has_perm(self.user, self.perm, self.article))
+        bridge.editors.add(self.user)
+        self.assertTrue(handler.has_perm(self.user, self.perm, self.article))
+
+    @override_settings(PERMISSION_SHARED_CACHE='default')
+    def test_author_changed_through_bridge(self):
+        from django.contrib.auth.models import User
+        from django.core.cache import caches
+        caches['default'].clear()
+        add_permission_logic(Article, AuthorPermissionLogic(
+            field_name='single_bridge__author', any_permission=True))
+        handler = LogicalPermissionHandler(Article)
+        bridge = create_bridge(self.user)
+        article = create_article('test2', bridge=bridge)
+        self.assertTrue(handler.has_perm(self.user, self.perm, article))
+        # the author of the intermediate object is changed
+        bridge.author = create_user('paul')
+        bridge.save()
+        self.assertFalse(handler.has_perm(self.user, self.perm, article))
+        # another user instance (e.g. next request) use the shared cache
+        user = User.objects.get(pk=self.user.pk)
+        self.assertFalse(handler.has_perm(user, self.perm, article))
+        bridge.author = self.user
+        bridge.save()
+        user = User.objects.get(pk=self.user.pk)
+        self.assertTrue(handler.has_perm(user, self.perm, article))
+
+    def test_groups_changed(self):
+        add_permission_logic(Article, GroupInPermissionLogic(
+            'admin', any_permission=True))
+        handler = LogicalPermissionHandler(Article)
+        group = create_group('admin')
+        self.assertFalse(handler.has_perm(self.user, self.perm, self.article))
+        self.user.groups.add(group)
+        self.assertTrue(handler.has_perm(self.user, self.perm, self.article))
+        group.user_set.remove(self.user)
+        self.assertFalse(handler.has_perm(self.user, self.perm, self.article))
+
+    def test_group_renamed(self):
+        add_permission_logic(Article, GroupInPermissionLogic(
+            'admin', any_permission=True))
+        handler = LogicalPermissionHandler(Article)
+        group = create_group('admin', self.user)
+        self.assertTrue(handler.has_perm(self.user, self.perm, self.article))
+        # saving the group without renaming keep the decision
+        group.save()
+        with self.assertNumQueries(0):
+            self.assertTrue(handler.has_perm(self.user, self.perm,
+                                             self.article))
+        group.name = 'editor'
+        group.save()
+        self.assertFalse(handler.has_perm(self.user, self.perm, self.article))
+
+    def test_group_deleted(self):
+        add_permission_logic(Article, GroupInPermissionLogic(
+            'admin', any_permission=True))
+        handler = LogicalPermissionHandler(Article)
+        group = create_group('admin', self.user)
+        self.assertTrue(handler.has_perm(self.user, self.perm, self.article))
+        group.delete()
+        self.assertFalse(handler.has_perm(self.user, self.perm, self.article))
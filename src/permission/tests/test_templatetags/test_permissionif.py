@@ -616,3 +616,117 @@ class PermissionTemplateTagsWithBuiltinTestCase(TestCase):
         ).render(context)
 
         self.assertEqual(out, "Success")
+
+
+@override_settings(
+    AUTHENTICATION_BACKENDS=(
+        'django.contrib.auth.backends.ModelBackend',
+        'permission.backends.PermissionBackend',
+    ),
+    PERMISSION_CHECK_PERMISSION_PRESENCE=False,
+    PERMISSION_REPLACE_BUILTIN_IF=False,
+)
+class PermissionPrefetchTemplateTagTestCase(TestCase):
+    TEMPLATE = (
+        "{% load permissionif %}"
+        "{% permission_prefetch user 'permission.change_article' "
+        "'permission.delete_article' for articles %}"
+        "{% for article in articles %}"
+        "{% permission user has 'permission.change_article' of article %}"
+        "C{% endpermission %}"
+        "{% permission user has 'permission.delete_article' of article %}"
+        "D{% endpermission %}"
+        "|{% endfor %}"
+    )
+
+    def setUp(self):
+        from ...logics import AuthorPermissionLogic
+        from ...logics import CollaboratorsPermissionLogic
+        from ...utils.logics import add_permission_logic
+        from ..models import Article
+        self.registry_backup = registry._registry
+        registry._registry = {}
+        if hasattr(Article, '_permission_logics'):
+            delattr(Article, '_permission_logics')
+        if hasattr(Article, '_permission_handler'):
+            delattr(Article, '_permission_handler')
+        replace_builtin_if(False)
+        add_permission_logic(Article, AuthorPermissionLogic(
+            any_permission=False, delete_permission=True))
+        add_permission_logic(Article, CollaboratorsPermissionLogic(
+            field_name='editors', any_permission=False,
+            delete_permission=False))
+        self.user = create_user('john')
+        self.superuser = create_user('admin', is_superuser=True)
+        self.articles = [
+            create_article('test1', user=self.user),
+            create_article('test2'),
+            create_article('test3'),
+        ]
+        self.articles[1].editors.add(self.user)
+        # load supported permissions
+        Article._permission_handler.get_supported_permissions()
+
+    def tearDown(self):
+        from ..models import Article
+        registry._registry = self.registry_backup
+        delattr(Article, '_permission_logics')
+        delattr(Article, '_permission_handler')
+
+    def render(self, user):
+        return Template(self.TEMPLATE).render(Context({
+            'user': user,
+            'articles': self.articles,
+        }))
+
+    def test_permission_prefetch(self):
+        self.assertEqual(self.render(self.user), "CD|C||")
+        # the number of queries does not depend on the number of objects
+        user = create_user('tony')
+        self.articles[2].editors.add(user)
+        with self.assertNumQueries(3):
+            self.assertEqual(self.render(user), "||C|")
+
+    def test_permission_prefetch_superuser(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.render(self.superuser), "CD|CD|CD|")
+
+    def test_permission_prefetch_without_objects(self):
+        user = create_user('tony')
+        out = Template(
+            "{% load permissionif %}"
+            "{% permission_prefetch user 'permission.change_article' %}"
+            "{% permission user has 'permission.change_article' %}"
+            "Success{% endpermission %}"
+        ).render(Context({'user': user}))
+        self.assertEqual(out, "Success")
+
+    def test_permission_prefetch_syntax_error(self):
+        from django.template import TemplateSyntaxError
+        self.assertRaises(TemplateSyntaxError, Template,
+                          "{% load permissionif %}"
+                          "{% permission_prefetch user for articles %}")
+
+    def test_permission_prefetch_with_request_cache(self):
+        from ...utils.cache import activate_request_cache
+        from ...utils.cache import deactivate_request_cache
+        token = activate_request_cache()
+        try:
+            Template(
+                "{% load permissionif %}"
+                "{% permission_prefetch user 'permission.change_article' "
+                "for articles %}"
+            ).render(Context({'user': self.user, 'articles': self.articles}))
+            # other templates (e.g. included ones) use the prefetched
+            # decisions through the request cache
+            with self.assertNumQueries(0):
+                out = Template(
+                    "{% load permissionif %}"
+                    "{% for article in articles %}"
+                    "{% permission user has 'permission.change_article' "
+                    "of article %}C{% endpermission %}|{% endfor %}"
+                ).render(Context({'user': self.user,
+                                  'articles': self.articles}))
+            self.assertEqual(out, "C|C||")
+        finally:
+            deactivate_request_cache(token)
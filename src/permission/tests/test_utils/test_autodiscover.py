@@ -0,0 +1,89 @@
+# coding=utf-8
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from ...utils.cache import get_decision_key
+from ...utils.cache import get_shared_decision_cache
+from ...utils.autodiscover import discover
+from ...utils.autodiscover import get_discovery_timings
+from ...utils.handlers import registry
+from ..models import Bridge
+from ..utils import create_user
+
+
+@override_settings(
+    PERMISSION_CHECK_PERMISSION_PRESENCE=False,
+)
+class PermissionUtilsAutodiscoverTestCase(TestCase):
+    def setUp(self):
+        self.registry_backup = registry._registry
+        self.deferred_backup = registry._deferred
+        self.attrs_backup = {}
+        registry._registry = {}
+        registry._deferred = {}
+        for name in ('_permission_logics', '_permission_handler'):
+            if hasattr(Bridge, name):
+                self.attrs_backup[name] = getattr(Bridge, name)
+                delattr(Bridge, name)
+        self.user = create_user('john')
+        self.bridge = Bridge.objects.create(author=self.user)
+
+    def tearDown(self):
+        registry._registry = self.registry_backup
+        registry._deferred = self.deferred_backup
+        for name in ('_permission_logics', '_permission_handler'):
+            if name in Bridge.__dict__:
+                delattr(Bridge, name)
+        for name, value in self.attrs_backup.items():
+            setattr(Bridge, name, value)
+
+    def test_discover(self):
+        discover('permission.tests', module_name='lazy_perms')
+        self.assertTrue(Bridge in registry._registry)
+        self.assertEqual(len(Bridge._permission_logics), 2)
+
+    def test_discover_lazy(self):
+        discover('permission.tests', module_name='lazy_perms', lazy=True)
+        self.assertFalse(Bridge in registry._registry)
+        self.assertFalse(hasattr(Bridge, '_permission_logics'))
+        self.assertEqual(len(registry._deferred['permission']), 2)
+        # the first check of the app label apply the permission logics
+        self.assertTrue(self.user.has_perm('permission.change_bridge',
+                                           self.bridge))
+        self.assertTrue(Bridge in registry._registry)
+        self.assertEqual(len(Bridge._permission_logics), 2)
+        self.assertEqual(registry._deferred, {})
+
+    def test_get_discovery_timings(self):
+        before = get_discovery_timings().get('permission.tests', {})
+        discover('permission.tests', module_name='lazy_perms', lazy=True)
+        timings = get_discovery_timings()['permission.tests']
+        self.assertEqual(timings['logics'], before.get('logics', 0))
+        self.assertTrue(timings['import'] >= before.get('import', 0.0))
+        registry.materialize('permission')
+        timings = get_discovery_timings()['permission.tests']
+        self.assertEqual(timings['logics'], before.get('logics', 0) + 2)
+        self.assertTrue(timings['register'] > before.get('register', 0.0))
+
+    @override_settings(PERMISSION_SHARED_CACHE='default')
+    def test_discover_lazy_object_saved(self):
+        caches['default'].clear()
+        shared = get_shared_decision_cache()
+        key = get_decision_key('permission.change_bridge', self.bridge)
+        discover('permission.tests', module_name='lazy_perms', lazy=True)
+        # a decision cached by another process
+        shared.set(self.user, Bridge, key, True)
+        self.assertTrue(shared.get(self.user, Bridge, key))
+        self.bridge.save()
+        self.assertEqual(shared.get(self.user, Bridge, key), None)
+
+    @override_settings(PERMISSION_SHARED_CACHE='default')
+    def test_discover_lazy_collaborators_added(self):
+        caches['default'].clear()
+        shared = get_shared_decision_cache()
+        key = get_decision_key('permission.change_bridge', self.bridge)
+        discover('permission.tests', module_name='lazy_perms', lazy=True)
+        # a decision cached by another process
+        shared.set(self.user, Bridge, key, False)
+        self.assertEqual(shared.get(self.user, Bridge, key), False)
+        self.bridge.editors.add(self.user)
+        self.assertEqual(shared.get(self.user, Bridge, key), None)
@@ -0,0 +1,212 @@
+# coding=utf-8
+from django.test import TestCase
+from ...utils.cache import LRUCache
+from ...utils.cache import SharedDecisionCache
+from ...utils.cache import get_decision_key
+from ...utils.cache import RequestCache
+from ...utils.cache import get_request_cache
+from ...utils.cache import activate_request_cache
+from ...utils.cache import deactivate_request_cache
+from ..compat import MagicMock
+from ..models import Article, Bridge
+from ..utils import create_user, create_article, create_bridge
+
+
+class PermissionUtilsLRUCacheTestCase(TestCase):
+    def test_get_set(self):
+        cache = LRUCache(maxsize=2)
+        self.assertEqual(cache.get('a'), None)
+        self.assertEqual(cache.get('a', False), False)
+        cache.set('a', True)
+        self.assertEqual(cache.get('a'), True)
+        self.assertTrue('a' in cache)
+        self.assertFalse('b' in cache)
+
+    def test_maxsize(self):
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        # 'a' become the most recently used
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_timeout(self):
+        from ...utils import cache as cache_module
+        original_time = cache_module.time
+        cache_module.time = MagicMock()
+        try:
+            cache_module.time.time.return_value = 100
+            cache = LRUCache(timeout=10)
+            cache.set('a', 1)
+            cache_module.time.time.return_value = 105
+            self.assertEqual(cache.get('a'), 1)
+            cache_module.time.time.return_value = 111
+            self.assertEqual(cache.get('a'), None)
+        finally:
+            cache_module.time = original_time
+
+    def test_delete_clear(self):
+        cache = LRUCache()
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.delete('a')
+        cache.delete('unknown')
+        self.assertEqual(cache.size, 1)
+        cache.clear()
+        self.assertEqual(cache.size, 0)
+
+    def test_stats(self):
+        cache = LRUCache(maxsize=10)
+        self.assertEqual(cache.hit_ratio, 0.0)
+        cache.set('a', 1)
+        cache.get('a')
+        cache.get('a')
+        cache.get('a')
+        cache.get('b')
+        stats = cache.stats()
+        self.assertEqual(stats['size'], 1)
+        self.assertEqual(stats['maxsize'], 10)
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_ratio'], 0.75)
+        cache.reset_stats()
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.misses, 0)
+
+
+class PermissionUtilsDecisionKeyTestCase(TestCase):
+    def test_get_decision_key_without_obj(self):
+        self.assertEqual(get_decision_key('permission.add_article'),
+                         ('permission.add_article', None, None))
+
+    def test_get_decision_key_with_obj(self):
+        article = create_article('test')
+        bridge = create_bridge()
+        bridge.pk = article.pk
+        key1 = get_decision_key('permission.change_article', article)
+        key2 = get_decision_key('permission.change_article', bridge)
+        self.assertEqual(key1,
+                         ('permission.change_article', Article, article.pk))
+        self.assertEqual(key2,
+                         ('permission.change_article', Bridge, article.pk))
+        self.assertNotEqual(key1, key2)
+
+    def test_get_decision_key_with_unsaved_obj(self):
+        self.assertEqual(
+            get_decision_key('permission.change_article', Article()), None)
+
+    def test_get_decision_key_with_non_model_obj(self):
+        self.assertEqual(get_decision_key('permission.change_article', 'a'),
+                         ('permission.change_article', str, hash('a')))
+
+
+class PermissionUtilsSharedDecisionCacheTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import caches
+        self.cache = SharedDecisionCache(caches['default'],
+                                         key_prefix='permission_test')
+        self.cache.cache.clear()
+        self.user = create_user('john')
+        self.article = create_article('test')
+        self.key = get_decision_key('permission.change_article',
+                                    self.article)
+
+    def test_get_set(self):
+        self.assertEqual(self.cache.get(self.user, Article, self.key), None)
+        self.cache.set(self.user, Article, self.key, False)
+        self.assertEqual(self.cache.get(self.user, Article, self.key), False)
+
+    def test_bump_user(self):
+        other = create_user('tony')
+        self.cache.set(self.user, Article, self.key, True)
+        self.cache.set(other, Article, self.key, True)
+        self.cache.bump_user(self.user.pk)
+        self.assertEqual(self.cache.get(self.user, Article, self.key), None)
+        self.assertEqual(self.cache.get(other, Article, self.key), True)
+
+    def test_bump_model(self):
+        key = get_decision_key('permission.change_bridge', create_bridge())
+        self.cache.set(self.user, Article, self.key, True)
+        self.cache.set(self.user, Bridge, key, True)
+        self.cache.bump_model(Article)
+        self.assertEqual(self.cache.get(self.user, Article, self.key), None)
+        self.assertEqual(self.cache.get(self.user, Bridge, key), True)
+
+    def test_bump_object(self):
+        article2 = create_article('test2')
+        key = get_decision_key('permission.change_article', article2)
+        self.cache.set(self.user, Article, self.key, True)
+        self.cache.set(self.user, Article, key, True)
+        self.cache.bump_object(Article, self.article.pk)
+        self.assertEqual(self.cache.get(self.user, Article, self.key), None)
+        self.assertEqual(self.cache.get(self.user, Article, key), True)
+
+    def test_evicted_generation(self):
+        self.cache.set(self.user, Article, self.key, True)
+        self.cache.cache.delete(
+            self.cache._get_model_generation_key(Article))
+        self.assertEqual(self.cache.get(self.user, Article, self.key), None)
+
+    def test_is_cacheable(self):
+        from ..utils import create_anonymous
+        self.assertTrue(self.cache.is_cacheable(self.user, self.key))
+        self.assertFalse(self.cache.is_cacheable(create_anonymous(),
+                                                 self.key))
+        self.assertFalse(self.cache.is_cacheable(
+            self.user, get_decision_key('permission.change_article', 'a')))
+
+
+class PermissionUtilsRequestCacheTestCase(TestCase):
+    def setUp(self):
+        self.user1 = create_user('john')
+        self.user2 = create_user('tony')
+
+    def test_get_set_delete(self):
+        cache = RequestCache(maxsize=10)
+        self.assertEqual(cache.get(self.user1, 'ns', 'key'), None)
+        cache.set(self.user1, 'ns', 'key', True)
+        self.assertEqual(cache.get(self.user1, 'ns', 'key'), True)
+        # users and namespaces do not share entries
+        self.assertEqual(cache.get(self.user2, 'ns', 'key'), None)
+        self.assertEqual(cache.get(self.user1, 'other', 'key'), None)
+        cache.delete(self.user1, 'ns', 'key')
+        self.assertEqual(cache.get(self.user1, 'ns', 'key'), None)
+
+    def test_maxsize(self):
+        cache = RequestCache(maxsize=2)
+        for key in range(3):
+            cache.set(self.user1, 'ns', key, True)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get(self.user1, 'ns', 0), None)
+
+    def test_namespace(self):
+        cache = RequestCache()
+        namespace = cache.get_namespace(self.user1, 'ns')
+        self.assertFalse('key' in namespace)
+        self.assertRaises(KeyError, lambda: namespace['key'])
+        namespace['key'] = False
+        self.assertTrue('key' in namespace)
+        self.assertEqual(namespace['key'], False)
+        self.assertEqual(cache.get(self.user1, 'ns', 'key'), False)
+        del namespace['key']
+        self.assertEqual(namespace.get('key', 'default'), 'default')
+        # the user instance is not touched
+        self.assertEqual(self.user1.__dict__.get('_logical_perms_cache'),
+                         None)
+
+    def test_activate_deactivate(self):
+        self.assertEqual(get_request_cache(), None)
+        token = activate_request_cache()
+        cache = get_request_cache()
+        self.assertTrue(isinstance(cache, RequestCache))
+        inner_cache = RequestCache()
+        inner = activate_request_cache(inner_cache)
+        self.assertTrue(get_request_cache() is inner_cache)
+        deactivate_request_cache(inner)
+        self.assertTrue(get_request_cache() is cache)
+        deactivate_request_cache(token)
+        self.assertEqual(get_request_cache(), None)
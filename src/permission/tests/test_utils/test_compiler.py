@@ -0,0 +1,87 @@
+# coding=utf-8
+from django.test import TestCase
+from ...logics import PermissionLogic
+from ...logics import AuthorPermissionLogic
+from ...logics import CollaboratorsPermissionLogic
+from ...logics import GroupInPermissionLogic
+from ...logics import OneselfPermissionLogic
+from ...logics import StaffPermissionLogic
+from ...utils.compiler import compile_rule
+from ...utils.compiler import compile_decision_function
+from ..utils import create_user, create_anonymous, create_group
+from ..utils import create_article
+from ..models import Article
+from ..compat import MagicMock
+
+
+def _prepare(permission_logic):
+    permission_logic.model = Article
+    permission_logic.prepare()
+    return permission_logic
+
+
+class PermissionUtilsCompilerTestCase(TestCase):
+    def setUp(self):
+        self.author = create_user('author')
+        self.editor = create_user('editor')
+        self.staff = create_user('staff', is_staff=True)
+        self.member = create_user('member')
+        create_group('admin', self.member)
+        self.inactive = create_user('inactive', is_staff=True,
+                                    is_active=False)
+        self.anonymous = create_anonymous()
+        self.article = create_article('test', user=self.author)
+        self.article.editors.add(self.editor)
+        self.perms = (
+            'permission.add_article',
+            'permission.change_article',
+            'permission.delete_article',
+            'permission.unknown_article',
+        )
+
+    def test_compile_rule(self):
+        class CustomAuthorPermissionLogic(AuthorPermissionLogic):
+            pass
+        self.assertEqual(compile_rule(
+            _prepare(CustomAuthorPermissionLogic())), None)
+        self.assertEqual(compile_rule(
+            MagicMock(spec=PermissionLogic)), None)
+        self.assertNotEqual(compile_rule(
+            _prepare(AuthorPermissionLogic())), None)
+
+    def test_compile_decision_function(self):
+        permission_logics = [
+            _prepare(StaffPermissionLogic(any_permission=False,
+                                          delete_permission=False)),
+            _prepare(AuthorPermissionLogic(any_permission=False,
+                                           delete_permission=True)),
+            _prepare(CollaboratorsPermissionLogic(field_name='editors')),
+            _prepare(GroupInPermissionLogic('admin', any_permission=True)),
+            _prepare(OneselfPermissionLogic()),
+        ]
+        users = (self.author, self.editor, self.staff, self.member,
+                 self.inactive, self.anonymous)
+        for perm in self.perms:
+            decide = compile_decision_function(permission_logics, perm)
+            for user in users:
+                for obj in (None, self.article):
+                    expected = any(x.has_perm(user, perm, obj)
+                                   for x in permission_logics)
+                    self.assertEqual(decide(user, obj), expected,
+                                     (perm, user, obj))
+
+    def test_compile_decision_function_with_custom_logic(self):
+        custom_logic = MagicMock(spec=PermissionLogic)
+        custom_logic.has_perm = MagicMock(return_value=True)
+        permission_logics = [
+            _prepare(StaffPermissionLogic()),
+            custom_logic,
+        ]
+        perm = 'permission.change_article'
+        decide = compile_decision_function(permission_logics, perm)
+        self.assertTrue(decide(self.anonymous, self.article))
+        custom_logic.has_perm.assert_called_with(self.anonymous, perm,
+                                                 self.article)
+        custom_logic.has_perm.reset_mock()
+        self.assertTrue(decide(self.staff, self.article))
+        self.assertFalse(custom_logic.has_perm.called)
@@ -1,6 +1,8 @@
 # coding=utf-8
 from django.test import TestCase
 from ...utils.field_lookup import field_lookup
+from ...utils.field_lookup import compile_field_path
+from ...utils.field_lookup import FOREIGN_KEY, MANY_TO_MANY, REVERSE, ATTRIBUTE
 from ..utils import create_user, create_bridge, create_article
 
 
@@ -97,3 +99,92 @@ class PermissionUtilsFieldLookupTestCase(TestCase):
         expected_value = [expected_value1, expected_value2]
         self.assertEqual(field_value, expected_value)
 
+
+class PermissionUtilsCompileFieldPathTestCase(TestCase):
+    def setUp(self):
+        self.author = create_user('permission_test_articles_author')
+        self.editor1 = create_user(
+            'permission_test_articles_editor1')
+        self.editor2 = create_user(
+            'permission_test_articles_editor2')
+        self.bridge1 = create_bridge()
+        self.bridge2 = create_bridge(editors=(self.editor1,))
+        self.bridge3 = create_bridge(editors=(self.editor1, self.editor2))
+        self.model = create_article('permission_test_article',
+                                    self.author, self.bridge1)
+        self.model.editors.add(self.editor1)
+        self.model.editors.add(self.editor2)
+        self.model.multiple_bridge.add(self.bridge2)
+        self.model.multiple_bridge.add(self.bridge3)
+
+    def test_compile_hops(self):
+        Article = self.model.__class__
+        path = compile_field_path(Article, 'single_bridge__author__username')
+        self.assertEqual(path.hops, (('single_bridge', FOREIGN_KEY),
+                                     ('author', FOREIGN_KEY),
+                                     ('username', ATTRIBUTE)))
+        self.assertTrue(path.is_lookup)
+        self.assertFalse(path.is_relation)
+        self.assertFalse(path.is_multiple)
+        path = compile_field_path(Article, 'multiple_bridge__editors')
+        self.assertEqual(path.hops, (('multiple_bridge', MANY_TO_MANY),
+                                     ('editors', MANY_TO_MANY)))
+        self.assertTrue(path.is_relation)
+        self.assertTrue(path.is_multiple)
+        self.assertFalse(path.is_foreign_key_chain)
+
+    def test_compile_reverse(self):
+        path = compile_field_path(self.author.__class__,
+                                  'permission_test_articles_author')
+        self.assertEqual(path.hops, (
+            ('permission_test_articles_author', REVERSE),
+        ))
+        self.assertEqual(list(path.iterate(self.author)), [self.model])
+
+    def test_compile_foreign_key_chain(self):
+        Article = self.model.__class__
+        path = compile_field_path(Article, 'author')
+        self.assertTrue(path.is_foreign_key_chain)
+        self.assertEqual(path.attname, 'author_id')
+        self.assertEqual(path.related_model, self.author.__class__)
+        path = compile_field_path(Article, 'single_bridge__author')
+        self.assertTrue(path.is_foreign_key_chain)
+        self.assertEqual(path.attname, None)
+
+    def test_compile_unknown(self):
+        path = compile_field_path(self.model.__class__, 'author__unknown')
+        self.assertFalse(path.is_lookup)
+        self.assertEqual(path.hops, (('author', FOREIGN_KEY),
+                                     ('unknown', ATTRIBUTE)))
+        self.assertEqual(path.lookup(self.model), None)
+        self.assertEqual(list(path.iterate(self.model)), [])
+
+    def test_lookup(self):
+        Article = self.model.__class__
+        path = compile_field_path(Article, 'single_bridge__author__username')
+        self.assertEqual(path.lookup(self.model),
+                         field_lookup(self.model,
+                                      'single_bridge__author__username'))
+        path = compile_field_path(Article,
+                                  'multiple_bridge__editors__username')
+        self.assertEqual(
+            list(map(list, path.lookup(self.model))),
+            list(map(list, field_lookup(
+                self.model, 'multiple_bridge__editors__username'))))
+
+    def test_iterate(self):
+        path = compile_field_path(self.model.__class__,
+                                  'multiple_bridge__editors__username')
+        self.assertEqual(list(path.iterate(self.model)), [
+            self.editor1.username,
+            self.editor1.username,
+            self.editor2.username,
+        ])
+
+    def test_iterate_prefetched(self):
+        path = compile_field_path(self.model.__class__, 'editors')
+        model = self.model.__class__.objects.prefetch_related(
+            'editors').get(pk=self.model.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(set(path.iterate(model)),
+                             set([self.editor1, self.editor2]))
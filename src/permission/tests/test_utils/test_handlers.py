@@ -1,3 +1,4 @@
+import threading
 from django.test import TestCase, override_settings
 from ...utils.handlers import PermissionHandlerRegistry
 from ...handlers import PermissionHandler
@@ -13,6 +14,7 @@ class PermissionUtilsHandlersTestCase(TestCase):
         self.model = MagicMock()
         self.model._meta = MagicMock()
         self.model._meta.abstract = False
+        self.model._meta.app_label = 'permission'
         self.handler = PermissionHandler
 
     def test_register(self):
@@ -74,3 +76,181 @@ class PermissionUtilsHandlersTestCase(TestCase):
         self.assertTrue(len(results) == 1)
         self.assertTrue(isinstance(results[0], PermissionHandler))
 
+    def test_get_handlers_for_perm(self):
+        self.assertEqual(
+            self.registry.get_handlers_for_perm('permission.add_article'), ())
+
+        self.registry.register(self.model, self.handler)
+        handler = self.registry._registry[self.model]
+        handler.includes = ['permission.add_article']
+        results = self.registry.get_handlers_for_perm('permission.add_article')
+        self.assertEqual(results, (handler,))
+        results = self.registry.get_handlers_for_perm('permission.add_bridge')
+        self.assertEqual(results, ())
+
+        self.registry.unregister(self.model)
+        results = self.registry.get_handlers_for_perm('permission.add_article')
+        self.assertEqual(results, ())
+
+    def test_get_handlers_for_app_label(self):
+        self.assertEqual(
+            self.registry.get_handlers_for_app_label('permission'), ())
+
+        self.registry.register(self.model, self.handler)
+        handler = self.registry._registry[self.model]
+        handler.includes = ['permission.add_article']
+        results = self.registry.get_handlers_for_app_label('permission')
+        self.assertEqual(results, (handler,))
+        results = self.registry.get_handlers_for_app_label('auth')
+        self.assertEqual(results, ())
+
+    def test_get_handlers_for_perm_rebuild_on_includes_change(self):
+        self.registry.register(self.model, self.handler)
+        handler = self.registry._registry[self.model]
+        handler.includes = ['permission.add_article']
+        self.registry.get_handlers_for_perm('permission.add_article')
+        handler.includes = ['permission.change_article']
+        self.assertEqual(
+            self.registry.get_handlers_for_perm('permission.add_article'), ())
+        self.assertEqual(
+            self.registry.get_handlers_for_perm('permission.change_article'),
+            (handler,))
+
+    def test_defer(self):
+        calls = []
+
+        def register():
+            calls.append('permission')
+            self.registry.register(self.model, self.handler)
+            self.registry._registry[self.model].includes = [
+                'permission.add_article']
+            return self.model
+
+        self.registry.defer('permission', register)
+        self.registry.defer('auth', lambda: calls.append('auth'))
+        self.assertEqual(calls, [])
+        self.assertEqual(self.registry.get_handlers_for_perm('auth.add_user'),
+                         ())
+        self.assertEqual(calls, ['auth'])
+        handlers = self.registry.get_handlers_for_app_label('permission')
+        self.assertEqual(handlers, (self.registry._registry[self.model],))
+        self.assertEqual(calls, ['auth', 'permission'])
+        # deferred registrations are run only once
+        self.registry.get_handlers_for_app_label('permission')
+        self.assertEqual(calls, ['auth', 'permission'])
+
+    def test_get_handlers_materialize(self):
+        self.registry.defer('permission', lambda: self.registry.register(
+            self.model, self.handler))
+        self.assertEqual(self.registry.get_handlers(materialize=False), ())
+        self.assertEqual(len(self.registry.get_handlers()), 1)
+
+    def test_materialize_while_building_index(self):
+        building = threading.Event()
+        release = threading.Event()
+        self.registry.register(self.model, self.handler)
+        handler = self.registry._registry[self.model]
+        handler.includes = ['permission.add_article']
+        original = handler.get_supported_permissions
+
+        def get_supported_permissions():
+            building.set()
+            release.wait(5)
+            return original()
+        handler.get_supported_permissions = get_supported_permissions
+
+        model = MagicMock()
+        model._meta = MagicMock()
+        model._meta.abstract = False
+        model._meta.app_label = 'auth'
+
+        def register():
+            self.registry.register(model, self.handler)
+            self.registry._registry[model].includes = ['auth.add_user']
+            return model
+        self.registry.defer('auth', register)
+
+        # a lookup starts to build the index before the materialization
+        results = []
+        thread = threading.Thread(target=lambda: results.append(
+            self.registry.get_handlers_for_perm('permission.add_article')))
+        thread.start()
+        self.assertTrue(building.wait(5))
+        self.registry.materialize('auth')
+        release.set()
+        thread.join(5)
+        self.assertEqual(results, [(handler,)])
+        # the index built before the materialization is not used
+        self.assertEqual(self.registry.get_handlers_for_perm('auth.add_user'),
+                         (self.registry._registry[model],))
+        self.assertEqual(self.registry.get_handlers_for_app_label('auth'),
+                         (self.registry._registry[model],))
+
+    def test_requires_sync(self):
+        self.registry.defer('auth', lambda: None)
+        self.assertTrue(self.registry.requires_sync('permission.add_article'))
+        self.registry.get_handlers_for_perm('permission.add_article')
+        self.assertFalse(
+            self.registry.requires_sync('permission.add_article'))
+        self.assertTrue(self.registry.requires_sync('auth.add_user'))
+
+
+class PermissionUtilsHandlersWarmTestCase(TestCase):
+    def setUp(self):
+        from ...utils.permissions import clear_perm_catalogue
+        from ..models import Article, Bridge
+        self.registry = PermissionHandlerRegistry()
+        self.handler_backup = {}
+        for model in (Article, Bridge):
+            if '_permission_handler' in model.__dict__:
+                self.handler_backup[model] = model._permission_handler
+        self.registry.register(Article, PermissionHandler)
+        self.registry.register(Bridge, PermissionHandler)
+        clear_perm_catalogue()
+
+    def tearDown(self):
+        from ...utils.permissions import clear_perm_catalogue
+        from ..models import Article, Bridge
+        for model in (Article, Bridge):
+            if model in self.handler_backup:
+                model._permission_handler = self.handler_backup[model]
+            else:
+                del model._permission_handler
+        clear_perm_catalogue()
+
+    def test_warm(self):
+        from ...utils.permissions import check_perm_presence
+        with self.assertNumQueries(1):
+            self.assertEqual(self.registry.warm(), 2)
+        with self.assertNumQueries(0):
+            handlers = self.registry.get_handlers_for_perm(
+                'permission.change_article')
+            self.assertEqual(len(handlers), 1)
+            self.assertEqual(handlers[0].get_supported_permissions(), set([
+                'permission.add_article',
+                'permission.change_article',
+                'permission.delete_article',
+            ]))
+            handlers = self.registry.get_handlers_for_perm(
+                'permission.change_bridge')
+            self.assertEqual(len(handlers), 1)
+            self.assertEqual(
+                self.registry.get_handlers_for_app_label('permission'),
+                tuple(self.registry.get_handlers()))
+            check_perm_presence('permission.change_bridge')
+
+    def test_warm_with_includes(self):
+        handler = self.registry.get_handlers()[0]
+        handler.includes = lambda handler: handler._get_app_perms()
+        with self.assertNumQueries(1):
+            self.registry.warm()
+        self.assertTrue('permission.change_bridge' in
+                        handler.get_supported_permissions())
+
+    @override_settings(PERMISSION_PERMS_FROM_META=True)
+    def test_warm_perms_from_meta(self):
+        with self.assertNumQueries(0):
+            self.registry.warm()
+            handlers = self.registry.get_handlers_for_perm(
+                'permission.change_article')
+            self.assertEqual(len(handlers), 1)
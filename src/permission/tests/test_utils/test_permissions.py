@@ -1,2 +1,103 @@
 # To run doctest
 import permission.utils.permissions
+from django.test import TestCase, override_settings
+from django.core.exceptions import ObjectDoesNotExist
+from ...utils.permissions import get_perm_catalogue
+from ...utils.permissions import clear_perm_catalogue
+from ...utils.permissions import check_perm_presence
+from ...utils.permissions import is_perm_presence_known
+from ...utils.permissions import get_app_perms
+from ...utils.permissions import get_model_perms
+from ...utils.permissions import get_app_meta_perms
+from ...utils.permissions import get_model_meta_perms
+from ..models import Article
+from ..utils import create_permission
+
+
+class PermissionUtilsPermCatalogueTestCase(TestCase):
+    def setUp(self):
+        clear_perm_catalogue()
+
+    def test_get_perm_catalogue(self):
+        with self.assertNumQueries(1):
+            catalogue = get_perm_catalogue()
+            self.assertTrue(isinstance(catalogue, frozenset))
+            self.assertTrue('permission.add_article' in catalogue)
+            self.assertTrue('auth.change_user' in catalogue)
+            self.assertTrue(get_perm_catalogue() is catalogue)
+
+    def test_get_perm_catalogue_refresh_on_permission_save(self):
+        get_perm_catalogue()
+        create_permission('publish_article')
+        self.assertTrue('permission.publish_article' in get_perm_catalogue())
+
+    def test_check_perm_presence(self):
+        get_perm_catalogue()
+        with self.assertNumQueries(0):
+            check_perm_presence('permission.add_article')
+            # wrong format is not a target of the check
+            check_perm_presence('add_article')
+        # a miss does not reload the whole catalogue
+        with self.assertNumQueries(1):
+            self.assertRaises(ObjectDoesNotExist,
+                              check_perm_presence,
+                              'permission.unknown_article')
+
+    def test_check_perm_presence_created_by_other_process(self):
+        from django.contrib.auth.models import Permission
+        from django.contrib.contenttypes.models import ContentType
+        get_perm_catalogue()
+        # bulk_create does not send post_save as another process
+        Permission.objects.bulk_create([Permission(
+            name='publish', codename='publish_article',
+            content_type=ContentType.objects.get_for_model(Article))])
+        with self.assertNumQueries(1):
+            check_perm_presence('permission.publish_article')
+        with self.assertNumQueries(0):
+            check_perm_presence('permission.publish_article')
+
+    def test_is_perm_presence_known(self):
+        self.assertFalse(is_perm_presence_known('permission.add_article'))
+        get_perm_catalogue()
+        self.assertTrue(is_perm_presence_known('permission.add_article'))
+        self.assertTrue(is_perm_presence_known('add_article'))
+        self.assertFalse(is_perm_presence_known('permission.unknown_article'))
+
+
+class PermissionUtilsMetaPermsTestCase(TestCase):
+    def test_get_model_meta_perms(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(get_model_meta_perms(Article), set([
+                'permission.add_article',
+                'permission.change_article',
+                'permission.delete_article',
+            ]))
+
+    def test_get_app_meta_perms(self):
+        with self.assertNumQueries(0):
+            perms = get_app_meta_perms('permission')
+            self.assertTrue('permission.change_article' in perms)
+            self.assertTrue('permission.change_bridge' in perms)
+            self.assertEqual(get_app_meta_perms('unknown'), set())
+
+    @override_settings(PERMISSION_PERMS_FROM_META=True)
+    def test_perms_from_meta(self):
+        create_permission('publish_article')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_model_perms(Article),
+                             get_model_meta_perms(Article))
+            self.assertEqual(get_app_perms('permission'),
+                             get_app_meta_perms('permission'))
+        self.assertFalse('permission.publish_article' in
+                         get_model_perms(Article))
+
+    @override_settings(PERMISSION_PERMS_FROM_META=True,
+                       PERMISSION_PERMS_FROM_META_MERGE_DATABASE=True)
+    def test_perms_from_meta_merge_database(self):
+        create_permission('publish_article')
+        with self.assertNumQueries(1):
+            perms = get_model_perms(Article)
+        self.assertTrue('permission.publish_article' in perms)
+        self.assertTrue(get_model_meta_perms(Article).issubset(perms))
+        self.assertTrue('permission.publish_article' in
+                        get_app_perms('permission'))
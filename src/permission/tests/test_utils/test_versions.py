@@ -0,0 +1,90 @@
+# coding=utf-8
+from django.test import TestCase
+from ...utils.versions import VersionCounters
+from ...utils.versions import VersionedCache
+from ...utils.versions import USER
+from ...utils.cache import get_decision_key
+from ..models import Article, Bridge
+from ..utils import create_user, create_article
+
+
+class PermissionUtilsVersionCountersTestCase(TestCase):
+    def setUp(self):
+        self.counters = VersionCounters()
+        self.user = create_user('john')
+
+    def test_bump(self):
+        self.assertEqual(self.counters.get((USER, self.user.pk)), 0)
+        self.counters.bump_user(self.user.pk)
+        version = self.counters.get((USER, self.user.pk))
+        self.assertNotEqual(version, 0)
+        self.counters.bump_user(self.user.pk)
+        self.assertNotEqual(self.counters.get((USER, self.user.pk)), version)
+
+    def test_get_stamp(self):
+        stamp = self.counters.get_stamp(self.user, Article, 1)
+        self.counters.bump_object(Article, 2)
+        self.counters.bump_object(Bridge, 1)
+        self.assertEqual(self.counters.get_stamp(self.user, Article, 1), stamp)
+        self.counters.bump_object(Article, 1)
+        self.assertNotEqual(self.counters.get_stamp(self.user, Article, 1),
+                            stamp)
+        stamp = self.counters.get_stamp(self.user, Article, 1)
+        self.counters.bump_model(Article)
+        self.assertNotEqual(self.counters.get_stamp(self.user, Article, 1),
+                            stamp)
+
+    def test_bump_model_bumps_decisions_without_model(self):
+        stamp = self.counters.get_stamp(self.user)
+        self.counters.bump_model(Bridge)
+        self.assertNotEqual(self.counters.get_stamp(self.user), stamp)
+
+    def test_maxsize(self):
+        counters = VersionCounters(maxsize=2)
+        stamp = counters.get_stamp(self.user, Article, 1)
+        for pk in range(2, 5):
+            counters.bump_object(Article, pk)
+        self.assertEqual(len(counters), 2)
+        # entries stamped before a counter was discarded never match
+        self.assertNotEqual(counters.get_stamp(self.user, Article, 1), stamp)
+
+
+class PermissionUtilsVersionedCacheTestCase(TestCase):
+    def setUp(self):
+        self.counters = VersionCounters()
+        self.user = create_user('john')
+        self.article = create_article('test')
+        self.key = get_decision_key('permission.change_article',
+                                    self.article)
+        self.store = {}
+        self.cache = VersionedCache(self.store, self.user, Article,
+                                    counters=self.counters)
+
+    def test_get_set(self):
+        self.assertFalse(self.key in self.cache)
+        self.assertRaises(KeyError, lambda: self.cache[self.key])
+        self.cache[self.key] = True
+        self.assertTrue(self.key in self.cache)
+        self.assertEqual(self.cache[self.key], True)
+
+    def test_stale_object(self):
+        self.cache[self.key] = True
+        self.counters.bump_object(Article, self.article.pk)
+        self.assertEqual(self.cache.get(self.key), None)
+
+    def test_stale_user(self):
+        key = get_decision_key('permission.add_article')
+        self.cache[key] = True
+        self.counters.bump_user(self.user.pk + 1)
+        self.assertEqual(self.cache.get(key), True)
+        self.counters.bump_user(self.user.pk)
+        self.assertEqual(self.cache.get(key), None)
+
+    def test_stale_model_without_object(self):
+        key = get_decision_key('permission.add_article')
+        self.cache[key] = True
+        self.counters.bump_model(Bridge)
+        self.counters.bump_object(Article, self.article.pk)
+        self.assertEqual(self.cache.get(key), True)
+        self.counters.bump_model(Article)
+        self.assertEqual(self.cache.get(key), None)
@@ -1,4 +1,5 @@
 # coding=utf-8
+from contextlib import contextmanager
 
 
 def create_user(username, **kwargs):
@@ -69,3 +70,37 @@ def create_permission(name, model=None):
     )
     permission.save()
     return permission
+
+
+@contextmanager
+def empty_default_manager(model):
+    """
+    Replace the default manager of the model with a manager which filters out
+    all objects in the context
+    """
+    from django.db import models
+
+    class EmptyManager(models.Manager):
+        def get_queryset(self):
+            return super(EmptyManager, self).get_queryset().none()
+
+    manager = EmptyManager()
+    manager.model = model
+    if '_default_manager' in model.__dict__:
+        # django < 1.10
+        backup = model.__dict__['_default_manager']
+        model._default_manager = manager
+        try:
+            yield manager
+        finally:
+            model._default_manager = backup
+    else:
+        backup = model._meta.__dict__.get('default_manager')
+        model._meta.__dict__['default_manager'] = manager
+        try:
+            yield manager
+        finally:
+            if backup is None:
+                del model._meta.__dict__['default_manager']
+            else:
+                model._meta.__dict__['default_manager'] = backup
@@ -1,20 +1,43 @@
 # coding=utf-8
 from __future__ import unicode_literals
+import functools
+import logging
+import threading
+import timeit
+from collections import OrderedDict
 from django.apps import apps
 from permission.compat import six
 
 
-def autodiscover(module_name=None):
+logger = logging.getLogger(__name__)
+
+_timings = OrderedDict()
+_timings_lock = threading.Lock()
+
+
+def autodiscover(module_name=None, lazy=None):
     """
     Autodiscover INSTALLED_APPS perms.py modules and fail silently when not
     present. This forces an import on them to register any permissions bits
     they may want.
+
+    Parameters
+    ----------
+    module_name : string or None
+        A name of the modules. ``PERMISSION_AUTODISCOVER_MODULE_NAME`` is used
+        if ``None``.
+    lazy : boolean or None
+        Defer registrations of permission logics until the first permission
+        check of the app label (see :func:`discover`).
+        ``PERMISSION_AUTODISCOVER_LAZY`` is used if ``None``.
     """
     from django.utils.module_loading import module_has_submodule
     from permission.compat import import_module
     from permission.conf import settings
 
     module_name = module_name or settings.PERMISSION_AUTODISCOVER_MODULE_NAME
+    if lazy is None:
+        lazy = settings.PERMISSION_AUTODISCOVER_LAZY
     app_names = (app.name for app in apps.app_configs.values())
 
     for app in app_names:
@@ -22,7 +45,7 @@ def autodiscover(module_name=None):
         # Attempt to import the app's perms module
         try:
             # discover the permission module
-            discover(app, module_name=module_name)
+            discover(app, module_name=module_name, lazy=lazy)
         except:
             # Decide whether to bubble up this error. If the app just doesn't
             # have an perms module, we can just ignore the error attempting
@@ -31,11 +54,16 @@ def autodiscover(module_name=None):
                 raise
 
 
-def discover(app, module_name=None):
+def discover(app, module_name=None, lazy=False):
     """
     Automatically apply the permission logics written in the specified
     module.
 
+    When ``lazy`` is ``True``, the declarations are recorded to the handler
+    registry and models are resolved, handlers are instantiated, and
+    permission logics are added on the first lookup of handlers of the app
+    label of the model (e.g. the first ``has_perm`` call).
+
     Examples
     --------
     Assume if you have a ``perms.py`` in ``your_app`` as::
@@ -51,22 +79,74 @@ def discover(app, module_name=None):
         >>> discover('your_app')
     """
     from permission.compat import import_module
-    from permission.compat import get_model
     from permission.conf import settings
-    from permission.utils.logics import add_permission_logic
+    from permission.utils.handlers import registry
 
     variable_name = settings.PERMISSION_AUTODISCOVER_VARIABLE_NAME
     module_name = module_name or settings.PERMISSION_AUTODISCOVER_MODULE_NAME
 
     # import the module
+    start = timeit.default_timer()
     m = import_module('%s.%s' % (app, module_name))
+    _record_timing(app, 'import', timeit.default_timer() - start)
 
     # check if the module have PERMISSION_LOGICS variable
     if hasattr(m, variable_name):
         # apply permission logics automatically
         permission_logic_set = getattr(m, variable_name)
         for model, permission_logic in permission_logic_set:
-            if isinstance(model, six.string_types):
-                # convert model string to model instance
-                model = get_model(*model.split('.', 1))
-            add_permission_logic(model, permission_logic)
+            if lazy:
+                if isinstance(model, six.string_types):
+                    app_label = model.split('.', 1)[0]
+                else:
+                    app_label = model._meta.app_label
+                registry.defer(app_label, functools.partial(
+                    _apply_permission_logic, app, model, permission_logic))
+            else:
+                _apply_permission_logic(app, model, permission_logic)
+
+
+def get_discovery_timings():
+    """
+    Get timings of discovery per app
+
+    Returns
+    -------
+    OrderedDict
+        A dictionary of app name and a dictionary which have ``import``
+        (seconds to import the perms module), ``register`` (seconds to apply
+        the permission logics) and ``logics`` (a number of applied permission
+        logics). Permission logics deferred by the lazy mode are counted when
+        they are applied.
+
+    Examples
+    --------
+    >>> timings = get_discovery_timings()
+    >>> sorted(timings.items(), key=lambda x: -x[1]['import'])[0]
+    ('blog', {'import': 0.12, 'register': 0.001, 'logics': 3})
+    """
+    with _timings_lock:
+        return OrderedDict((k, dict(v)) for k, v in _timings.items())
+
+
+def _apply_permission_logic(app, model, permission_logic):
+    from permission.compat import get_model
+    from permission.utils.logics import add_permission_logic
+    start = timeit.default_timer()
+    if isinstance(model, six.string_types):
+        # convert model string to model instance
+        model = get_model(*model.split('.', 1))
+    add_permission_logic(model, permission_logic)
+    _record_timing(app, 'register', timeit.default_timer() - start, 1)
+    return model
+
+
+def _record_timing(app, phase, seconds, logics=0):
+    with _timings_lock:
+        timing = _timings.setdefault(app, {
+            'import': 0.0, 'register': 0.0, 'logics': 0,
+        })
+        timing[phase] += seconds
+        timing['logics'] += logics
+    logger.debug('Permission discovery of %s: %s took %.6f seconds',
+                 app, phase, seconds)
@@ -0,0 +1,477 @@
+# coding=utf-8
+"""
+Cache utilities of permission
+"""
+from __future__ import unicode_literals
+import time
+import threading
+from collections import OrderedDict
+try:
+    from contextvars import ContextVar
+except ImportError:
+    # Python 3.6 or earlier
+    ContextVar = None
+
+
+__all__ = ('LRUCache', 'get_module_perms_cache',
+           'get_decision_key', 'SharedDecisionCache',
+           'get_shared_decision_cache', 'RequestCache',
+           'get_request_cache', 'activate_request_cache',
+           'deactivate_request_cache')
+
+
+class LRUCache(object):
+    """
+    A thread-safe, bounded cache which discards the least recently used entry
+
+    Entries can expire after ``timeout`` seconds. The number of hits and
+    misses are counted to find the best ``maxsize`` of the cache.
+    """
+    def __init__(self, maxsize=1024, timeout=None):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        maxsize : integer
+            A maximum number of entries. ``None`` or ``0`` for unbound.
+        timeout : number or None
+            Seconds until an entry expires. ``None`` for never expire.
+        """
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        marker = object()
+        return self.get(key, marker, count=False) is not marker
+
+    @property
+    def size(self):
+        """A number of entries in this cache"""
+        return len(self._data)
+
+    @property
+    def hit_ratio(self):
+        """A ratio of hits in all lookups (0.0 when nothing was looked up)"""
+        total = self.hits + self.misses
+        return float(self.hits) / total if total else 0.0
+
+    def get(self, key, default=None, count=True):
+        """
+        Get a value of the key or ``default`` when it is not found or expired
+        """
+        with self._lock:
+            try:
+                value, expires = self._data.pop(key)
+            except KeyError:
+                if count:
+                    self.misses += 1
+                return default
+            if expires is not None and expires < time.time():
+                if count:
+                    self.misses += 1
+                return default
+            # re-insert to mark the entry as the most recently used
+            self._data[key] = (value, expires)
+            if count:
+                self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Set a value of the key and discard the least recently used entries
+        """
+        expires = None
+        if self.timeout is not None:
+            expires = time.time() + self.timeout
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, expires)
+            if self.maxsize:
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Delete a value of the key if exists"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Delete all entries. Statistics are kept."""
+        with self._lock:
+            self._data.clear()
+
+    def reset_stats(self):
+        """Reset the number of hits and misses"""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Get statistics of this cache
+
+        Returns
+        -------
+        dict
+            A dictionary which has ``size``, ``maxsize``, ``timeout``,
+            ``hits``, ``misses``, and ``hit_ratio``
+        """
+        return {
+            'size': self.size,
+            'maxsize': self.maxsize,
+            'timeout': self.timeout,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hit_ratio,
+        }
+
+
+_module_perms_cache = None
+
+
+def get_module_perms_cache():
+    """
+    Get a process-wide cache of ``PermissionHandler.has_module_perms``
+
+    The cache is configured with ``PERMISSION_MODULE_PERMS_CACHE_SIZE`` and
+    ``PERMISSION_MODULE_PERMS_CACHE_TIMEOUT`` in settings.
+    """
+    global _module_perms_cache
+    if _module_perms_cache is None:
+        from permission.conf import settings
+        _module_perms_cache = LRUCache(
+            maxsize=settings.PERMISSION_MODULE_PERMS_CACHE_SIZE,
+            timeout=settings.PERMISSION_MODULE_PERMS_CACHE_TIMEOUT,
+        )
+    return _module_perms_cache
+
+
+def get_decision_key(perm, obj=None):
+    """
+    Get a cache key of a permission decision
+
+    The key is a tuple of (perm, concrete model, pk) so objects of different
+    models which share a pk never collide. Non model objects fall back to
+    (perm, class, hash).
+
+    Returns
+    -------
+    tuple or None
+        A cache key or ``None`` when the decision cannot be cached (e.g. an
+        unsaved model instance)
+    """
+    if obj is None:
+        return (perm, None, None)
+    meta = getattr(obj, '_meta', None)
+    if meta is None:
+        return (perm, obj.__class__, hash(obj))
+    pk = obj.pk
+    if pk is None:
+        return None
+    return (perm, meta.concrete_model, pk)
+
+
+class SharedDecisionCache(object):
+    """
+    A permission decision cache on the django cache framework
+
+    Decisions survive across requests and workers. Each entry is stamped with
+    generation counters of the user, the model and the object; bumping a
+    counter makes all entries of the user, the model or the object stale
+    without scanning keys.
+    """
+    def __init__(self, cache, timeout=None, key_prefix='permission'):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        cache : django cache instance
+            A cache backend which store decisions and generation counters
+        timeout : number or None
+            Seconds until a decision expires. ``None`` for never expire.
+        key_prefix : string
+            A prefix of cache keys
+        """
+        self.cache = cache
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+
+    def _get_model_label(self, model):
+        meta = model._meta.concrete_model._meta
+        return '%s.%s' % (meta.app_label, meta.object_name.lower())
+
+    def _get_user_generation_key(self, user_pk):
+        return '%s:gen:user:%s' % (self.key_prefix, user_pk)
+
+    def _get_model_generation_key(self, model):
+        return '%s:gen:model:%s' % (self.key_prefix,
+                                    self._get_model_label(model))
+
+    def _get_object_generation_key(self, model, pk):
+        return '%s:gen:object:%s:%s' % (self.key_prefix,
+                                        self._get_model_label(model), pk)
+
+    def _get_generations(self, *keys):
+        generations = self.cache.get_many(keys)
+        for key in keys:
+            if key not in generations:
+                # a missing (or evicted) counter must not match old entries
+                self.cache.add(key, _initial_generation(), None)
+                generations[key] = self.cache.get(key, 0)
+        return [generations[key] for key in keys]
+
+    def _bump(self, key):
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.add(key, _initial_generation(), None)
+
+    def _get_key(self, user_obj, model, cachekey):
+        perm, obj_model, pk = cachekey
+        # decisions without object are stamped with the handler's model
+        model = obj_model or model
+        keys = [
+            self._get_user_generation_key(user_obj.pk),
+            self._get_model_generation_key(model),
+        ]
+        if pk is not None:
+            keys.append(self._get_object_generation_key(model, pk))
+        generations = self._get_generations(*keys)
+        return '%s:decision:%s:%s:%s:%s:%s:%s:%s' % (
+            self.key_prefix, user_obj.pk, generations[0],
+            self._get_model_label(model), generations[1], perm, pk,
+            generations[2] if pk is not None else '-',
+        )
+
+    def is_cacheable(self, user_obj, cachekey):
+        """
+        Return ``True`` if the decision can be stored in the shared cache
+
+        Decisions of anonymous users and non model objects are not shared.
+        """
+        if getattr(user_obj, 'pk', None) is None:
+            return False
+        obj_model = cachekey[1]
+        return obj_model is None or hasattr(obj_model, '_meta')
+
+    def get(self, user_obj, model, cachekey):
+        """
+        Get a cached decision or ``None`` if it is not cached
+
+        Parameters
+        ----------
+        user_obj : django user model instance
+            A django user model instance which be checked
+        model : django model class
+            A model class of the handler. It is used when the decision is not
+            for an object.
+        cachekey : tuple
+            A key returned from :func:`get_decision_key`
+        """
+        return self.cache.get(self._get_key(user_obj, model, cachekey))
+
+    def set(self, user_obj, model, cachekey, value):
+        """
+        Store a decision
+        """
+        self.cache.set(self._get_key(user_obj, model, cachekey), value,
+                       self.timeout)
+
+    def bump_user(self, user_pk):
+        """Make all cached decisions of the user stale"""
+        self._bump(self._get_user_generation_key(user_pk))
+
+    def bump_model(self, model):
+        """Make all cached decisions of the model stale"""
+        self._bump(self._get_model_generation_key(model))
+
+    def bump_object(self, model, pk):
+        """Make all cached decisions of the object stale"""
+        self._bump(self._get_object_generation_key(model, pk))
+
+
+def _initial_generation():
+    # microseconds since epoch; newer than any counter of previous entries
+    return int(time.time() * 1000000)
+
+
+_shared_decision_caches = {}
+
+
+def get_shared_decision_cache():
+    """
+    Get a shared decision cache specified by ``PERMISSION_SHARED_CACHE``
+
+    Returns
+    -------
+    SharedDecisionCache or None
+        ``None`` if ``PERMISSION_SHARED_CACHE`` is not specified in settings
+    """
+    from permission.conf import settings
+    alias = settings.PERMISSION_SHARED_CACHE
+    if not alias:
+        return None
+    timeout = settings.PERMISSION_SHARED_CACHE_TIMEOUT
+    key_prefix = settings.PERMISSION_SHARED_CACHE_KEY_PREFIX
+    cachekey = (alias, timeout, key_prefix)
+    if cachekey not in _shared_decision_caches:
+        from django.core.cache import caches
+        _shared_decision_caches[cachekey] = SharedDecisionCache(
+            caches[alias], timeout=timeout, key_prefix=key_prefix,
+        )
+    return _shared_decision_caches[cachekey]
+
+
+class RequestCache(object):
+    """
+    A bounded cache of permission checks which lives during a request
+
+    Entries are namespaced (e.g. ``'logical_perms'``, ``'group_names'``) and
+    scoped to users (by pk) thus nothing is stored in user instances.
+    See :class:`permission.middleware.PermissionCacheMiddleware`.
+    """
+    def __init__(self, maxsize=4096):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        maxsize : integer
+            A maximum number of entries. ``None`` or ``0`` for unbound.
+        """
+        self._entries = LRUCache(maxsize=maxsize)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get_key(self, user_obj, namespace, key):
+        return (namespace, getattr(user_obj, 'pk', None), key)
+
+    def get(self, user_obj, namespace, key, default=None):
+        """Get a value of the key of the user in the namespace"""
+        return self._entries.get(self._get_key(user_obj, namespace, key),
+                                 default)
+
+    def set(self, user_obj, namespace, key, value):
+        """Set a value of the key of the user in the namespace"""
+        self._entries.set(self._get_key(user_obj, namespace, key), value)
+
+    def delete(self, user_obj, namespace, key):
+        """Delete a value of the key of the user in the namespace"""
+        self._entries.delete(self._get_key(user_obj, namespace, key))
+
+    def clear(self):
+        """Delete all entries"""
+        self._entries.clear()
+
+    def stats(self):
+        """Get statistics of this cache (see :meth:`LRUCache.stats`)"""
+        return self._entries.stats()
+
+    def get_namespace(self, user_obj, namespace):
+        """
+        Get a dictionary-like view of the namespace of the user
+        """
+        return RequestCacheNamespace(self, user_obj, namespace)
+
+
+class RequestCacheNamespace(object):
+    """
+    A dictionary-like view of a namespace of a user in :class:`RequestCache`
+    """
+    _marker = object()
+
+    def __init__(self, cache, user_obj, namespace):
+        self.cache = cache
+        self.user_obj = user_obj
+        self.namespace = namespace
+
+    def __contains__(self, key):
+        return self.get(key, self._marker) is not self._marker
+
+    def __getitem__(self, key):
+        value = self.get(key, self._marker)
+        if value is self._marker:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.cache.set(self.user_obj, self.namespace, key, value)
+
+    def __delitem__(self, key):
+        self.cache.delete(self.user_obj, self.namespace, key)
+
+    def get(self, key, default=None):
+        return self.cache.get(self.user_obj, self.namespace, key, default)
+
+
+if ContextVar is not None:
+    _request_cache = ContextVar('permission_request_cache', default=None)
+
+    def get_request_cache():
+        """
+        Get the cache of the current request or ``None`` when no request
+        cache is activated
+        """
+        return _request_cache.get()
+
+    def activate_request_cache(cache=None):
+        """
+        Activate a request cache in the current context
+
+        Returns
+        -------
+        object
+            A token to pass to :func:`deactivate_request_cache`
+        """
+        return _request_cache.set(
+            cache if cache is not None else _create_request_cache())
+
+    def deactivate_request_cache(token):
+        """
+        Deactivate the request cache activated with the token
+        """
+        _request_cache.reset(token)
+else:
+    _local = threading.local()
+
+    def get_request_cache():
+        """
+        Get the cache of the current request or ``None`` when no request
+        cache is activated
+        """
+        return getattr(_local, 'cache', None)
+
+    def activate_request_cache(cache=None):
+        """
+        Activate a request cache in the current thread
+
+        Returns
+        -------
+        object
+            A token to pass to :func:`deactivate_request_cache`
+        """
+        token = get_request_cache()
+        _local.cache = (
+            cache if cache is not None else _create_request_cache())
+        return token
+
+    def deactivate_request_cache(token):
+        """
+        Deactivate the request cache activated with the token
+        """
+        _local.cache = token
+
+
+def _create_request_cache():
+    from permission.conf import settings
+    return RequestCache(maxsize=settings.PERMISSION_REQUEST_CACHE_SIZE)
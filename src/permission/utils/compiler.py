@@ -0,0 +1,132 @@
+# coding=utf-8
+"""
+Rule compiler of permission logics
+
+Built-in permission logics are compiled into a rule, a pair of tests which
+decide the permission once the permission table of the logic grants it:
+
+``user_test(user_obj)``
+    A test for checks without object. ``None`` if the permission is granted
+    to any authenticated user.
+``object_test(user_obj, obj)``
+    A test for checks with object. It is called only for active users.
+
+The rules of logics registered to a model are combined into a single
+decision function per permission. The decision function checks
+authentication and activity of the user once and calls the tests directly
+instead of ``has_perm`` of each permission logic. Permission logics which
+cannot be compiled (custom logics and sub classes of the built-in logics) are
+called via ``has_perm`` in the decision function.
+"""
+from __future__ import unicode_literals
+from permission.compat import is_authenticated
+
+
+__all__ = ('compile_rule', 'compile_decision_function')
+
+
+def _is_staff(user_obj, obj=None):
+    return user_obj.is_staff
+
+
+def _is_oneself(user_obj, obj):
+    return obj == user_obj
+
+
+def _get_compilers():
+    from permission.logics import AuthorPermissionLogic
+    from permission.logics import CollaboratorsPermissionLogic
+    from permission.logics import GroupInPermissionLogic
+    from permission.logics import OneselfPermissionLogic
+    from permission.logics import StaffPermissionLogic
+    return {
+        AuthorPermissionLogic: lambda x: (None, x._is_author),
+        CollaboratorsPermissionLogic: lambda x: (None, x._is_collaborator),
+        GroupInPermissionLogic: lambda x: (x._in_groups, x._in_groups),
+        OneselfPermissionLogic: lambda x: (None, _is_oneself),
+        StaffPermissionLogic: lambda x: (_is_staff, _is_staff),
+    }
+
+
+_compilers = None
+
+
+def compile_rule(permission_logic):
+    """
+    Compile the permission logic into a rule
+
+    Only instances of the built-in permission logics are compiled. Instances
+    of sub classes are not compiled because they may change the rule.
+
+    Parameters
+    ----------
+    permission_logic : permission logic instance
+        A permission logic instance registered to a model
+
+    Returns
+    -------
+    tuple or None
+        A pair of ``user_test`` and ``object_test`` or ``None`` if the
+        permission logic cannot be compiled.
+    """
+    global _compilers
+    if _compilers is None:
+        _compilers = _get_compilers()
+    compiler = _compilers.get(type(permission_logic))
+    if compiler is None:
+        return None
+    return compiler(permission_logic)
+
+
+def compile_decision_function(permission_logics, perm):
+    """
+    Compile permission logics into a decision function of the permission
+
+    Parameters
+    ----------
+    permission_logics : iterable
+        Permission logic instances in the evaluation order
+    perm : string
+        `app_label.codename` formatted permission string
+
+    Returns
+    -------
+    function
+        A function which takes ``user_obj`` and ``obj`` (optional) and return
+        ``True`` if one of the permission logics grant the permission.
+    """
+    steps = []
+    for permission_logic in permission_logics:
+        rule = compile_rule(permission_logic)
+        if rule is None:
+            # opaque permission logic
+            steps.append((None, None, permission_logic.has_perm))
+        elif permission_logic.get_permission_action(perm) is not None:
+            steps.append((rule[0], rule[1], None))
+    steps = tuple(steps)
+    # the built-in permission logics never grant anonymous users
+    anonymous_steps = tuple(x for x in steps if x[2] is not None)
+
+    def decide(user_obj, obj=None):
+        if not is_authenticated(user_obj):
+            for _, _, has_perm in anonymous_steps:
+                if has_perm(user_obj, perm, obj):
+                    return True
+            return False
+        if obj is None:
+            for user_test, _, has_perm in steps:
+                if has_perm is not None:
+                    if has_perm(user_obj, perm, None):
+                        return True
+                elif user_test is None or user_test(user_obj):
+                    return True
+            return False
+        is_active = user_obj.is_active
+        for _, object_test, has_perm in steps:
+            if has_perm is not None:
+                if has_perm(user_obj, perm, obj):
+                    return True
+            elif is_active and object_test(user_obj, obj):
+                return True
+        return False
+    return decide
@@ -1,6 +1,7 @@
 """A module to lookup field of object."""
 from __future__ import unicode_literals
 from collections import Iterable
+from permission.compat import six
 
 
 def field_lookup(obj, field_path):
@@ -38,3 +39,210 @@ def field_lookup(obj, field_path):
     if len(field_path) == 1:
         return getattr(obj, field_path[0], None)
     return field_lookup(field_lookup(obj, field_path[0]), field_path[1])
+
+
+def resolve_field_path(model, field_path):
+    """
+    Resolve '__' separated field path of the model into django model fields.
+
+    Args:
+        model (class): Django Model class
+        field_path (str): '__' separated field path
+
+    Returns:
+        list or None: A list of fields (or relation objects for reverse
+        relations) in the path. ``None`` if the path cannot be used as a
+        django query lookup (e.g. it contains a property).
+
+    Example:
+        >>> [f.name for f in resolve_field_path(Article, 'author__username')]
+        ['author', 'username']
+        >>> resolve_field_path(Article, 'unknown') is None
+        True
+    """
+    from django.core.exceptions import FieldDoesNotExist
+    fields = []
+    for name in field_path.split('__'):
+        if model is None:
+            # the previous field is not a relation
+            return None
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        fields.append(field)
+        model = field.related_model if field.is_relation else None
+    return fields
+
+
+FOREIGN_KEY = 'fk'
+"""A hop of a forward foreign key or one to one relation"""
+MANY_TO_MANY = 'm2m'
+"""A hop of a forward many to many relation"""
+REVERSE = 'reverse'
+"""A hop of a reverse relation (reverse foreign key or many to many)"""
+REVERSE_ONE_TO_ONE = 'reverse_o2o'
+"""A hop of a reverse one to one relation"""
+ATTRIBUTE = 'attr'
+"""A hop of a non relational field or an attribute (e.g. property)"""
+
+MULTIPLE_HOPS = (MANY_TO_MANY, REVERSE)
+
+
+class FieldPath(object):
+    """
+    A '__' separated field path compiled for a django model.
+
+    The path is split and each hop is classified (foreign key, many to many,
+    reverse relation, or attribute) once, so lookups do not parse strings or
+    inspect types of values.
+
+    Example:
+        >>> path = FieldPath(Article, 'multiple_bridge__editors')
+        >>> [kind for name, kind in path.hops]
+        ['m2m', 'm2m']
+        >>> editors = list(path.iterate(article))
+    """
+    def __init__(self, model, field_path):
+        """
+        Constructor
+
+        Args:
+            model (class): Django Model class
+            field_path (str): '__' separated field path
+        """
+        self.model = model
+        self.field_path = field_path
+        self.fields = resolve_field_path(model, field_path)
+        names = field_path.split('__')
+        if self.fields is None:
+            # the path is not a query lookup; classify hops up to the
+            # unknown one and treat the rest as attributes
+            hops = []
+            current = model
+            for name in names:
+                field = _get_field(current, name)
+                if field is None:
+                    break
+                hops.append(_get_hop(field))
+                current = field.related_model if field.is_relation else None
+            hops.extend((name, ATTRIBUTE) for name in names[len(hops):])
+        else:
+            hops = [_get_hop(field) for field in self.fields]
+        self.hops = tuple(hops)
+        kinds = [kind for _, kind in self.hops]
+        self.is_lookup = self.fields is not None
+        """Whether the path can be used as a django query lookup"""
+        self.is_relation = self.is_lookup and self.fields[-1].is_relation
+        """Whether the path ends with a relation"""
+        self.is_multiple = any(kind in MULTIPLE_HOPS for kind in kinds)
+        """Whether the path contains multi-valued hops"""
+        self.is_foreign_key_chain = self.is_lookup and all(
+            kind == FOREIGN_KEY and _is_pk_relation(field)
+            for kind, field in zip(kinds, self.fields))
+        """Whether the path is a chain of foreign keys to primary keys"""
+        self.attname = None
+        """An attribute name of the foreign key id of single hop path"""
+        if self.is_foreign_key_chain and len(self.fields) == 1:
+            self.attname = self.fields[0].attname
+        self.related_model = None
+        """A model which the path finally refer"""
+        if self.is_relation:
+            self.related_model = self.fields[-1].related_model
+        self._last = len(self.hops) - 1
+
+    def __repr__(self):
+        return '<FieldPath: %s.%s>' % (self.model.__name__, self.field_path)
+
+    def lookup(self, obj):
+        """
+        Lookup the field of the model instance in the same way as
+        :func:`field_lookup`.
+
+        Multi-valued hops return generators like :func:`field_lookup`.
+        """
+        return self._lookup(obj, 0)
+
+    def _lookup(self, obj, index):
+        name, kind = self.hops[index]
+        value = getattr(obj, name, None)
+        if index == self._last:
+            return value
+        if kind in MULTIPLE_HOPS:
+            return (self._lookup(x, index + 1) for x in value.iterator())
+        elif kind == ATTRIBUTE:
+            rest = '__'.join(name for name, _ in self.hops[index + 1:])
+            return field_lookup(value, rest)
+        return self._lookup(value, index + 1)
+
+    def iterate(self, obj):
+        """
+        Iterate all values of the path of the model instance.
+
+        Values of multi-valued hops are flattened and streamed with
+        ``iterator()`` (or taken from the prefetch cache). ``None`` values of
+        single valued hops are skipped.
+        """
+        return self._iterate(obj, 0)
+
+    def _iterate(self, obj, index):
+        name, kind = self.hops[index]
+        value = getattr(obj, name, None)
+        if kind in MULTIPLE_HOPS or (kind == ATTRIBUTE and
+                                     hasattr(value, 'iterator')):
+            values = value.all()
+            if values._result_cache is None:
+                # not prefetched
+                values = values.iterator()
+        elif value is None:
+            return
+        elif (kind == ATTRIBUTE and isinstance(value, Iterable) and
+                not isinstance(value, six.string_types)):
+            values = value
+        else:
+            values = (value,)
+        for value in values:
+            if index == self._last:
+                yield value
+            elif value is not None:
+                for x in self._iterate(value, index + 1):
+                    yield x
+
+
+def compile_field_path(model, field_path):
+    """
+    Compile '__' separated field path of the model.
+
+    See :class:`FieldPath` for the detail.
+    """
+    return FieldPath(model, field_path)
+
+
+def _get_field(model, name):
+    from django.core.exceptions import FieldDoesNotExist
+    if model is None:
+        return None
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def _get_hop(field):
+    if not field.is_relation:
+        return (field.name, ATTRIBUTE)
+    if hasattr(field, 'get_accessor_name'):
+        # reverse relation
+        if field.one_to_one:
+            return (field.get_accessor_name(), REVERSE_ONE_TO_ONE)
+        return (field.get_accessor_name(), REVERSE)
+    if field.many_to_many:
+        return (field.name, MANY_TO_MANY)
+    if field.concrete and (field.many_to_one or field.one_to_one):
+        return (field.name, FOREIGN_KEY)
+    # e.g. generic foreign key
+    return (field.name, ATTRIBUTE)
+
+
+def _is_pk_relation(field):
+    return all(x.primary_key for x in field.foreign_related_fields)
@@ -4,6 +4,7 @@ A utilities of permission handler
 """
 from __future__ import unicode_literals
 import inspect
+import threading
 from django.core.exceptions import ImproperlyConfigured
 from permission.conf import settings
 from permission.compat import isstr
@@ -15,7 +16,22 @@ class PermissionHandlerRegistry(object):
     A registry class of permission handler
     """
     def __init__(self):
-        self._registry = {}
+        self._index = None
+        self._index_lock = threading.Lock()
+        self._generation = 0
+        self._handlers = {}
+        self._deferred = {}
+        self._deferred_lock = threading.RLock()
+
+    @property
+    def _registry(self):
+        return self._handlers
+
+    @_registry.setter
+    def _registry(self, value):
+        # the registry may be replaced as a whole (e.g. in tests)
+        self._handlers = value
+        self.clear_index()
 
     def register(self, model, handler=None):
         """
@@ -59,7 +75,9 @@ class PermissionHandlerRegistry(object):
 
         # Instantiate the handler to save in the registry
         instance = handler(model)
+        instance._registry = self
         self._registry[model] = instance
+        self.clear_index()
 
     def unregister(self, model):
         """
@@ -80,17 +98,240 @@ class PermissionHandlerRegistry(object):
                            "registered for '%s' yet" % model)
         # remove from registry
         del self._registry[model]
+        self.clear_index()
 
-    def get_handlers(self):
+    def defer(self, app_label, func):
+        """
+        Defer a registration until handlers of the app label are looked up
+
+        Parameters
+        ----------
+        app_label : string
+            An app label of the model which the registration is for
+        func : callable
+            A function which registers handlers or permission logics. It may
+            return the model to compile the handler of it.
+        """
+        with self._deferred_lock:
+            self._deferred.setdefault(app_label, []).append(func)
+
+    def is_deferred(self, app_label=None):
+        """
+        Check if registrations of the app label (or any app label) are
+        deferred
+        """
+        if app_label is None:
+            return bool(self._deferred)
+        return app_label in self._deferred
+
+    def materialize(self, app_label=None):
+        """
+        Run deferred registrations of the app label (or all app labels)
+
+        It is called automatically on the first lookup of handlers of the app
+        label. Handlers of the registered models are compiled when
+        ``PERMISSION_COMPILE_LOGICS`` is ``True``.
+
+        Parameters
+        ----------
+        app_label : string or None
+            An app label. All deferred registrations are run if ``None``.
+        """
+        with self._deferred_lock:
+            if app_label is None:
+                app_labels = list(self._deferred.keys())
+            else:
+                app_labels = [app_label]
+            models = []
+            for label in app_labels:
+                funcs = self._deferred.get(label)
+                while funcs:
+                    model = funcs.pop(0)()
+                    if model is not None and model not in models:
+                        models.append(model)
+                # remove the app label after registrations thus other threads
+                # wait for the lock until handlers are registered
+                self._deferred.pop(label, None)
+            if settings.PERMISSION_COMPILE_LOGICS:
+                for model in models:
+                    handler = self._registry.get(model)
+                    if hasattr(handler, 'compile'):
+                        handler.compile()
+
+    def get_handlers(self, materialize=True):
         """
         Get registered handler instances
 
+        Parameters
+        ----------
+        materialize : boolean
+            Run deferred registrations (see :meth:`materialize`) before
+
         Returns
         -------
         tuple
             permission handler tuple
         """
+        if materialize and self._deferred:
+            self.materialize()
         return tuple(self._registry.values())
 
+    def warm(self):
+        """
+        Load supported permissions of all registered handlers with a single
+        query.
+
+        Each handler otherwise queries permissions of its model (or
+        application) on the first check which requires the index of handlers.
+        The rows are grouped by content type and seeded to the handlers, the
+        index of handlers is built, and the catalogue of perms (see
+        :func:`permission.utils.permissions.get_perm_catalogue`) is set.
+        Deferred registrations are run before. Perms are derived from
+        ``_meta`` of models without the query when
+        ``PERMISSION_PERMS_FROM_META`` is ``True`` and
+        ``PERMISSION_PERMS_FROM_META_MERGE_DATABASE`` is not.
+        It is called in ``AppConfig.ready()`` when
+        ``PERMISSION_WARM_HANDLERS`` is ``True``.
+
+        Returns
+        -------
+        integer
+            A number of warmed handlers
+        """
+        from django.contrib.auth.models import Permission
+        from permission.utils.permissions import get_app_meta_perms
+        from permission.utils.permissions import get_model_meta_perms
+        from permission.utils.permissions import set_perm_catalogue
+        handlers = self.get_handlers()
+        from_meta = settings.PERMISSION_PERMS_FROM_META
+        merge = settings.PERMISSION_PERMS_FROM_META_MERGE_DATABASE
+        app_perms = {}
+        model_perms = {}
+        if not from_meta or merge:
+            qs = Permission.objects.values_list('content_type__app_label',
+                                                'content_type__model',
+                                                'codename')
+            catalogue = set()
+            for app_label, model_name, codename in qs.iterator():
+                perm = '%s.%s' % (app_label, codename)
+                catalogue.add(perm)
+                app_perms.setdefault(app_label, set()).add(perm)
+                model_perms.setdefault((app_label, model_name),
+                                       set()).add(perm)
+            set_perm_catalogue(catalogue)
+        for handler in handlers:
+            model = getattr(handler, 'model', None)
+            key = None
+            if model is not None:
+                key = (model._meta.app_label, model._meta.object_name.lower())
+            perms = set(app_perms.get(handler.app_label, ()))
+            perms_of_model = set(model_perms.get(key, ()))
+            if from_meta:
+                perms.update(get_app_meta_perms(handler.app_label))
+                if model is not None:
+                    perms_of_model.update(get_model_meta_perms(model))
+            handler.warm(perms, perms_of_model)
+        self._get_index()
+        return len(handlers)
+
+    def get_handlers_for_perm(self, perm):
+        """
+        Get registered handler instances which support the permission
+
+        Parameters
+        ----------
+        perm : string
+            `app_label.codename` formatted permission string
+
+        Returns
+        -------
+        tuple
+            permission handler tuple
+        """
+        if self._deferred and self.is_deferred(perm.split('.', 1)[0]):
+            self.materialize(perm.split('.', 1)[0])
+        return self._get_index()[1].get(perm, ())
+
+    def get_handlers_for_app_label(self, app_label):
+        """
+        Get registered handler instances which support the app label
+
+        Parameters
+        ----------
+        app_label : string
+            Django application name
+
+        Returns
+        -------
+        tuple
+            permission handler tuple
+        """
+        if self._deferred and self.is_deferred(app_label):
+            self.materialize(app_label)
+        return self._get_index()[2].get(app_label, ())
+
+    def clear_index(self):
+        """
+        Clear the perm and app_label indexes of registered handlers.
+
+        The indexes are rebuilt lazily on the next lookup. Call this method
+        when the supported permissions of a registered handler are changed.
+        """
+        with self._index_lock:
+            self._generation += 1
+            self._index = None
+
+    def requires_sync(self, perm):
+        """
+        Check if a lookup of handlers of the permission may run deferred
+        registrations or build the index, which may query database
+
+        Parameters
+        ----------
+        perm : string
+            `app_label.codename` formatted permission string
+
+        Returns
+        -------
+        boolean
+        """
+        if self._index is None:
+            return True
+        return self.is_deferred(perm.split('.', 1)[0])
+
+    def _get_index(self):
+        # the index is replaced as a whole thus readers do not require a lock
+        index = self._index
+        while index is None:
+            with self._index_lock:
+                index = self._index
+                if index is not None:
+                    break
+                generation = self._generation
+            # build the index out of the lock since handlers may query
+            # database. the index is stored only if no handler was registered
+            # (or the index was cleared) while building it, otherwise it may
+            # lack the new handlers thus it is built again
+            index = self._build_index(generation)
+            with self._index_lock:
+                if generation != self._generation:
+                    index = None
+                    continue
+                self._index = index
+        return index
+
+    def _build_index(self, generation):
+        perm_index = {}
+        app_label_index = {}
+        for handler in self.get_handlers(materialize=False):
+            for perm in handler.get_supported_permissions():
+                perm_index.setdefault(perm, []).append(handler)
+            for app_label in handler.get_supported_app_labels():
+                app_label_index.setdefault(app_label, []).append(handler)
+        perm_index = dict((k, tuple(v)) for k, v in perm_index.items())
+        app_label_index = dict((k, tuple(v))
+                               for k, v in app_label_index.items())
+        return generation, perm_index, app_label_index
+
 registry = PermissionHandlerRegistry()
 """Permission handler registry instance"""
@@ -3,9 +3,29 @@
 Permission logic utilities
 """
 from __future__ import unicode_literals
+import itertools
+import weakref
 from permission.logics import PermissionLogic
 
 
+_registration_counter = itertools.count(1)
+_registration_sequences = weakref.WeakKeyDictionary()
+
+
+def get_registration_sequence(permission_logic):
+    """
+    Get a sequence number of the permission logic in the registration order
+
+    Returns
+    -------
+    integer
+        A sequence number given when the permission logic is added for the
+        first time by :func:`add_permission_logic` (``0`` if it has not been
+        added).
+    """
+    return _registration_sequences.get(permission_logic, 0)
+
+
 def add_permission_logic(model, permission_logic):
     """
     Add permission logic to the model
@@ -37,8 +57,14 @@ def add_permission_logic(model, permission_logic):
         # register default permission handler
         registry.register(model, handler=None)
     model._permission_logics.add(permission_logic)
+    if permission_logic not in _registration_sequences:
+        _registration_sequences[permission_logic] = next(_registration_counter)
     # store target model to the permission_logic instance
     permission_logic.model = model
+    permission_logic.prepare()
+    # cached decisions of the model may be changed
+    from permission.signals import permission_logics_changed
+    permission_logics_changed(model)
 
 
 def remove_permission_logic(model, permission_logic, fail_silently=True):
@@ -82,4 +108,7 @@ def remove_permission_logic(model, permission_logic, fail_silently=True):
             pass
         else:
             model._permission_logics.remove(permission_logic)
+    # cached decisions of the model may be changed
+    from permission.signals import permission_logics_changed
+    permission_logics_changed(model)
 
@@ -80,6 +80,181 @@ def perm_to_permission(perm):
         return permission
 
 
+_perm_catalogue = None
+
+
+def get_perm_catalogue(reload=False):
+    """
+    Get a frozenset of all existing perms (`app_label.codename` strings).
+
+    The catalogue is loaded with a single query and kept in the process until
+    :func:`clear_perm_catalogue` is called (e.g. on ``post_migrate`` or when a
+    permission is saved or deleted).
+
+    Parameters
+    ----------
+    reload : boolean
+        Reload the catalogue from database
+
+    Returns
+    -------
+    frozenset
+        A frozenset of perms
+
+    Examples
+    --------
+    >>> 'auth.add_user' in get_perm_catalogue()
+    True
+    """
+    global _perm_catalogue
+    catalogue = _perm_catalogue
+    if catalogue is None or reload:
+        from django.contrib.auth.models import Permission
+        qs = Permission.objects.values_list('content_type__app_label',
+                                            'codename')
+        catalogue = frozenset('%s.%s' % x for x in qs.iterator())
+        _perm_catalogue = catalogue
+    return catalogue
+
+
+def set_perm_catalogue(perms):
+    """
+    Set the catalogue of perms which were loaded with another query (e.g. by
+    :meth:`permission.utils.handlers.PermissionHandlerRegistry.warm`).
+    """
+    global _perm_catalogue
+    _perm_catalogue = frozenset(perms)
+
+
+def clear_perm_catalogue():
+    """
+    Clear the catalogue of perms. It will be reloaded on the next access.
+    """
+    global _perm_catalogue
+    _perm_catalogue = None
+
+
+def _add_to_perm_catalogue(perm):
+    global _perm_catalogue
+    catalogue = _perm_catalogue
+    if catalogue is not None:
+        # the catalogue is replaced as a whole thus readers do not require a
+        # lock
+        _perm_catalogue = catalogue | frozenset([perm])
+
+
+def is_perm_presence_known(perm):
+    """
+    Check if :func:`check_perm_presence` can determine the presence of the
+    perm without querying database (e.g. in an event loop)
+
+    Returns
+    -------
+    boolean
+        ``True`` if the catalogue is loaded and it contains the perm (or the
+        perm is not a target of the check)
+    """
+    catalogue = _perm_catalogue
+    if catalogue is None:
+        return False
+    return '.' not in perm or perm in catalogue
+
+
+def check_perm_presence(perm):
+    """
+    Check if the permission-string exists in database.
+
+    The check is a set lookup in the catalogue of perms. A perm which is not
+    in the catalogue is looked up in database before raising the exception to
+    find permissions created by other processes.
+
+    Raises
+    ------
+    django.contrib.auth.models.Permission.DoesNotExist
+        If the permission does not exist
+
+    Examples
+    --------
+    >>> check_perm_presence('auth.add_user')
+    >>> check_perm_presence('auth.unknown_permission')
+    Traceback (most recent call last):
+        ...
+    DoesNotExist: ...
+    """
+    if perm in get_perm_catalogue():
+        return
+    if '.' not in perm:
+        # the format of perm is wrong and it is not a target of the check
+        return
+    from django.contrib.auth.models import Permission
+    app_label, codename = perm.split('.', 1)
+    if Permission.objects.filter(content_type__app_label=app_label,
+                                 codename=codename).exists():
+        _add_to_perm_catalogue(perm)
+        return
+    raise Permission.DoesNotExist(
+        "Permission matching '%s' does not exist." % perm)
+
+
+def user_has_perm_many(user_obj, perm, objs):
+    """
+    Check if user have permission of each object through all authentication
+    backends in the same way as ``user_obj.has_perm(perm, obj)``.
+
+    Active superusers have all permissions. Backends which have
+    ``has_perm_many`` (e.g. ``permission.backends.PermissionBackend``)
+    determine the permissions of the objects at once, others are asked for
+    each object. Objects granted by a backend are not passed to the following
+    backends and ``PermissionDenied`` raised by a backend denies the
+    permission without asking the following backends.
+
+    Parameters
+    ----------
+    user_obj : django user model instance
+        A django user model instance which be checked
+    perm : string
+        `app_label.codename` formatted permission string
+    objs : iterable
+        Saved django model instances
+
+    Returns
+    -------
+    dict
+        A dictionary which map each object to whether the user have the
+        permission of the object.
+    """
+    from django.contrib.auth import get_backends
+    from django.core.exceptions import PermissionDenied
+    objs = list(objs)
+    if getattr(user_obj, 'is_active', False) and \
+            getattr(user_obj, 'is_superuser', False):
+        return dict((obj, True) for obj in objs)
+    result = dict((obj, False) for obj in objs)
+    pending = objs
+    for backend in get_backends():
+        if not pending:
+            break
+        if hasattr(backend, 'has_perm_many'):
+            try:
+                decisions = backend.has_perm_many(user_obj, perm, pending)
+            except PermissionDenied:
+                break
+            for obj in pending:
+                if decisions.get(obj.pk):
+                    result[obj] = True
+        elif hasattr(backend, 'has_perm'):
+            denied = []
+            for obj in pending:
+                try:
+                    if backend.has_perm(user_obj, perm, obj):
+                        result[obj] = True
+                except PermissionDenied:
+                    denied.append(obj)
+            pending = [obj for obj in pending if obj not in denied]
+        pending = [obj for obj in pending if not result[obj]]
+    return result
+
+
 def get_app_perms(model_or_app_label):
     """
     Get permission-string list of the specified django application.
@@ -101,16 +276,26 @@ def get_app_perms(model_or_app_label):
     >>> perms2 = get_app_perms(Permission)
     >>> perms1 == perms2
     True
+
+    Perms are derived from ``_meta`` of the models of the application
+    without querying database when ``PERMISSION_PERMS_FROM_META`` is
+    ``True`` (see :func:`get_app_meta_perms`).
     """
     from django.contrib.auth.models import Permission
+    from permission.conf import settings
     if isinstance(model_or_app_label, six.string_types):
         app_label = model_or_app_label
     else:
         # assume model_or_app_label is model class
         app_label = model_or_app_label._meta.app_label
+    perms = set()
+    if settings.PERMISSION_PERMS_FROM_META:
+        perms = get_app_meta_perms(app_label)
+        if not settings.PERMISSION_PERMS_FROM_META_MERGE_DATABASE:
+            return perms
     qs = Permission.objects.filter(content_type__app_label=app_label)
-    perms = ('%s.%s' % (app_label, p.codename) for p in qs.iterator())
-    return set(perms)
+    perms.update('%s.%s' % (app_label, p.codename) for p in qs.iterator())
+    return perms
 
 
 def get_model_perms(model):
@@ -135,11 +320,81 @@ def get_model_perms(model):
     ...     'auth.delete_permission'
     ... ]
     True
+
+    Perms are derived from ``_meta`` of the model without querying database
+    when ``PERMISSION_PERMS_FROM_META`` is ``True`` (see
+    :func:`get_model_meta_perms`).
     """
     from django.contrib.auth.models import Permission
+    from permission.conf import settings
+    perms = set()
+    if settings.PERMISSION_PERMS_FROM_META:
+        perms = get_model_meta_perms(model)
+        if not settings.PERMISSION_PERMS_FROM_META_MERGE_DATABASE:
+            return perms
     app_label = model._meta.app_label
     model_name = model._meta.object_name.lower()
     qs = Permission.objects.filter(content_type__app_label=app_label,
                                    content_type__model=model_name)
-    perms = ('%s.%s' % (app_label, p.codename) for p in qs.iterator())
-    return set(perms)
+    perms.update('%s.%s' % (app_label, p.codename) for p in qs.iterator())
+    return perms
+
+
+def get_app_meta_perms(app_label):
+    """
+    Get permission-string list of the specified django application from
+    ``_meta`` of the models without querying database.
+
+    Parameters
+    ----------
+    app_label : string
+        An app_label string to specify the particular django application.
+
+    Returns
+    -------
+    set
+        A set of perms which django creates for the models of the
+        application (an empty set for unknown applications).
+    """
+    from django.apps import apps
+    try:
+        app_config = apps.get_app_config(app_label)
+    except LookupError:
+        return set()
+    perms = set()
+    for model in app_config.get_models():
+        perms.update(get_model_meta_perms(model))
+    return perms
+
+
+def get_model_meta_perms(model):
+    """
+    Get permission-string list of a specified django model from
+    ``_meta.default_permissions`` and ``_meta.permissions`` without querying
+    database.
+
+    Parameters
+    ----------
+    model : model class
+        A model class to specify the particular django model.
+
+    Returns
+    -------
+    set
+        A set of perms which django creates for the model.
+
+    Examples
+    --------
+    >>> sorted(get_model_meta_perms(Permission)) == [
+    ...     'auth.add_permission',
+    ...     'auth.change_permission',
+    ...     'auth.delete_permission'
+    ... ]
+    True
+    """
+    opts = model._meta
+    perms = set('%s.%s_%s' % (opts.app_label, action, opts.model_name)
+                for action in opts.default_permissions)
+    perms.update('%s.%s' % (opts.app_label, codename)
+                 for codename, name in opts.permissions)
+    return perms
@@ -0,0 +1,183 @@
+# coding=utf-8
+"""
+Version counters which invalidate cached permission decisions
+
+Signal receivers (see :mod:`permission.signals`) bump counters scoped to
+users, models and objects. Each cached decision is stamped with the counters
+of its user, model and object when it is stored, and the stamp is compared
+with the current counters when it is read, so stale decisions are discarded
+in O(1) without scanning cache keys.
+"""
+from __future__ import unicode_literals
+import itertools
+import threading
+from collections import OrderedDict
+
+
+__all__ = ('VersionCounters', 'VersionedCache', 'get_version_counters')
+
+
+USER = 'user'
+"""A scope of counters of users (``(USER, user pk)``)"""
+MODEL = 'model'
+"""A scope of counters of models (``(MODEL, concrete model)``)"""
+OBJECT = 'object'
+"""A scope of counters of objects (``(OBJECT, concrete model, pk)``)"""
+
+
+class VersionCounters(object):
+    """
+    Thread-safe version counters of users, models and objects
+
+    Counters are bounded; when a counter is discarded, the version of all
+    unknown scopes is raised to the latest version so entries stamped before
+    never match again.
+    """
+    def __init__(self, maxsize=65536):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        maxsize : integer
+            A maximum number of counters. ``None`` or ``0`` for unbound.
+        """
+        self.maxsize = maxsize
+        self._counters = OrderedDict()
+        self._sequence = itertools.count(1)
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._counters)
+
+    def get(self, scope):
+        """Get the current version of the scope"""
+        return self._counters.get(scope, self._floor)
+
+    def bump(self, scope):
+        """Make entries stamped with the current version of the scope stale"""
+        with self._lock:
+            self._counters.pop(scope, None)
+            # versions are unique thus a discarded counter never comes back
+            self._counters[scope] = next(self._sequence)
+            if self.maxsize:
+                while len(self._counters) > self.maxsize:
+                    _, version = self._counters.popitem(last=False)
+                    self._floor = max(self._floor, version)
+
+    def bump_user(self, user_pk):
+        """Make cached decisions of the user stale"""
+        self.bump((USER, user_pk))
+
+    def bump_model(self, model):
+        """
+        Make cached decisions of the model (and decisions without object)
+        stale
+        """
+        self.bump((MODEL, _get_concrete_model(model)))
+        self.bump((MODEL, None))
+
+    def bump_object(self, model, pk):
+        """Make cached decisions of the object stale"""
+        self.bump((OBJECT, _get_concrete_model(model), pk))
+
+    def get_stamp(self, user_obj, model=None, pk=None):
+        """
+        Get a stamp of current versions of the user, the model and the object
+
+        Parameters
+        ----------
+        user_obj : django user model instance
+            A django user model instance
+        model : django model class or None
+            A model of the decision. ``None`` for decisions of all models.
+        pk : object or None
+            A primary key of the object or ``None`` for decisions without
+            object
+        """
+        counters = self._counters
+        floor = self._floor
+        user_pk = getattr(user_obj, 'pk', None)
+        return (
+            counters.get((USER, user_pk), floor),
+            counters.get((MODEL, model), floor),
+            counters.get((OBJECT, model, pk), floor) if pk is not None else 0,
+        )
+
+
+class VersionedCache(object):
+    """
+    A dictionary-like view of a decision cache which discards stale entries
+
+    Keys are decision keys returned from
+    :func:`permission.utils.cache.get_decision_key`. Values are stored with a
+    stamp of :class:`VersionCounters` and entries of which stamp does not
+    match the current versions are treated as missing.
+    """
+    _marker = object()
+
+    def __init__(self, store, user_obj, model=None, counters=None):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        store : dictionary-like object
+            A store of entries (e.g. a dictionary or a namespace of
+            :class:`permission.utils.cache.RequestCache`)
+        user_obj : django user model instance
+            A django user model instance of the decisions
+        model : django model class or None
+            A model of decisions without object
+        counters : VersionCounters or None
+            Version counters. The process-wide counters are used if ``None``
+        """
+        self.store = store
+        self.user_obj = user_obj
+        self.model = _get_concrete_model(model) if model else None
+        if counters is None:
+            counters = get_version_counters()
+        self.counters = counters
+
+    def _get_stamp(self, key):
+        _, model, pk = key
+        if model is None:
+            model = self.model
+        return self.counters.get_stamp(self.user_obj, model, pk)
+
+    def __contains__(self, key):
+        return self.get(key, self._marker) is not self._marker
+
+    def __getitem__(self, key):
+        value = self.get(key, self._marker)
+        if value is self._marker:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.store[key] = (self._get_stamp(key), value)
+
+    def get(self, key, default=None):
+        entry = self.store.get(key)
+        if entry is None:
+            return default
+        stamp, value = entry
+        if stamp != self._get_stamp(key):
+            return default
+        return value
+
+
+def _get_concrete_model(model):
+    meta = getattr(model, '_meta', None)
+    return meta.concrete_model if meta is not None else model
+
+
+_version_counters = VersionCounters()
+
+
+def get_version_counters():
+    """
+    Get the process-wide version counters
+    """
+    return _version_counters
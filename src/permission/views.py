@@ -0,0 +1,37 @@
+# coding=utf-8
+"""
+Views of django-permission
+"""
+from __future__ import unicode_literals
+from django.http import HttpResponse
+from django.http import Http404
+from permission.metrics import get_metrics
+
+
+__all__ = ('metrics',)
+
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def metrics(request):
+    """
+    Render metrics of permission checks in the Prometheus text exposition
+    format
+
+    It raises ``Http404`` when ``PERMISSION_METRICS_ENABLE`` is not ``True``.
+    Restrict access to the view (e.g. with a decorator) in your URLconf.
+
+    Examples
+    --------
+    >>> from django.conf.urls import url
+    >>> from permission.views import metrics
+    >>> urlpatterns = [
+    ...     url(r'^metrics/permission$', metrics),
+    ... ]
+    """
+    registry = get_metrics()
+    if registry is None:
+        raise Http404('Metrics of permission checks are not enabled')
+    return HttpResponse(registry.registry.render(),
+                        content_type=PROMETHEUS_CONTENT_TYPE)